@@ -0,0 +1,179 @@
+"""Admission control for workflow server runs."""
+
+import asyncio
+import itertools
+import math
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from enum import StrEnum
+
+# Used for Retry-After estimates until a run has actually completed
+DEFAULT_RUN_SECONDS = 60.0
+
+
+class Priority(StrEnum):
+    """Scheduling class of a workflow run."""
+
+    HIGH = "high"
+    NORMAL = "normal"
+    LOW = "low"
+
+
+_PRIORITY_RANK = {Priority.HIGH: 0, Priority.NORMAL: 1, Priority.LOW: 2}
+
+
+@dataclass
+class AdmissionLimits:
+    """Limits applied to concurrent workflow runs.
+
+    max_queue_depth bounds each priority lane separately, so a backlog of batch
+    runs never causes interactive runs to be rejected. A run that has waited
+    aging_seconds is promoted one priority class, so lower lanes are never
+    starved. It rises at most one class, and a run already in that class goes
+    first, so full runs waiting behind a long run never overtake voice-only reruns.
+    """
+
+    max_in_flight: int = 1
+    max_queue_depth: int = 8
+    aging_seconds: float = 30.0
+
+
+@dataclass(eq=False)
+class _Waiter:
+    priority: Priority
+    sequence: int
+    future: asyncio.Future[None]
+    # Looked up at call time so tests can patch the clock
+    enqueued_at: float = field(default_factory=lambda: time.monotonic())  # noqa: PLW0108
+
+    def promoted(self, now: float, aging_seconds: float) -> bool:
+        return aging_seconds > 0 and now - self.enqueued_at >= aging_seconds
+
+    def effective_rank(self, now: float, aging_seconds: float) -> int:
+        return _PRIORITY_RANK[self.priority] - int(self.promoted(now, aging_seconds))
+
+    def schedule_key(self, now: float, aging_seconds: float) -> tuple[int, bool, int]:
+        # On equal rank, a run that belongs to the lane goes ahead of one promoted into it
+        return (self.effective_rank(now, aging_seconds), self.promoted(now, aging_seconds), self.sequence)
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when a run cannot be queued because the admission queue is full."""
+
+    def __init__(self, retry_after: float) -> None:
+        self.retry_after = retry_after
+        super().__init__(f"Workflow server is at capacity; retry after {retry_after:.0f}s")
+
+
+class AdmissionController:
+    """Bounds in-flight workflow runs and queues the overflow up to a fixed depth.
+
+    Runs beyond `max_in_flight` wait in priority order, FIFO within a priority.
+    Once `max_queue_depth` runs are waiting in a lane, further requests for that
+    lane are rejected immediately with a retry estimate derived from recently
+    observed run durations.
+    """
+
+    def __init__(self, limits: AdmissionLimits, duration_window: int = 50) -> None:
+        self.limits = limits
+        self.in_flight = 0
+        self._waiters: list[_Waiter] = []
+        self._sequence = itertools.count()
+        self._durations: deque[float] = deque(maxlen=duration_window)
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of runs waiting for a slot."""
+        return len(self._waiters)
+
+    def average_run_seconds(self) -> float:
+        """Average duration of recently completed runs."""
+        if not self._durations:
+            return DEFAULT_RUN_SECONDS
+        return sum(self._durations) / len(self._durations)
+
+    def p95_run_seconds(self) -> float | None:
+        """95th percentile duration of recently completed runs, or None before any has completed."""
+        if not self._durations:
+            return None
+        durations = sorted(self._durations)
+        return durations[min(len(durations) - 1, math.ceil(0.95 * len(durations)) - 1)]
+
+    def lane_depth(self, priority: Priority) -> int:
+        """Number of runs of the given priority waiting for a slot."""
+        return sum(1 for waiter in self._waiters if waiter.priority == priority)
+
+    def retry_after(self, priority: Priority = Priority.NORMAL) -> float:
+        """Estimate how long the work ahead of a new run of this priority needs to drain."""
+        ahead = sum(1 for waiter in self._waiters if _PRIORITY_RANK[waiter.priority] <= _PRIORITY_RANK[priority])
+        rounds = math.ceil((self.in_flight + ahead) / self.limits.max_in_flight)
+        return max(1.0, rounds * self.average_run_seconds())
+
+    def stats(self) -> dict:
+        """Snapshot of the current admission state."""
+        p95_run_seconds = self.p95_run_seconds()
+        return {
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "lanes": {priority.value: self.lane_depth(priority) for priority in Priority},
+            "max_in_flight": self.limits.max_in_flight,
+            "max_queue_depth": self.limits.max_queue_depth,
+            "average_run_seconds": round(self.average_run_seconds(), 3),
+            "p95_run_seconds": None if p95_run_seconds is None else round(p95_run_seconds, 3),
+        }
+
+    @asynccontextmanager
+    async def admit(self, priority: Priority = Priority.NORMAL) -> AsyncIterator[None]:
+        """Hold an execution slot for the duration of the block.
+
+        Raises:
+            AdmissionRejectedError: If the queue for this priority is already full.
+        """
+        await self._acquire(priority)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._durations.append(time.monotonic() - started)
+            self._release()
+
+    async def _acquire(self, priority: Priority) -> None:
+        if self.in_flight < self.limits.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            return
+
+        if self.lane_depth(priority) >= self.limits.max_queue_depth:
+            raise AdmissionRejectedError(self.retry_after(priority))
+
+        waiter = _Waiter(
+            priority=priority,
+            sequence=next(self._sequence),
+            future=asyncio.get_running_loop().create_future(),
+        )
+        self._waiters.append(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif not waiter.future.cancelled():
+                # The slot was handed over just before the caller went away; pass it on
+                self._release()
+            raise
+
+    def _next_waiter(self) -> _Waiter:
+        now = time.monotonic()
+        return min(self._waiters, key=lambda waiter: waiter.schedule_key(now, self.limits.aging_seconds))
+
+    def _release(self) -> None:
+        # Hand the slot straight to the next waiter so in_flight never dips in between
+        while self._waiters:
+            waiter = self._next_waiter()
+            self._waiters.remove(waiter)
+            if not waiter.future.done():
+                waiter.future.set_result(None)
+                return
+        self.in_flight -= 1
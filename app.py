@@ -1,8 +1,16 @@
 """Streamlit application for executing Griptape Nodes workflows via HTTP."""
 
 import asyncio
+import hashlib
 import json
 import logging
+import random
+import sys
+import time
+import uuid
+from collections.abc import Mapping
+from datetime import UTC, datetime
+from types import MappingProxyType
 from typing import Any
 
 import httpx
@@ -10,7 +18,12 @@ import streamlit as st
 from dotenv import load_dotenv
 from griptape.artifacts.audio_url_artifact import AudioUrlArtifact
 
-from workflow_server_manager import WorkflowServerManager
+import wire_format
+from input_sessions import InputSessionClient
+from result_cache import ResultCache, load_result_cache, result_cache_key
+from run_history import RunHistory, RunSummary, load_run_history
+from workflow_jobs import WorkflowJobExecutor
+from workflow_server_manager import ServerAddress, WorkflowServerManager
 
 # Load environment variables from .env file
 load_dotenv()
@@ -19,6 +32,17 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Retry policy for runs the workflow server sheds with 429 Too Many Requests
+MAX_RUN_ATTEMPTS = 5
+RETRY_BASE_DELAY = 2.0
+RETRY_MAX_DELAY = 60.0
+
+# How often the Generation tab checks on a workflow running in the background
+JOB_POLL_INTERVAL = 1.0
+
+# Workflow module the app runs; the server manager may host it in another workflow's server
+WORKFLOW_MODULE = "published_nodes_workflow"
+
 # Page configuration
 st.set_page_config(
     page_title="Griptape Nodes Audio Generation",
@@ -33,36 +57,172 @@ def get_server_manager() -> WorkflowServerManager:
     return WorkflowServerManager.get_instance()
 
 
-async def call_workflow_server(port: int, flow_input: dict) -> dict:
-    """Call a workflow server's /run endpoint.
+@st.cache_resource
+def get_result_cache() -> ResultCache:
+    """Get the workflow result cache shared by all sessions."""
+    return load_result_cache()
+
+
+@st.cache_resource
+def get_run_history() -> RunHistory:
+    """Get the run history store shared by all sessions."""
+    return load_run_history()
+
+
+@st.cache_resource
+def get_input_session_client() -> InputSessionClient:
+    """Get the record of the inputs each session last sent to the workflow server."""
+    return InputSessionClient()
+
+
+@st.cache_resource
+def get_job_executor() -> WorkflowJobExecutor:
+    """Get the background executor shared by all sessions for workflow runs."""
+    return WorkflowJobExecutor()
+
+
+async def call_workflow_server(  # noqa: PLR0913
+    server: ServerAddress,
+    flow_input: dict,
+    *,
+    coalesce: bool = True,
+    priority: str | None = None,
+    audio_formats: list[str] | None = None,
+    mixdown: dict | None = None,
+    input_session: str | None = None,
+    path: str = "/run",
+    voice_text: str | None = None,
+) -> dict:
+    """Call a workflow server's /run endpoint, or the run path of a workflow it hosts.
+
+    The request goes out as msgpack and compressed when the optional codecs are
+    installed, and the response comes back in the most compact format both
+    sides support.
+
+    With an input session, only the "Start Flow" fields that changed since the
+    session's last run are sent. If the server doesn't hold the session's
+    previous inputs, it answers 409 and the complete inputs are sent instead.
 
     Args:
-        port: The port the workflow server is running on
+        server: Where the workflow server listens (a localhost port or a Unix socket)
         flow_input: The complete flow input dict (including "Start Flow" key)
+        coalesce: If True, share the result of an identical run already in flight on the server
+        priority: Scheduling lane ("high", "normal" or "low"); None lets the server classify the run
+        audio_formats: Audio encodings the client can play, most preferred first; None keeps the originals
+        mixdown: Mixdown settings for a voice-over-music track; None skips the mix
+        input_session: Id of the app session the run is for; None sends the complete inputs
+        path: Path that runs the workflow on this server (see WorkflowServerManager.run_path)
+        voice_text: Monologue a voice-only run voices; None voices the Speechwriter's last output on the server
 
     Returns:
         The workflow output dict from the server response
     """
-    async with httpx.AsyncClient(timeout=300.0) as client:
-        response = await client.post(
-            f"http://localhost:{port}/run",
-            json={"flow_input": flow_input},
-        )
+    payload: dict[str, Any] = {"flow_input": flow_input, "coalesce": coalesce}
+    if priority is not None:
+        payload["priority"] = priority
+    if audio_formats:
+        payload["audio_formats"] = audio_formats
+    if mixdown is not None:
+        payload["mixdown"] = mixdown
+    if voice_text is not None:
+        payload["voice_text"] = voice_text
+
+    start_flow = flow_input.get("Start Flow", {})
+    sessions = get_input_session_client()
+    if input_session is not None:
+        payload["flow_input"] = {name: values for name, values in flow_input.items() if name != "Start Flow"}
+        payload["input_session"] = sessions.update(input_session, start_flow)
+
+    async with server.async_client(timeout=300.0) as client:
+        response = await _post_run(client, path, payload)
+        if input_session is not None and response.status_code == httpx.codes.CONFLICT:
+            payload["input_session"] = sessions.update(input_session, start_flow, full=True)
+            response = await _post_run(client, path, payload)
         response.raise_for_status()
-        result = response.json()
-        return result.get("output", {})
+        # httpx has already undone the Content-Encoding
+        result = wire_format.decode(response.content, response.headers.get("content-type"))
+
+    if input_session is not None and result.get("input_version"):
+        sessions.confirm(input_session, result["input_version"], start_flow)
+    return result.get("output", {})
+
+
+async def _post_run(client: httpx.AsyncClient, path: str, payload: dict[str, Any]) -> httpx.Response:
+    """Post a run in the most compact wire format this side supports."""
+    content_type = wire_format.content_types()[0]
+    body, encoding = wire_format.encode(payload, content_type, wire_format.encodings()[0])
+    headers = {**wire_format.request_headers(), "Content-Type": content_type}
+    if encoding != wire_format.IDENTITY:
+        headers["Content-Encoding"] = encoding
+
+    response = await client.post(path, content=body, headers=headers)
+    if response.status_code == httpx.codes.UNSUPPORTED_MEDIA_TYPE:
+        # The server lacks an optional codec this side has; plain JSON always works
+        response = await client.post(path, json=payload)
+    return response
+
 
+def _retry_delay(response: httpx.Response, attempt: int) -> float:
+    """Compute a jittered delay before retrying a run the server rejected.
 
-def _initialize_session_state() -> None:  # noqa: C901, PLR0912
-    """Initialize all session state variables with default values."""
-    # Text area defaults (placeholders until user provides actual defaults)
-    if "world_rules" not in st.session_state:
-        st.session_state.world_rules = """It is the 2650s. The Terran Confederation Space Force is in a desperate war with an aggressive race of cat-like aliens called the Kilrathi.
+    Honors the server's Retry-After estimate when present and falls back to
+    exponential backoff otherwise. Jitter spreads retries from many clients so
+    they don't all return at the same moment.
+    """
+    try:
+        delay = float(response.headers.get("Retry-After", ""))
+    except ValueError:
+        delay = RETRY_BASE_DELAY * 2**attempt
+    delay = min(delay, RETRY_MAX_DELAY)
+    return delay * random.uniform(1.0, 1.5)  # noqa: S311
+
+
+async def call_workflow_server_with_retry(  # noqa: PLR0913
+    server: ServerAddress,
+    flow_input: dict,
+    *,
+    coalesce: bool = True,
+    priority: str | None = None,
+    audio_formats: list[str] | None = None,
+    mixdown: dict | None = None,
+    input_session: str | None = None,
+    path: str = "/run",
+    voice_text: str | None = None,
+) -> dict:
+    """Call a workflow server, retrying when it reports it is at capacity.
 
-Each part of the campaign takes place across multiple systems in space. Within a system, fighter teams make multiple sorties against the Kilrathi. Depending on how these sorties perform, they will either win or lose the system, affecting the outcome of the campaign."""
+    Raises:
+        httpx.HTTPStatusError: If the server keeps rejecting the run or fails with another status.
+    """
+    options: dict[str, Any] = {
+        "coalesce": coalesce,
+        "priority": priority,
+        "audio_formats": audio_formats,
+        "mixdown": mixdown,
+        "input_session": input_session,
+        "path": path,
+        "voice_text": voice_text,
+    }
+    for attempt in range(MAX_RUN_ATTEMPTS - 1):
+        try:
+            return await call_workflow_server(server, flow_input, **options)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != httpx.codes.TOO_MANY_REQUESTS:
+                raise
+            delay = _retry_delay(e.response, attempt)
+            logger.warning("Workflow server at capacity, retrying in %.1fs", delay)
+            await asyncio.sleep(delay)
+    return await call_workflow_server(server, flow_input, **options)
+
+
+# Defaults for every workflow input, shared by all sessions. A session only stores
+# the inputs its user changed, so these long prompts exist once per process.
+DEFAULT_INPUTS: Mapping[str, Any] = MappingProxyType(
+    {
+        "world_rules": """It is the 2650s. The Terran Confederation Space Force is in a desperate war with an aggressive race of cat-like aliens called the Kilrathi.
 
-    if "character_definition" not in st.session_state:
-        st.session_state.character_definition = """You are Colonel Peter Halcyon of the TCS Tiger's Claw.
+Each part of the campaign takes place across multiple systems in space. Within a system, fighter teams make multiple sorties against the Kilrathi. Depending on how these sorties perform, they will either win or lose the system, affecting the outcome of the campaign.""",
+        "character_definition": """You are Colonel Peter Halcyon of the TCS Tiger's Claw.
 
 Your duty is to oversee sorties of fighters in the ongoing war. You assign missions and evaluate performance.
 
@@ -81,19 +241,15 @@ Next, you want to lay out secondary objectives and how the team performed with t
 
 Next, you want to relay how the wing commander performed in their role. You need to address how they acted as a leader, and how they treated their wingmen. Losing a wingman is a severe morale loss, so you want to stress strong leadership that emphasizes teamwork.
 
-Finally, you want to discuss how the team performed in combat, and ask them how to improve. Assess their tactics and how they executed."""
-
-    if "data_expert_1" not in st.session_state:
-        st.session_state.data_expert_1 = """You are an expert describing the objectives of a mission and whether they were met or not.
+Finally, you want to discuss how the team performed in combat, and ask them how to improve. Assess their tactics and how they executed.""",
+        "data_expert_1": """You are an expert describing the objectives of a mission and whether they were met or not.
 
 Describe the mission and its objectives (including secondary objectives).
 
 Based on the facts that you have, assess whether the objectives were met or not.
 
-You are only given facts as a JSON table."""
-
-    if "data_expert_2" not in st.session_state:
-        st.session_state.data_expert_2 = """You are an expert on summarizing encounters that happened during a military sortie.
+You are only given facts as a JSON table.""",
+        "data_expert_2": """You are an expert on summarizing encounters that happened during a military sortie.
 
 Describe the encounters that occurred during the mission. Place the encounters in context of the mission plan, if there was one.
 
@@ -105,10 +261,8 @@ For any combat engagement, describe the outcome. If ships were damaged or destro
 
 If combat did not occur at a specified waypoint, mention that.
 
-You are only given facts as a JSON table."""
-
-    if "data_expert_3" not in st.session_state:
-        st.session_state.data_expert_3 = """You are an expert on assessing a sortie's ability to act as an effective team. Do not focus on summarizing overall mission objectives; we are focused on individuals and how they contributed to operating as a team.
+You are only given facts as a JSON table.""",
+        "data_expert_3": """You are an expert on assessing a sortie's ability to act as an effective team. Do not focus on summarizing overall mission objectives; we are focused on individuals and how they contributed to operating as a team.
 
 Based on the data provided, describe the team's coordination. This should include the squad's tactics and outcomes.
 
@@ -118,15 +272,11 @@ Of particular emphasis will be the effectiveness of the wing commander (leader).
 
 Be sure to summarize the contributions of each friendly participant. Where did they excel? How can they improve?
 
-You are only given facts as a JSON table."""
-
-    if "summarizer" not in st.session_state:
-        st.session_state.summarizer = """Summarize the breakdowns each of the experts provided.
+You are only given facts as a JSON table.""",
+        "summarizer": """Summarize the breakdowns each of the experts provided.
 
-You are providing a mission summary for the wing that just flew a sortie."""
-
-    if "speechwriter_rules" not in st.session_state:
-        st.session_state.speechwriter_rules = """Generate a mission debriefing for the wing commander and any wingmen they may have had under them during this mission. You will be provided with a mission summary.
+You are providing a mission summary for the wing that just flew a sortie.""",
+        "speechwriter_rules": """Generate a mission debriefing for the wing commander and any wingmen they may have had under them during this mission. You will be provided with a mission summary.
 
 The debriefing will be delivered as audio, so prepare it for spoken delivery by inserting audio tags and adjusting punctuation, capitalization, and pacing to convey tone and emotion.
 
@@ -138,19 +288,15 @@ Audio tags are supplied in [brackets]. These will be used to express how the lin
 
 Audio tags can also be used for pacing. [sighs] and [exhales] can convey the speaker's mood, for example.
 
-Ellipses and capitalized words can be used to adjust pacing and delivery."""
-
-    if "music_coach_rules" not in st.session_state:
-        st.session_state.music_coach_rules = """This music will be used behind dialogue delivery. It should not overwhelm the dialogue. We are here to convey a tone and mood within a tense and dangerous environment.
+Ellipses and capitalized words can be used to adjust pacing and delivery.""",
+        "music_coach_rules": """This music will be used behind dialogue delivery. It should not overwhelm the dialogue. We are here to convey a tone and mood within a tense and dangerous environment.
 
 It is there to ENHANCE the delivery of the dialogue, not to distract from it.
 
 The music should not have words.
 
-Based on the mission summary delivered, generate a music generation prompt that reflects the tone of the commander."""
-
-    if "game_data_json" not in st.session_state:
-        st.session_state.game_data_json = """{
+Based on the mission summary delivered, generate a music generation prompt that reflects the tone of the commander.""",
+        "game_data_json": """{
   "location": "Deneb system",
   "mission_type": "Patrol",
   "primary_objectives": {
@@ -280,18 +426,34 @@ Based on the mission summary delivered, generate a music generation prompt that
       "ships": 1
     }
   }
-}"""
+}""",
+        "stability": "Natural",
+        "speed": 1.0,
+        "voice_preset": "James",
+    }
+)
+
+
+def get_input(name: str) -> Any:
+    """Current value of a workflow input: the session's override, or the shared default."""
+    return st.session_state.get(name, DEFAULT_INPUTS[name])
+
 
-    # Voice generation parameters
-    if "stability" not in st.session_state:
-        st.session_state.stability = "Natural"
+def set_input(name: str, value: Any) -> None:
+    """Store a workflow input in the session only while it differs from the default."""
+    if value == DEFAULT_INPUTS[name]:
+        st.session_state.pop(name, None)
+    else:
+        st.session_state[name] = value
 
-    if "speed" not in st.session_state:
-        st.session_state.speed = 1.0
 
-    if "voice_preset" not in st.session_state:
-        st.session_state.voice_preset = "James"
+def input_text_area(name: str, label: str, **kwargs: Any) -> None:
+    """Text area bound to a workflow input under the stable widget key `<name>_input`."""
+    set_input(name, st.text_area(label, value=get_input(name), key=f"{name}_input", **kwargs))
 
+
+def _initialize_session_state() -> None:
+    """Initialize per-session runtime state; workflow inputs fall back to DEFAULT_INPUTS."""
     # Track last-used voice parameters for change detection
     if "last_run_stability" not in st.session_state:
         st.session_state.last_run_stability = None
@@ -309,6 +471,15 @@ Based on the mission summary delivered, generate a music generation prompt that
     if "workflow_running" not in st.session_state:
         st.session_state.workflow_running = False
 
+    if "game_data_valid" not in st.session_state:
+        st.session_state.game_data_valid = True
+
+    if "active_job" not in st.session_state:
+        st.session_state.active_job = None
+
+    if "job_message" not in st.session_state:
+        st.session_state.job_message = None
+
     # Output state
     if "workflow_outputs" not in st.session_state:
         st.session_state.workflow_outputs = None
@@ -325,13 +496,13 @@ def voice_parameters_changed() -> bool:
         return False
 
     return (
-        st.session_state.stability != st.session_state.last_run_stability
-        or st.session_state.speed != st.session_state.last_run_speed
-        or st.session_state.voice_preset != st.session_state.last_run_voice_preset
+        get_input("stability") != st.session_state.last_run_stability
+        or get_input("speed") != st.session_state.last_run_speed
+        or get_input("voice_preset") != st.session_state.last_run_voice_preset
     )
 
 
-async def execute_workflow_async(  # noqa: PLR0913
+async def execute_workflow_async(  # noqa: C901, PLR0911, PLR0913
     world_rules: str,
     character_definition: str,
     data_expert_1: str,
@@ -346,6 +517,14 @@ async def execute_workflow_async(  # noqa: PLR0913
     voice_preset: str,
     *,
     run_voice_generation_only: bool,
+    coalesce: bool = True,
+    priority: str | None = None,
+    audio_formats: list[str] | None = None,
+    mixdown: dict | None = None,
+    use_cache: bool = True,
+    fresh_run: bool = False,
+    input_session: str | None = None,
+    voice_text: str | None = None,
 ) -> dict:
     """Execute the Griptape Nodes workflow via HTTP.
 
@@ -363,6 +542,15 @@ async def execute_workflow_async(  # noqa: PLR0913
         speed: Voice speed (0.7 to 1.2)
         voice_preset: Voice preset name
         run_voice_generation_only: If True, only regenerate voice audio without running full workflow
+        coalesce: If True, share the result of an identical run already in flight instead of starting a fresh one
+        priority: Scheduling lane on the workflow server; None lets voice-only reruns jump ahead of full runs
+        audio_formats: Audio encodings the browser can play, most preferred first; None keeps the originals
+        mixdown: Mixdown settings for a voice-over-music track; None skips the mix
+        use_cache: If True, return a cached result for identical inputs and cache successful runs
+        fresh_run: If True, generate a new result even if one is cached; it replaces the cached one
+        input_session: Id of the app session, to send only the inputs changed since its last run
+        voice_text: Monologue a voice-only run voices, i.e. the one on screen; a voice-only run without it
+            voices whatever the server generated last and is never cached
 
     Returns:
         dict: Contains workflow output including audio artifacts, text outputs, and retrospective.
@@ -385,8 +573,22 @@ async def execute_workflow_async(  # noqa: PLR0913
         }
     }
 
+    options: dict[str, Any] = {"audio_formats": audio_formats, "mixdown": mixdown}
+    if run_voice_generation_only:
+        # The same voice settings give different audio for a different monologue
+        options["voice_text"] = voice_text
+    cache = get_result_cache() if use_cache and (voice_text is not None or not run_voice_generation_only) else None
+    cache_key = result_cache_key(flow_input, options)
+    if cache is not None and not fresh_run:
+        cached = await asyncio.to_thread(cache.get, cache_key)
+        if cached is not None:
+            logger.info("Returning cached workflow result")
+            return cached
+
     manager = get_server_manager()
-    port = manager.get_port("published_nodes_workflow")
+    # Starts the server if it isn't running, which blocks until it is ready
+    # A session stays on one worker, which holds its inputs and the monologue voice-only reruns voice
+    port = await asyncio.to_thread(manager.get_port, WORKFLOW_MODULE, input_session)
 
     if port is None:
         return {
@@ -394,8 +596,20 @@ async def execute_workflow_async(  # noqa: PLR0913
             "result_details": "Workflow server not configured",
         }
 
+    started_at = time.monotonic()
     try:
-        output = await call_workflow_server(port, flow_input)
+        output = await call_workflow_server_with_retry(
+            manager.address(port),
+            flow_input,
+            coalesce=coalesce,
+            priority=priority,
+            audio_formats=audio_formats,
+            mixdown=mixdown,
+            input_session=input_session,
+            # A module hosted in another workflow's server isn't the one at its /run
+            path=manager.run_path(WORKFLOW_MODULE),
+            voice_text=voice_text,
+        )
 
         # Check for error in output
         if "error" in output:
@@ -407,11 +621,12 @@ async def execute_workflow_async(  # noqa: PLR0913
         # Parse the End Flow data from the raw output
         end_flow_data = output.get("End Flow", {})
 
-        return {
+        result = {
             "was_successful": end_flow_data.get("was_successful", False),
             "result_details": end_flow_data.get("result_details", ""),
             "voice_audio_artifact": end_flow_data.get("voice_audio_artifact"),
             "music_audio_artifact": end_flow_data.get("music_audio_artifact"),
+            "mixed_audio_artifact": end_flow_data.get("mixed_audio_artifact"),
             "speechwriter_output": end_flow_data.get("speechwriter_output", ""),
             "retrospective": end_flow_data.get("retrospective", ""),
         }
@@ -423,11 +638,51 @@ async def execute_workflow_async(  # noqa: PLR0913
         }
     except httpx.HTTPStatusError as e:
         logger.exception("Workflow server returned error")
+        if e.response.status_code == httpx.codes.TOO_MANY_REQUESTS:
+            return {
+                "was_successful": False,
+                "result_details": "Workflow server is busy. Please try again in a few minutes.",
+            }
         return {
             "was_successful": False,
             "result_details": f"Workflow server error: {e.response.status_code}",
         }
 
+    try:
+        await asyncio.to_thread(
+            get_run_history().record,
+            flow_input["Start Flow"],
+            result,
+            inputs_hash=cache_key,
+            duration_seconds=time.monotonic() - started_at,
+        )
+    except Exception:
+        logger.exception("Failed to record run in history")
+
+    # Only successful runs are worth reusing; failures are often transient
+    if cache is not None and result["was_successful"]:
+        await asyncio.to_thread(cache.put, cache_key, result)
+    return result
+
+
+def preferred_audio_formats() -> list[str]:
+    """Audio encodings the current browser can play, most compact first."""
+    user_agent = st.context.headers.get("User-Agent", "")
+    # Safari plays AAC everywhere but Ogg Opus only on recent versions
+    is_safari = "Safari" in user_agent and not any(name in user_agent for name in ("Chrome", "Chromium", "Edg"))
+    if is_safari:
+        return ["aac", "original"]
+    return ["opus", "aac", "original"]
+
+
+def voice_only_mixdown(outputs: dict | None) -> dict:
+    """Mixdown settings that remix a regenerated voice against the music already generated."""
+    music_artifact = (outputs or {}).get("music_audio_artifact")
+    if isinstance(music_artifact, dict):
+        music_url = (music_artifact.get("meta") or {}).get("original_url") or music_artifact.get("value")
+        return {"music_url": music_url}
+    return {}
+
 
 def get_audio_artifact_value(artifact: Any) -> str | None:
     """Extract the URL/path from an AudioUrlArtifact or dict artifact."""
@@ -440,18 +695,517 @@ def get_audio_artifact_value(artifact: Any) -> str | None:
     return None
 
 
-def main() -> None:  # noqa: PLR0915, PLR0912, C901
+@st.cache_data(max_entries=16, show_spinner=False)
+def _game_data_error(digest: str, _game_data: str) -> str | None:  # noqa: ARG001
+    """Parse game data once per content digest (the underscore keeps the text itself out of the cache key)."""
+    try:
+        json.loads(_game_data)
+    except json.JSONDecodeError as e:
+        return e.msg
+    return None
+
+
+def validate_game_data(game_data: str) -> str | None:
+    """Validate game data JSON, memoized by content hash.
+
+    Returns:
+        The JSON error message, or None if the game data is valid.
+    """
+    digest = hashlib.blake2b(game_data.encode(), digest_size=16).hexdigest()
+    return _game_data_error(digest, game_data)
+
+
+# Start Flow parameter -> (workflow input, widget key) for restoring a past run
+RESTORABLE_INPUTS = {
+    "world_rules": ("world_rules", "world_rules_input"),
+    "character_definition": ("character_definition", "character_definition_input"),
+    "data_expert_1": ("data_expert_1", "data_expert_1_input"),
+    "data_expert_2": ("data_expert_2", "data_expert_2_input"),
+    "data_expert_3": ("data_expert_3", "data_expert_3_input"),
+    "summarizer": ("summarizer", "summarizer_input"),
+    "speechwriter_rules": ("speechwriter_rules", "speechwriter_rules_input"),
+    "music_coach_rules": ("music_coach_rules", "music_coach_rules_input"),
+    "game_data": ("game_data_json", "game_data_json_input"),
+    "stability": ("stability", "stability_select"),
+    "speed": ("speed", "speed_slider"),
+    "voice_preset": ("voice_preset", "voice_preset_select"),
+}
+
+
+def restore_run(run_id: int) -> None:
+    """Load a past run's inputs and outputs into the session.
+
+    Used as a button callback, which runs before any widget is drawn, so the
+    widgets' own state can be overwritten too.
+    """
+    record = get_run_history().load(run_id)
+    if record is None:
+        st.session_state.job_message = {"ok": False, "text": f"✗ Run {run_id} is no longer in the history"}
+        return
+
+    for parameter, (state_name, widget_key) in RESTORABLE_INPUTS.items():
+        if parameter in record.start_flow:
+            set_input(state_name, record.start_flow[parameter])
+            st.session_state[widget_key] = record.start_flow[parameter]
+
+    st.session_state.workflow_outputs = record.outputs
+    st.session_state.last_run_stability = record.stability
+    st.session_state.last_run_speed = record.speed
+    st.session_state.last_run_voice_preset = record.voice_preset
+    st.session_state.job_message = {"ok": True, "text": f"✓ Restored run {run_id} from history"}
+    st.session_state.history_restored = True
+
+
+def _run_label(run: RunSummary) -> str:
+    """One-line description of a run for the history list."""
+    when = datetime.fromtimestamp(run.created_at, tz=UTC).astimezone().strftime("%Y-%m-%d %H:%M")
+    mission = " @ ".join(part for part in (run.mission_type, run.location) if part) or "Unknown mission"
+    kind = "voice only" if run.voice_only else "full run"
+    status = "✓" if run.was_successful else "✗"
+    voice = ", ".join(str(setting) for setting in (run.voice_preset, run.stability, run.speed) if setting is not None)
+    duration = f", {run.duration_seconds:.0f}s" if run.duration_seconds is not None else ""
+    return f"{status} {when} · {mission} · {voice} · {kind}{duration}"
+
+
+@st.fragment
+def render_run_history() -> None:
+    """Search past runs and restore one without contacting the workflow server."""
+    # A restore changes inputs on every tab, so it needs a full page rerun
+    if st.session_state.pop("history_restored", False):
+        st.rerun()
+
+    col_query, col_voice, col_success = st.columns([3, 2, 1])
+    query = col_query.text_input("Search mission type, location or voice:", key="history_query")
+    voice_filter = col_voice.text_input("Voice:", key="history_voice_filter")
+    successful_only = col_success.checkbox("Successful only", value=True, key="history_successful_only")
+
+    runs = get_run_history().search(
+        query.strip(), voice_preset=voice_filter.strip() or None, successful_only=successful_only
+    )
+    if not runs:
+        st.info("No matching runs yet")
+        return
+
+    labels = {run.run_id: _run_label(run) for run in runs}
+    selected_id = st.selectbox(
+        "Runs (newest first):",
+        options=list(labels),
+        format_func=labels.__getitem__,
+        key="history_selected_run",
+    )
+    st.button(
+        "Restore this run",
+        type="primary",
+        disabled=st.session_state.workflow_running,
+        on_click=restore_run,
+        args=(selected_id,),
+        key="restore_run_button",
+    )
+
+
+def _approximate_size(value: Any) -> int:
+    """Rough size in bytes of a session state value, counting strings by their encoded length."""
+    if isinstance(value, str):
+        return len(value.encode())
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, Mapping):
+        return sum(_approximate_size(key) + _approximate_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(_approximate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+def session_state_footprint() -> list[tuple[str, int]]:
+    """Approximate size of each session state entry, largest first."""
+    sizes = [(str(key), _approximate_size(value)) for key, value in st.session_state.items()]
+    return sorted(sizes, key=lambda entry: entry[1], reverse=True)
+
+
+def render_session_memory() -> None:
+    """Show what this session keeps in memory, and which inputs differ from the defaults."""
+    footprint = session_state_footprint()
+    overrides = [name for name in DEFAULT_INPUTS if name in st.session_state]
+    with st.sidebar, st.expander("Session Memory"):
+        st.metric("Session state", f"{sum(size for _, size in footprint) / 1024:.1f} KB")
+        st.caption(f"{len(footprint)} entries; changed inputs: {', '.join(overrides) or 'none'}")
+        st.dataframe(
+            [{"key": key, "KB": round(size / 1024, 1)} for key, size in footprint[:10]],
+            hide_index=True,
+            use_container_width=True,
+        )
+
+
+def render_result_cache_stats() -> None:
+    """Show result cache counters in the sidebar."""
+    cache = get_result_cache()
+    stats = cache.stats()
+    with st.sidebar:
+        st.subheader("Result Cache")
+        col_hits, col_misses = st.columns(2)
+        col_hits.metric("Hits", stats["memory_hits"] + stats["disk_hits"])
+        col_misses.metric("Misses", stats["misses"])
+        st.caption(
+            f"{stats['memory_entries']} in memory, {stats['disk_entries']} on disk "
+            f"({stats['disk_bytes'] / (1024 * 1024):.1f} MB)"
+        )
+        if st.button("Clear result cache", use_container_width=True, key="clear_result_cache_button"):
+            cache.clear()
+            st.rerun()
+
+
+@st.fragment
+def render_game_data_editor() -> None:
+    """Render the game data editor as a fragment, so edits don't rebuild the rest of the page."""
+    st.subheader("Game Data")
+    input_text_area(
+        "game_data_json",
+        "Paste your JSON game data:",
+        height=400,
+        disabled=st.session_state.workflow_running,
+    )
+
+    # Format JSON button
+    if st.button(
+        "📋 Format JSON",
+        key="format_json_button",
+        use_container_width=True,
+        disabled=st.session_state.workflow_running,
+    ):
+        try:
+            json_str = get_input("game_data_json") or "{}"
+            parsed = json.loads(json_str)
+            set_input("game_data_json", json.dumps(parsed, indent=2))
+            st.rerun(scope="fragment")
+        except json.JSONDecodeError:
+            st.warning("⚠️ Cannot format invalid JSON - fix errors first")
+
+    # Validate JSON
+    error = validate_game_data(get_input("game_data_json") or "{}")
+    if error is None:
+        st.success("✓ Valid JSON")
+    else:
+        st.error(f"✗ Invalid JSON: {error}")
+
+    # The run button lives in another fragment, so refresh the page only when validity flips
+    json_valid = error is None
+    if st.session_state.game_data_valid != json_valid:
+        st.session_state.game_data_valid = json_valid
+        st.rerun()
+
+
+@st.fragment
+def render_voice_panel() -> None:
+    """Render voice settings and run buttons as a fragment, so slider moves only redraw this panel."""
+    # Voice generation settings
+    st.subheader("Voice Settings")
+
+    col_voice1, col_voice2, col_voice3 = st.columns(3)
+
+    with col_voice1:
+        stability_options = ["Creative", "Natural", "Robust"]
+        current_stability_index = (
+            stability_options.index(get_input("stability")) if get_input("stability") in stability_options else 1
+        )
+        set_input(
+            "stability",
+            st.selectbox(
+                "Stability:",
+                options=stability_options,
+                index=current_stability_index,
+                key="stability_select",
+                disabled=st.session_state.workflow_running,
+            ),
+        )
+
+    with col_voice2:
+        set_input(
+            "speed",
+            st.slider(
+                "Speed:",
+                min_value=0.7,
+                max_value=1.2,
+                value=get_input("speed"),
+                step=0.01,
+                key="speed_slider",
+                disabled=st.session_state.workflow_running,
+            ),
+        )
+
+    with col_voice3:
+        voice_options = [
+            "Alexandra",
+            "Antoni",
+            "Austin",
+            "Clyde",
+            "Dave",
+            "Domi",
+            "Drew",
+            "Fin",
+            "Hope",
+            "James",
+            "Jane",
+            "Paul",
+            "Rachel",
+            "Sarah",
+            "Thomas",
+        ]
+        current_voice_index = (
+            voice_options.index(get_input("voice_preset")) if get_input("voice_preset") in voice_options else 9
+        )
+        set_input(
+            "voice_preset",
+            st.selectbox(
+                "Voice:",
+                options=voice_options,
+                index=current_voice_index,
+                key="voice_preset_select",
+                disabled=st.session_state.workflow_running,
+            ),
+        )
+
+    st.markdown("---")  # Separator before buttons
+
+    # Determine button labels based on whether workflow has run
+    has_run = st.session_state.workflow_outputs is not None
+    main_button_label = (
+        "Re-run entire Griptape Nodes workflow" if has_run else "Run Griptape Nodes Workflow to Generate Audio"
+    )
+
+    # Re-run voice generation button (appears after first run)
+    voice_params_changed = voice_parameters_changed()
+    if has_run and st.button(
+        "Re-run voice generation",
+        type="primary",
+        use_container_width=True,
+        disabled=not voice_params_changed or st.session_state.workflow_running,
+        key="rerun_voice_button",
+    ):
+        start_voice_rerun()
+
+    # Main workflow button
+    if st.button(
+        main_button_label,
+        type="primary",
+        use_container_width=True,
+        disabled=not st.session_state.game_data_valid or st.session_state.workflow_running,
+        key="run_workflow_button",
+    ):
+        # Asking again for the same inputs means wanting a new take, not the cached one
+        start_workflow_job(run_voice_generation_only=False, mixdown={}, fresh_run=has_run)
+
+    # Outcome of the last background run
+    message = st.session_state.job_message
+    if message is not None:
+        if message["ok"]:
+            st.success(message["text"])
+        else:
+            st.error(message["text"])
+
+
+def start_voice_rerun() -> None:
+    """Voice the monologue on screen again with the current voice settings.
+
+    The monologue is sent with the run: after a cache hit or a restore from the
+    history it isn't the one the workflow server generated last.
+    """
+    outputs = st.session_state.workflow_outputs
+    start_workflow_job(
+        run_voice_generation_only=True,
+        mixdown=voice_only_mixdown(outputs),
+        voice_text=outputs.get("speechwriter_output"),
+    )
+
+
+def start_workflow_job(
+    *, run_voice_generation_only: bool, mixdown: dict, fresh_run: bool = False, voice_text: str | None = None
+) -> None:
+    """Submit a workflow run to the background executor and track it in the session.
+
+    A run still in progress for the session is cancelled; the new one supersedes it.
+    """
+    executor = get_job_executor()
+    if st.session_state.active_job is not None:
+        executor.cancel(st.session_state.active_job["id"])
+        executor.pop(st.session_state.active_job["id"])
+    coroutine = execute_workflow_async(
+        world_rules=get_input("world_rules") or "",
+        character_definition=get_input("character_definition") or "",
+        data_expert_1=get_input("data_expert_1") or "",
+        data_expert_2=get_input("data_expert_2") or "",
+        data_expert_3=get_input("data_expert_3") or "",
+        summarizer=get_input("summarizer") or "",
+        speechwriter_rules=get_input("speechwriter_rules") or "",
+        music_coach_rules=get_input("music_coach_rules") or "",
+        game_data=get_input("game_data_json") or "{}",
+        stability=get_input("stability"),
+        speed=get_input("speed"),
+        voice_preset=get_input("voice_preset"),
+        run_voice_generation_only=run_voice_generation_only,
+        audio_formats=preferred_audio_formats(),
+        mixdown=mixdown,
+        fresh_run=fresh_run,
+        voice_text=voice_text,
+        # Lets the workflow server keep this session's inputs, so runs send only what changed
+        input_session=st.session_state.setdefault("input_session_id", uuid.uuid4().hex),
+    )
+    kind = "voice" if run_voice_generation_only else "full"
+    job_id = executor.submit(coroutine, kind=kind)
+
+    # Remember the voice settings this run used, not whatever they are when it finishes
+    st.session_state.active_job = {
+        "id": job_id,
+        "voice_only": run_voice_generation_only,
+        "stability": get_input("stability"),
+        "speed": get_input("speed"),
+        "voice_preset": get_input("voice_preset"),
+    }
+    st.session_state.workflow_running = True
+    st.session_state.job_message = None
+    st.rerun()
+
+
+def _apply_job_result(active_job: dict, result: dict) -> None:
+    """Store a finished run's outputs and the voice settings it used."""
+    if active_job["voice_only"]:
+        # Update only voice audio artifact in outputs
+        if st.session_state.workflow_outputs is not None:
+            st.session_state.workflow_outputs["voice_audio_artifact"] = result.get("voice_audio_artifact")
+            st.session_state.workflow_outputs["mixed_audio_artifact"] = result.get("mixed_audio_artifact")
+        st.session_state.job_message = {"ok": True, "text": "✓ Voice audio regenerated successfully!"}
+    else:
+        st.session_state.workflow_outputs = result
+
+    # Update voice parameters tracking
+    st.session_state.last_run_stability = active_job["stability"]
+    st.session_state.last_run_speed = active_job["speed"]
+    st.session_state.last_run_voice_preset = active_job["voice_preset"]
+
+
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def render_job_status() -> None:
+    """Poll the session's background run, and apply its result once it finishes.
+
+    Only rendered while a run is active, so idle sessions don't poll.
+    """
+    active_job = st.session_state.active_job
+    if active_job is None:
+        return
+
+    executor = get_job_executor()
+    job = executor.get(active_job["id"])
+    if job is not None and not job.done:
+        label = "Regenerating voice audio..." if active_job["voice_only"] else "Running workflow..."
+        st.info(f"⏳ {label} ({job.elapsed_seconds:.0f}s)")
+        # Cancelling aborts the call to the workflow server, which stops the run there too
+        if st.button("Cancel run", key="cancel_run"):
+            executor.cancel(active_job["id"])
+            st.rerun(scope="fragment")
+        return
+
+    executor.pop(active_job["id"])
+    failure = "Voice regeneration failed" if active_job["voice_only"] else "Workflow failed"
+    if job is None:
+        # The executor was replaced, e.g. after clearing Streamlit's cache
+        st.session_state.job_message = {"ok": False, "text": f"✗ {failure}: the run was lost, please try again"}
+    elif job.future.cancelled():
+        st.session_state.job_message = {"ok": False, "text": "✗ Run cancelled"}
+    else:
+        try:
+            _apply_job_result(active_job, job.future.result())
+        except Exception as e:
+            st.session_state.job_message = {"ok": False, "text": f"✗ {failure}: {e}"}
+
+    st.session_state.active_job = None
+    st.session_state.workflow_running = False
+    st.rerun()
+
+
+@st.fragment
+def render_outputs() -> None:  # noqa: PLR0912
+    """Render the workflow outputs as a fragment, independent of the input panels."""
+    if st.session_state.workflow_outputs is None:
+        return
+    outputs = st.session_state.workflow_outputs
+
+    if not outputs.get("was_successful", False):
+        st.error(f"✗ Workflow failed: {outputs.get('result_details', 'Unknown error')}")
+    else:
+        st.success("✓ Audio generation complete!")
+
+        # Show result details if present
+        if outputs.get("result_details"):
+            st.info(outputs["result_details"])
+
+        # Audio players
+        st.subheader("Audio Output")
+
+        mixed_url = get_audio_artifact_value(outputs.get("mixed_audio_artifact"))
+        if mixed_url:
+            st.markdown("**Voice Over Music:**")
+            st.audio(mixed_url)
+
+        col_audio1, col_audio2 = st.columns(2)
+
+        with col_audio1:
+            st.markdown("**Voice Audio:**")
+            voice_artifact = outputs.get("voice_audio_artifact")
+            if voice_artifact:
+                audio_url = get_audio_artifact_value(voice_artifact)
+                if audio_url:
+                    st.audio(audio_url)
+                else:
+                    st.info("Voice audio artifact exists but has no URL")
+            else:
+                st.info("No voice audio available")
+
+        with col_audio2:
+            st.markdown("**Music Audio:**")
+            music_artifact = outputs.get("music_audio_artifact")
+            if music_artifact:
+                audio_url = get_audio_artifact_value(music_artifact)
+                if audio_url:
+                    st.audio(audio_url)
+                else:
+                    st.info("Music audio artifact exists but has no URL")
+            else:
+                st.info("No music audio available")
+
+        # Text output
+        st.subheader("Debriefing Monologue")
+        # One stable widget key; its state is refreshed from the outputs on every render
+        st.session_state.speechwriter_output_display = outputs.get("speechwriter_output", "")
+        st.text_area(
+            "Generated monologue for TTS:",
+            height=300,
+            disabled=True,
+            key="speechwriter_output_display",
+        )
+
+        # Retrospective
+        st.subheader("Retrospective")
+        retrospective_content = outputs.get("retrospective", "")
+        if retrospective_content:
+            st.markdown(retrospective_content)
+        else:
+            st.info("No retrospective available")
+
+
+def main() -> None:
     """Main Streamlit application."""
     _initialize_session_state()
 
     # Ensure workflow servers are started
     get_server_manager()
 
+    render_result_cache_stats()
+    render_session_memory()
+
     st.title("🎵 Griptape Nodes Audio Generation")
     st.markdown("Generate audio content with AI-powered workflows")
 
     # Create tabs
-    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(
+    tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs(
         [
             "World",
             "Character",
@@ -459,27 +1213,20 @@ def main() -> None:  # noqa: PLR0915, PLR0912, C901
             "Speechwriter",
             "Music Coach",
             "Generation",
+            "History",
         ]
     )
 
     # World tab
     with tab1:
         st.header("World Rules")
-        st.session_state.world_rules = st.text_area(
-            "Define the rules and context of your world:",
-            value=st.session_state.world_rules,
-            height=400,
-            key="world_rules_input",
-        )
+        input_text_area("world_rules", "Define the rules and context of your world:", height=400)
 
     # Character tab
     with tab2:
         st.header("Character Definition")
-        st.session_state.character_definition = st.text_area(
-            "Define your character's traits, background, and personality:",
-            value=st.session_state.character_definition,
-            height=400,
-            key="character_definition_input",
+        input_text_area(
+            "character_definition", "Define your character's traits, background, and personality:", height=400
         )
 
     # Data Experts tab
@@ -487,56 +1234,26 @@ def main() -> None:  # noqa: PLR0915, PLR0912, C901
         st.header("Data Experts")
 
         st.subheader("Data Expert 1")
-        st.session_state.data_expert_1 = st.text_area(
-            "Define the first data expert's role and expertise:",
-            value=st.session_state.data_expert_1,
-            height=150,
-            key="data_expert_1_input",
-        )
+        input_text_area("data_expert_1", "Define the first data expert's role and expertise:", height=150)
 
         st.subheader("Data Expert 2")
-        st.session_state.data_expert_2 = st.text_area(
-            "Define the second data expert's role and expertise:",
-            value=st.session_state.data_expert_2,
-            height=150,
-            key="data_expert_2_input",
-        )
+        input_text_area("data_expert_2", "Define the second data expert's role and expertise:", height=150)
 
         st.subheader("Data Expert 3")
-        st.session_state.data_expert_3 = st.text_area(
-            "Define the third data expert's role and expertise:",
-            value=st.session_state.data_expert_3,
-            height=150,
-            key="data_expert_3_input",
-        )
+        input_text_area("data_expert_3", "Define the third data expert's role and expertise:", height=150)
 
         st.subheader("Summarizer")
-        st.session_state.summarizer = st.text_area(
-            "Define the summarizer's role and approach:",
-            value=st.session_state.summarizer,
-            height=150,
-            key="summarizer_input",
-        )
+        input_text_area("summarizer", "Define the summarizer's role and approach:", height=150)
 
     # Speechwriter tab
     with tab4:
         st.header("Speechwriter Rules")
-        st.session_state.speechwriter_rules = st.text_area(
-            "Define how the speechwriter should craft speeches:",
-            value=st.session_state.speechwriter_rules,
-            height=400,
-            key="speechwriter_rules_input",
-        )
+        input_text_area("speechwriter_rules", "Define how the speechwriter should craft speeches:", height=400)
 
     # Music Coach tab
     with tab5:
         st.header("Music Coach Rules")
-        st.session_state.music_coach_rules = st.text_area(
-            "Define the music coaching guidelines:",
-            value=st.session_state.music_coach_rules,
-            height=400,
-            key="music_coach_rules_input",
-        )
+        input_text_area("music_coach_rules", "Define the music coaching guidelines:", height=400)
 
     # Generation tab
     with tab6:
@@ -559,255 +1276,18 @@ def main() -> None:  # noqa: PLR0915, PLR0912, C901
         col_left, col_right = st.columns([1, 2])
 
         with col_left:
-            st.subheader("Game Data")
-            st.session_state.game_data_json = st.text_area(
-                "Paste your JSON game data:",
-                value=st.session_state.game_data_json,
-                height=400,
-                key="game_data_json_input",
-                disabled=st.session_state.workflow_running,
-            )
-
-            # Format JSON button
-            if st.button(
-                "📋 Format JSON",
-                key="format_json_button",
-                use_container_width=True,
-                disabled=st.session_state.workflow_running,
-            ):
-                try:
-                    json_str = st.session_state.game_data_json or "{}"
-                    parsed = json.loads(json_str)
-                    st.session_state.game_data_json = json.dumps(parsed, indent=2)
-                    st.rerun()
-                except json.JSONDecodeError:
-                    st.warning("⚠️ Cannot format invalid JSON - fix errors first")
-
-            # Validate JSON
-            json_valid = False
-            try:
-                json_str = st.session_state.game_data_json or "{}"
-                json.loads(json_str)  # Just validate, don't parse
-                json_valid = True
-                st.success("✓ Valid JSON")
-            except json.JSONDecodeError as e:
-                st.error(f"✗ Invalid JSON: {e.msg}")
+            render_game_data_editor()
 
         with col_right:
-            # Voice generation settings
-            st.subheader("Voice Settings")
-
-            col_voice1, col_voice2, col_voice3 = st.columns(3)
-
-            with col_voice1:
-                stability_options = ["Creative", "Natural", "Robust"]
-                current_stability_index = (
-                    stability_options.index(st.session_state.stability)
-                    if st.session_state.stability in stability_options
-                    else 1
-                )
-                st.session_state.stability = st.selectbox(
-                    "Stability:",
-                    options=stability_options,
-                    index=current_stability_index,
-                    key="stability_select",
-                    disabled=st.session_state.workflow_running,
-                )
-
-            with col_voice2:
-                st.session_state.speed = st.slider(
-                    "Speed:",
-                    min_value=0.7,
-                    max_value=1.2,
-                    value=st.session_state.speed,
-                    step=0.01,
-                    key="speed_slider",
-                    disabled=st.session_state.workflow_running,
-                )
-
-            with col_voice3:
-                voice_options = [
-                    "Alexandra",
-                    "Antoni",
-                    "Austin",
-                    "Clyde",
-                    "Dave",
-                    "Domi",
-                    "Drew",
-                    "Fin",
-                    "Hope",
-                    "James",
-                    "Jane",
-                    "Paul",
-                    "Rachel",
-                    "Sarah",
-                    "Thomas",
-                ]
-                current_voice_index = (
-                    voice_options.index(st.session_state.voice_preset)
-                    if st.session_state.voice_preset in voice_options
-                    else 9
-                )
-                st.session_state.voice_preset = st.selectbox(
-                    "Voice:",
-                    options=voice_options,
-                    index=current_voice_index,
-                    key="voice_preset_select",
-                    disabled=st.session_state.workflow_running,
-                )
-
-            st.markdown("---")  # Separator before buttons
-
-            # Determine button labels based on whether workflow has run
-            has_run = st.session_state.workflow_outputs is not None
-            main_button_label = (
-                "Re-run entire Griptape Nodes workflow" if has_run else "Run Griptape Nodes Workflow to Generate Audio"
-            )
-
-            # Re-run voice generation button (appears after first run)
-            voice_params_changed = voice_parameters_changed()
-            if has_run:
-                if st.button(
-                    "Re-run voice generation",
-                    type="primary",
-                    use_container_width=True,
-                    disabled=not voice_params_changed or st.session_state.workflow_running,
-                    key="rerun_voice_button",
-                ):
-                    st.session_state.workflow_running = True
-                    try:
-                        with st.spinner("Regenerating voice audio..."):
-                            result = asyncio.run(
-                                execute_workflow_async(
-                                    world_rules=st.session_state.world_rules or "",
-                                    character_definition=st.session_state.character_definition or "",
-                                    data_expert_1=st.session_state.data_expert_1 or "",
-                                    data_expert_2=st.session_state.data_expert_2 or "",
-                                    data_expert_3=st.session_state.data_expert_3 or "",
-                                    summarizer=st.session_state.summarizer or "",
-                                    speechwriter_rules=st.session_state.speechwriter_rules or "",
-                                    music_coach_rules=st.session_state.music_coach_rules or "",
-                                    game_data=st.session_state.game_data_json or "{}",
-                                    stability=st.session_state.stability,
-                                    speed=st.session_state.speed,
-                                    voice_preset=st.session_state.voice_preset,
-                                    run_voice_generation_only=True,
-                                )
-                            )
-                            # Update voice parameters tracking
-                            st.session_state.last_run_stability = st.session_state.stability
-                            st.session_state.last_run_speed = st.session_state.speed
-                            st.session_state.last_run_voice_preset = st.session_state.voice_preset
-                            # Update only voice audio artifact in outputs
-                            if st.session_state.workflow_outputs is not None:
-                                st.session_state.workflow_outputs["voice_audio_artifact"] = result.get(
-                                    "voice_audio_artifact"
-                                )
-                            st.success("✓ Voice audio regenerated successfully!")
-                    except Exception as e:
-                        st.error(f"✗ Voice regeneration failed: {e}")
-                    finally:
-                        st.session_state.workflow_running = False
-                        st.rerun()
-
-            # Main workflow button
-            if st.button(
-                main_button_label,
-                type="primary",
-                use_container_width=True,
-                disabled=not json_valid or st.session_state.workflow_running,
-                key="run_workflow_button",
-            ):
-                st.session_state.workflow_running = True
-                try:
-                    with st.spinner("Running workflow..."):
-                        result = asyncio.run(
-                            execute_workflow_async(
-                                world_rules=st.session_state.world_rules or "",
-                                character_definition=st.session_state.character_definition or "",
-                                data_expert_1=st.session_state.data_expert_1 or "",
-                                data_expert_2=st.session_state.data_expert_2 or "",
-                                data_expert_3=st.session_state.data_expert_3 or "",
-                                summarizer=st.session_state.summarizer or "",
-                                speechwriter_rules=st.session_state.speechwriter_rules or "",
-                                music_coach_rules=st.session_state.music_coach_rules or "",
-                                game_data=st.session_state.game_data_json or "{}",
-                                stability=st.session_state.stability,
-                                speed=st.session_state.speed,
-                                voice_preset=st.session_state.voice_preset,
-                                run_voice_generation_only=False,
-                            )
-                        )
-                        st.session_state.workflow_outputs = result
-                        # Update voice parameters tracking
-                        st.session_state.last_run_stability = st.session_state.stability
-                        st.session_state.last_run_speed = st.session_state.speed
-                        st.session_state.last_run_voice_preset = st.session_state.voice_preset
-                except Exception as e:
-                    st.error(f"✗ Workflow failed: {e}")
-                finally:
-                    st.session_state.workflow_running = False
-                    st.rerun()
-
-            # Display outputs if available
-            if st.session_state.workflow_outputs is not None:
-                outputs = st.session_state.workflow_outputs
-
-                if not outputs.get("was_successful", False):
-                    st.error(f"✗ Workflow failed: {outputs.get('result_details', 'Unknown error')}")
-                else:
-                    st.success("✓ Audio generation complete!")
-
-                    # Show result details if present
-                    if outputs.get("result_details"):
-                        st.info(outputs["result_details"])
-
-                    # Audio players
-                    st.subheader("Audio Output")
-
-                    col_audio1, col_audio2 = st.columns(2)
-
-                    with col_audio1:
-                        st.markdown("**Voice Audio:**")
-                        voice_artifact = outputs.get("voice_audio_artifact")
-                        if voice_artifact:
-                            audio_url = get_audio_artifact_value(voice_artifact)
-                            if audio_url:
-                                st.audio(audio_url)
-                            else:
-                                st.info("Voice audio artifact exists but has no URL")
-                        else:
-                            st.info("No voice audio available")
-
-                    with col_audio2:
-                        st.markdown("**Music Audio:**")
-                        music_artifact = outputs.get("music_audio_artifact")
-                        if music_artifact:
-                            audio_url = get_audio_artifact_value(music_artifact)
-                            if audio_url:
-                                st.audio(audio_url)
-                            else:
-                                st.info("Music audio artifact exists but has no URL")
-                        else:
-                            st.info("No music audio available")
-
-                    # Text output
-                    st.subheader("Debriefing Monologue")
-                    st.text_area(
-                        "Generated monologue for TTS:",
-                        value=outputs.get("speechwriter_output", ""),
-                        height=300,
-                        disabled=True,
-                        key=f"speechwriter_output_display_{id(outputs)}",
-                    )
-
-                    # Retrospective
-                    st.subheader("Retrospective")
-                    retrospective_content = outputs.get("retrospective", "")
-                    if retrospective_content:
-                        st.markdown(retrospective_content)
-                    else:
-                        st.info("No retrospective available")
+            render_voice_panel()
+            if st.session_state.active_job is not None:
+                render_job_status()
+            render_outputs()
+
+    # History tab
+    with tab7:
+        st.header("Run History")
+        render_run_history()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,243 @@
+"""Audio post-processing helpers built on ffmpeg."""
+
+import functools
+import hashlib
+import json
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+FFMPEG_TIMEOUT_SECONDS = 120
+
+# Formats that mean "keep what the provider returned"
+ORIGINAL_FORMATS = {"original", "mp3"}
+
+
+@dataclass(frozen=True)
+class AudioEncoding:
+    """An ffmpeg target for compact audio delivery."""
+
+    name: str
+    codec: str
+    container: str
+    extension: str
+    mime_type: str
+    default_bitrate_kbps: int
+    extra_args: tuple[str, ...] = ()
+
+
+AUDIO_ENCODINGS = {
+    "opus": AudioEncoding(
+        name="opus",
+        codec="libopus",
+        container="ogg",
+        extension="ogg",
+        mime_type="audio/ogg",
+        default_bitrate_kbps=64,
+        extra_args=("-vbr", "on", "-application", "audio"),
+    ),
+    "aac": AudioEncoding(
+        name="aac",
+        codec="aac",
+        container="mp4",
+        extension="m4a",
+        mime_type="audio/mp4",
+        default_bitrate_kbps=96,
+        extra_args=("-movflags", "+faststart"),
+    ),
+}
+
+
+@dataclass(frozen=True)
+class MixSettings:
+    """How the music sits under the voice in a mixdown."""
+
+    music_gain_db: float = -8.0
+    duck_threshold: float = 0.03
+    duck_ratio: float = 8.0
+    attack_ms: float = 20.0
+    release_ms: float = 400.0
+    bitrate_kbps: int = 128
+
+
+@functools.cache
+def find_ffmpeg() -> str | None:
+    """Locate an ffmpeg binary, preferring the system one over static-ffmpeg's download."""
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is not None:
+        return ffmpeg
+
+    try:
+        import static_ffmpeg  # noqa: PLC0415
+
+        static_ffmpeg.add_paths(weak=True)
+    except Exception:
+        logger.warning("ffmpeg is not installed and static-ffmpeg could not provide it")
+        return None
+    return shutil.which("ffmpeg")
+
+
+def concat_audio(segments: list[bytes], audio_format: str = "mp3") -> bytes:
+    """Join encoded audio segments into one stream of the same format.
+
+    Segments are remuxed with ffmpeg's concat demuxer so the result has a single
+    clean header. Without ffmpeg, MP3 segments are joined frame-wise, which
+    players handle because MP3 streams are self-synchronizing.
+
+    Raises:
+        RuntimeError: If ffmpeg fails or times out, or the format can't be joined without it.
+    """
+    if len(segments) == 1:
+        return segments[0]
+
+    ffmpeg = find_ffmpeg()
+    if ffmpeg is None:
+        if audio_format != "mp3":
+            msg = f"Joining {audio_format} audio requires ffmpeg"
+            raise RuntimeError(msg)
+        return b"".join(segments)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        list_lines = []
+        for index, segment in enumerate(segments):
+            segment_path = tmp_dir / f"segment_{index:04d}.{audio_format}"
+            segment_path.write_bytes(segment)
+            list_lines.append(f"file '{segment_path.name}'")
+        list_path = tmp_dir / "segments.txt"
+        list_path.write_text("\n".join(list_lines))
+        output_path = tmp_dir / f"joined.{audio_format}"
+
+        command = [ffmpeg, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", str(list_path)]
+        command += ["-c", "copy", str(output_path)]
+        result = _run_ffmpeg(command, "join audio segments")
+        if result.returncode != 0:
+            msg = f"ffmpeg failed to join audio segments: {result.stderr.decode(errors='replace').strip()}"
+            raise RuntimeError(msg)
+        return output_path.read_bytes()
+
+
+def negotiate_encoding(preferences: list[str]) -> AudioEncoding | None:
+    """Pick the first preferred encoding this server can produce.
+
+    Returns:
+        The encoding to transcode to, or None to keep the original audio.
+    """
+    for preference in preferences:
+        name = preference.lower()
+        if name in ORIGINAL_FORMATS:
+            return None
+        if name in AUDIO_ENCODINGS and find_ffmpeg() is not None:
+            return AUDIO_ENCODINGS[name]
+    return None
+
+
+def transcoded_path(source: Path, encoding: AudioEncoding, bitrate_kbps: int) -> Path:
+    """Where the transcoded variant of `source` lives, next to the original."""
+    return source.with_name(f"{source.stem}.{bitrate_kbps}k.{encoding.extension}")
+
+
+def transcode_file(source: Path, encoding: AudioEncoding, bitrate_kbps: int | None = None) -> Path:
+    """Transcode an audio file, reusing a variant already cached next to it.
+
+    Raises:
+        RuntimeError: If ffmpeg is unavailable, fails or times out.
+    """
+    bitrate_kbps = bitrate_kbps or encoding.default_bitrate_kbps
+    target = transcoded_path(source, encoding, bitrate_kbps)
+    if target.exists() and target.stat().st_mtime >= source.stat().st_mtime:
+        return target
+
+    args = ["-i", str(source), "-vn", "-c:a", encoding.codec, "-b:a", f"{bitrate_kbps}k", *encoding.extra_args]
+    _render(target, [*args, "-f", encoding.container], f"transcode {source.name} to {encoding.name}")
+    return target
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def mix_cache_key(voice_digest: str, music_digest: str, settings: MixSettings) -> str:
+    """Key a mixdown by both inputs and every setting that shapes it."""
+    material = {"voice": voice_digest, "music": music_digest, "settings": asdict(settings)}
+    return hashlib.sha256(json.dumps(material, sort_keys=True).encode()).hexdigest()
+
+
+def render_mix(voice: str, music: str, output_dir: str, settings: MixSettings) -> str:
+    """Mix voice over music, ducking the music under speech, and return the rendered file path.
+
+    The music loops if it is shorter than the voice and is cut where the voice
+    ends. Renders are cached in output_dir by input hashes and settings. Takes
+    and returns plain strings so it can run in a worker process.
+
+    Raises:
+        RuntimeError: If ffmpeg is unavailable, fails or times out.
+    """
+    key = mix_cache_key(file_digest(Path(voice)), file_digest(Path(music)), settings)
+    target = Path(output_dir) / f"mix_{key[:16]}.mp3"
+    if target.exists():
+        return str(target)
+
+    mix_filter = ";".join(
+        [
+            f"[1:a]volume={settings.music_gain_db}dB[music]",
+            "[0:a]asplit=2[voice][sidechain]",
+            (
+                f"[music][sidechain]sidechaincompress=threshold={settings.duck_threshold}:ratio={settings.duck_ratio}"
+                f":attack={settings.attack_ms}:release={settings.release_ms}[ducked]"
+            ),
+            "[voice][ducked]amix=inputs=2:duration=first:dropout_transition=0:normalize=0[out]",
+        ]
+    )
+    args = ["-i", voice, "-stream_loop", "-1", "-i", music, "-filter_complex", mix_filter, "-map", "[out]"]
+    args += ["-c:a", "libmp3lame", "-b:a", f"{settings.bitrate_kbps}k", "-f", "mp3"]
+    _render(target, args, "mix voice over music")
+    return str(target)
+
+
+def _render(target: Path, args: list[str], description: str) -> None:
+    ffmpeg = find_ffmpeg()
+    if ffmpeg is None:
+        msg = f"Unable to {description}: ffmpeg is required"
+        raise RuntimeError(msg)
+
+    # Write to a unique name first so concurrent requests never see a partial file
+    fd, partial_name = tempfile.mkstemp(prefix=f".{target.name}.", dir=target.parent)
+    os.close(fd)
+    partial = Path(partial_name)
+    command = [ffmpeg, "-y", "-loglevel", "error", *args, str(partial)]
+    try:
+        result = _run_ffmpeg(command, description)
+        if result.returncode != 0:
+            msg = f"Unable to {description}: {result.stderr.decode(errors='replace').strip()}"
+            raise RuntimeError(msg)
+        partial.replace(target)
+    finally:
+        partial.unlink(missing_ok=True)
+
+
+def _run_ffmpeg(command: list[str], description: str) -> subprocess.CompletedProcess[bytes]:
+    """Run an ffmpeg command, reporting a hung or unstartable ffmpeg like any other failure.
+
+    Raises:
+        RuntimeError: If ffmpeg can't be started or runs past FFMPEG_TIMEOUT_SECONDS.
+    """
+    try:
+        return subprocess.run(command, capture_output=True, check=False, timeout=FFMPEG_TIMEOUT_SECONDS)  # noqa: S603
+    except subprocess.TimeoutExpired as e:
+        msg = f"Unable to {description}: ffmpeg took longer than {FFMPEG_TIMEOUT_SECONDS}s"
+        raise RuntimeError(msg) from e
+    except OSError as e:
+        msg = f"Unable to {description}: {e}"
+        raise RuntimeError(msg) from e
@@ -0,0 +1,174 @@
+"""Queue-depth autoscaling of workflow server workers.
+
+The server manager samples the /health report of every worker serving a
+module and asks the autoscaler for a decision. Load is judged by the runs
+waiting per worker, the share of run slots in use, and the p95 run time. The
+count moves one worker at a time, only after a condition has held for several
+consecutive checks (hysteresis), and not within a cooldown of the previous
+change. Every decision is logged and kept for review.
+"""
+
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Scaling decisions kept for review
+DECISION_HISTORY = 100
+
+
+@dataclass
+class ScalingPolicy:
+    """When to add or remove workers for one workflow module."""
+
+    min_workers: int = 1
+    max_workers: int = 1
+    # Add a worker when more runs than this wait per worker
+    scale_up_queue_per_worker: float = 1.0
+    # Also add one when every slot is busy and the p95 run time is above this; None ignores latency
+    target_p95_seconds: float | None = None
+    # Remove a worker when the remaining ones would be at most this busy
+    scale_down_utilization: float = 0.5
+    # Consecutive checks a condition must hold before acting on it
+    scale_up_checks: int = 2
+    scale_down_checks: int = 8
+    # Minimum time after any change before the next one in each direction
+    scale_up_cooldown_seconds: float = 60.0
+    scale_down_cooldown_seconds: float = 300.0
+
+
+@dataclass
+class LoadSample:
+    """Load across all workers of a module at one check."""
+
+    workers: int
+    in_flight: int
+    queue_depth: int
+    slots_per_worker: int
+    p95_run_seconds: float | None
+
+    @classmethod
+    def from_health(cls, reports: list[dict[str, Any]], workers: int | None = None) -> "LoadSample":
+        """Combine the /health reports of a module's workers.
+
+        workers is the number of running workers, which is more than the reports
+        when a worker didn't answer; it defaults to one per report.
+        """
+        admissions = [report.get("admission", {}) for report in reports]
+        p95s = [
+            admission["p95_run_seconds"] for admission in admissions if admission.get("p95_run_seconds") is not None
+        ]
+        return cls(
+            workers=len(reports) if workers is None else workers,
+            in_flight=sum(admission.get("in_flight", 0) for admission in admissions),
+            queue_depth=sum(admission.get("queue_depth", 0) for admission in admissions),
+            slots_per_worker=max([admission.get("max_in_flight", 1) for admission in admissions] or [1]),
+            p95_run_seconds=max(p95s) if p95s else None,
+        )
+
+
+@dataclass
+class ScalingDecision:
+    """A change to the number of workers serving a module."""
+
+    module: str
+    current: int
+    target: int
+    reason: str
+    decided_at: float
+
+
+@dataclass
+class _ModuleState:
+    module: str
+    up_streak: int = 0
+    down_streak: int = 0
+    last_change: float | None = None
+
+
+class Autoscaler:
+    """Decides worker counts from load samples, with hysteresis and cooldowns."""
+
+    def __init__(self) -> None:
+        self._states: dict[str, _ModuleState] = {}
+        self.decisions: deque[ScalingDecision] = deque(maxlen=DECISION_HISTORY)
+
+    def decide(
+        self, module: str, policy: ScalingPolicy, sample: LoadSample, now: float | None = None
+    ) -> ScalingDecision | None:
+        """Decide whether a module needs a worker more or less.
+
+        Returns:
+            The decision, or None to keep the current count.
+        """
+        now = time.monotonic() if now is None else now
+        state = self._states.setdefault(module, _ModuleState(module))
+        workers = sample.workers
+
+        if workers < policy.min_workers:
+            return self._record(state, workers + 1, "below the minimum worker count", sample, now)
+        if workers > policy.max_workers:
+            return self._record(state, workers - 1, "above the maximum worker count", sample, now)
+
+        pressure = self._pressure(policy, sample)
+        if pressure is not None:
+            state.up_streak += 1
+            state.down_streak = 0
+        elif self._underused(policy, sample):
+            state.down_streak += 1
+            state.up_streak = 0
+        else:
+            state.up_streak = state.down_streak = 0
+
+        since_change = now - state.last_change if state.last_change is not None else float("inf")
+        if (
+            pressure is not None
+            and workers < policy.max_workers
+            and state.up_streak >= policy.scale_up_checks
+            and since_change >= policy.scale_up_cooldown_seconds
+        ):
+            return self._record(state, workers + 1, pressure, sample, now)
+        if (
+            workers > policy.min_workers
+            and state.down_streak >= policy.scale_down_checks
+            and since_change >= policy.scale_down_cooldown_seconds
+        ):
+            reason = f"{sample.in_flight} runs in flight and none queued for {state.down_streak} checks"
+            return self._record(state, workers - 1, reason, sample, now)
+        return None
+
+    def _pressure(self, policy: ScalingPolicy, sample: LoadSample) -> str | None:
+        """Why the module needs another worker, or None if it doesn't."""
+        queued_per_worker = sample.queue_depth / max(sample.workers, 1)
+        if queued_per_worker > policy.scale_up_queue_per_worker:
+            return f"{sample.queue_depth} runs queued across {sample.workers} workers"
+        saturated = sample.in_flight >= sample.workers * sample.slots_per_worker
+        if (
+            policy.target_p95_seconds is not None
+            and sample.p95_run_seconds is not None
+            and saturated
+            and sample.p95_run_seconds > policy.target_p95_seconds
+        ):
+            return (
+                f"all slots busy with p95 run time {sample.p95_run_seconds:.1f}s over {policy.target_p95_seconds:.1f}s"
+            )
+        return None
+
+    def _underused(self, policy: ScalingPolicy, sample: LoadSample) -> bool:
+        """Whether one worker fewer could carry the current load."""
+        remaining_slots = (sample.workers - 1) * sample.slots_per_worker
+        return sample.queue_depth == 0 and sample.in_flight <= remaining_slots * policy.scale_down_utilization
+
+    def _record(self, state: _ModuleState, target: int, reason: str, sample: LoadSample, now: float) -> ScalingDecision:
+        state.up_streak = state.down_streak = 0
+        state.last_change = now
+        decision = ScalingDecision(
+            module=state.module, current=sample.workers, target=target, reason=reason, decided_at=time.time()
+        )
+        self.decisions.append(decision)
+        msg = f"Scaling {state.module} from {sample.workers} to {target} workers: {reason}"
+        logger.info(msg)
+        return decision
@@ -0,0 +1,206 @@
+"""Chunked, concurrent synthesis for the workflow's TTS node.
+
+Instead of sending the whole monologue to Eleven Labs in one request, the text
+is split at paragraph and sentence boundaries, the chunks are synthesized
+concurrently under a limit with identical voice settings, and the audio is
+joined into a single voice track. Chunk audio is cached by text and voice
+settings, so a voice rerun after a small edit only resynthesizes the chunks
+that changed.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from griptape_nodes.exe_types.node_types import BaseNode
+
+from audio_processing import concat_audio
+from node_hooks import NodeProcess, find_node, wrap_node_process
+from speech_streaming import (
+    AUDIO_FORMAT,
+    TTS_AUDIO_PARAMETER,
+    TTS_NODE,
+    TTS_TEXT_PARAMETER,
+    SentenceSplitter,
+    save_voice_audio,
+    synthesize_with_node,
+    voice_settings,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CHUNK_CHARS = 800
+DEFAULT_MAX_CONCURRENCY = 2
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+# Settings that change the audio for a given text; anything else doesn't affect the cache key
+CACHE_KEY_PARAMETERS = ("model", "voice_preset", "stability", "speed", "seed")
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+ChunkSynthesizer = Callable[[str], Awaitable[bytes]]
+
+# Counts from the latest chunked run, exposed through the server's health endpoint
+last_run_stats: dict[str, Any] = {}
+
+
+def split_into_chunks(text: str, max_chars: int = DEFAULT_MAX_CHUNK_CHARS) -> list[str]:
+    """Split text into chunks of whole sentences, never spanning a paragraph break.
+
+    Keeping paragraphs separate means an edit only moves chunk boundaries inside
+    the paragraph it touches, so the other paragraphs still hit the cache.
+    """
+    chunks = []
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        splitter = SentenceSplitter(min_chars=1)
+        sentences = splitter.feed(paragraph) + splitter.flush()
+        current = ""
+        for sentence in sentences:
+            if current and len(current) + 1 + len(sentence) > max_chars:
+                chunks.append(current)
+                current = sentence
+            else:
+                current = f"{current} {sentence}" if current else sentence
+        if current:
+            chunks.append(current)
+    return chunks
+
+
+def chunk_cache_key(text: str, settings: dict[str, Any]) -> str:
+    """Key chunk audio by its text and the settings that shape the voice."""
+    material = {name: settings.get(name) for name in CACHE_KEY_PARAMETERS}
+    material[TTS_TEXT_PARAMETER] = text
+    encoded = json.dumps(material, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class ChunkAudioCache:
+    """In-memory LRU cache of synthesized chunk audio, bounded by total size."""
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> bytes | None:
+        """Return cached audio for a key, marking it as recently used."""
+        audio = self._entries.get(key)
+        if audio is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return audio
+
+    def put(self, key: str, audio: bytes) -> None:
+        """Store audio, evicting the least recently used chunks to stay under the size limit."""
+        if len(audio) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size -= len(previous)
+        self._entries[key] = audio
+        self._size += len(audio)
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+    def stats(self) -> dict[str, int]:
+        """Cache counters for the health endpoint."""
+        return {"entries": len(self._entries), "bytes": self._size, "hits": self.hits, "misses": self.misses}
+
+
+async def synthesize_chunks(
+    chunks: list[str],
+    settings: dict[str, Any],
+    synthesize: ChunkSynthesizer,
+    cache: ChunkAudioCache,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> tuple[list[bytes], int]:
+    """Synthesize chunks concurrently, reusing cached audio.
+
+    Returns:
+        The audio for each chunk in order, and how many chunks came from the cache.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    cached = 0
+
+    async def synthesize_chunk(text: str) -> bytes:
+        nonlocal cached
+        key = chunk_cache_key(text, settings)
+        audio = cache.get(key)
+        if audio is not None:
+            cached += 1
+            return audio
+        async with semaphore:
+            audio = await synthesize(text)
+        cache.put(key, audio)
+        return audio
+
+    segments = await asyncio.gather(*(synthesize_chunk(text) for text in chunks))
+    return list(segments), cached
+
+
+_cache = ChunkAudioCache()
+
+
+def cache_stats() -> dict[str, int]:
+    """Counters for the process-wide chunk cache."""
+    return _cache.stats()
+
+
+def install_chunked_tts(
+    *,
+    max_chunk_chars: int = DEFAULT_MAX_CHUNK_CHARS,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> bool:
+    """Replace the TTS node's single request with chunked, concurrent synthesis.
+
+    Returns:
+        True if the TTS node was found and the hook was installed.
+    """
+    tts_node = find_node(TTS_NODE)
+    if tts_node is None:
+        logger.warning("Chunked TTS needs the '%s' node, leaving it off", TTS_NODE)
+        return False
+
+    async def synthesize_in_chunks(node: BaseNode, process: NodeProcess) -> None:
+        text = node.get_parameter_value(TTS_TEXT_PARAMETER)
+        if not isinstance(text, str) or not text.strip():
+            await process()
+            return
+
+        started_at = time.monotonic()
+        settings = voice_settings(node)
+        chunks = split_into_chunks(text, max_chunk_chars)
+        try:
+            segments, cached = await synthesize_chunks(
+                chunks,
+                settings,
+                lambda chunk: synthesize_with_node(node, settings, chunk),
+                _cache,
+                max_concurrency,
+            )
+            audio = await asyncio.to_thread(concat_audio, segments, AUDIO_FORMAT)
+        except Exception:
+            logger.exception("Chunked TTS failed, synthesizing the full monologue instead")
+            await process()
+            return
+
+        node.parameter_output_values[TTS_AUDIO_PARAMETER] = await save_voice_audio(audio)
+        last_run_stats.update(
+            {"chunks": len(chunks), "cached_chunks": cached, "seconds": time.monotonic() - started_at}
+        )
+        logger.info("Synthesized voice in %d chunks (%d from cache)", len(chunks), cached)
+
+    wrap_node_process(tts_node, synthesize_in_chunks)
+    logger.info("Chunked TTS enabled for %s", TTS_NODE)
+    return True
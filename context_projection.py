@@ -0,0 +1,302 @@
+"""Per-expert projection and compaction of game_data context.
+
+The workflow hands the full game_data text to every data expert as
+additional_context. Each expert only needs part of it, so a projection stage
+runs in front of each expert node: it keeps the fields selected by a few
+JSONPath-style paths, re-encodes them without whitespace and optionally trims
+the result to a token budget.
+"""
+
+import ast
+import copy
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from griptape.tokenizers import SimpleTokenizer
+from griptape_nodes.exe_types.node_types import BaseNode
+
+from node_hooks import NodeProcess, wrap_nodes_by_name
+
+logger = logging.getLogger(__name__)
+
+PROJECTIONS_FILE_ENV = "WORKFLOW_PROJECTIONS_FILE"
+CONTEXT_PARAMETER = "additional_context"
+CHARACTERS_PER_TOKEN = 4
+TRUNCATION_MARKER = "...[truncated]"
+
+_PATH_SEGMENT = re.compile(r"\.([A-Za-z_][\w-]*)|\.\*|\[\*\]|\[(\d+)\]|\[['\"]([^'\"]+)['\"]\]")
+
+
+@dataclass
+class ProjectionSpec:
+    """Which parts of game_data an expert receives.
+
+    paths are JSONPath-style selectors such as "$.performance.encounters[*].outcome".
+    An empty list keeps the whole document. max_tokens trims the compacted
+    result to a budget; None leaves it untrimmed.
+    """
+
+    paths: list[str] = field(default_factory=list)
+    max_tokens: int | None = None
+
+
+@dataclass
+class ProjectionReport:
+    """Token counts for one expert's context before and after projection."""
+
+    node_name: str
+    tokens_before: int
+    tokens_after: int
+
+
+# Projections for the expert nodes in published_nodes_workflow
+DEFAULT_EXPERT_PROJECTIONS = {
+    "Mission Success Agent": ProjectionSpec(
+        paths=[
+            "$.location",
+            "$.mission_type",
+            "$.primary_objectives",
+            "$.secondary_objectives",
+            "$.performance.waypoints_visited",
+            "$.performance.notable_events",
+            "$.mission_results",
+        ],
+    ),
+    "Encounter Summary Agent": ProjectionSpec(
+        paths=[
+            "$.location",
+            "$.mission_type",
+            "$.sortie_squadron",
+            "$.performance.encounters",
+            "$.performance.kills",
+            "$.performance.enemies_escaped",
+        ],
+    ),
+    "Leadership Summary Agent": ProjectionSpec(
+        paths=[
+            "$.sortie_squadron",
+            "$.performance.encounters",
+            "$.performance.kills",
+            "$.performance.notable_events",
+            "$.mission_results.pilot_status",
+            "$.mission_results.losses",
+        ],
+    ),
+}
+
+_MISSING = object()
+
+# Latest report per expert node, exposed through the server's health endpoint
+last_reports: dict[str, ProjectionReport] = {}
+
+
+def load_projection_specs(path: str | None = None) -> dict[str, ProjectionSpec]:
+    """Load per-node projection specs from a JSON file, falling back to the defaults.
+
+    The file maps node names to {"paths": [...], "max_tokens": N}. An empty object
+    disables projection entirely.
+    """
+    path = path or os.environ.get(PROJECTIONS_FILE_ENV)
+    if not path:
+        return dict(DEFAULT_EXPERT_PROJECTIONS)
+
+    with Path(path).open() as f:
+        return {node_name: ProjectionSpec(**spec) for node_name, spec in json.load(f).items()}
+
+
+def parse_path(path: str) -> list[tuple[str, Any]]:
+    """Split a JSONPath-style selector into (kind, value) segments.
+
+    Raises:
+        ValueError: If the path isn't a supported selector.
+    """
+    if not path.startswith("$"):
+        msg = f"Projection path '{path}' must start with '$'"
+        raise ValueError(msg)
+
+    segments: list[tuple[str, Any]] = []
+    position = 1
+    while position < len(path):
+        match = _PATH_SEGMENT.match(path, position)
+        if match is None:
+            msg = f"Unsupported projection path '{path}' at position {position}"
+            raise ValueError(msg)
+        key, index, quoted_key = match.groups()
+        if key is not None:
+            segments.append(("key", key))
+        elif quoted_key is not None:
+            segments.append(("key", quoted_key))
+        elif index is not None:
+            segments.append(("index", int(index)))
+        else:
+            segments.append(("wildcard", None))
+        position = match.end()
+    return segments
+
+
+def project(data: Any, paths: list[str]) -> Any:
+    """Keep only the parts of `data` selected by `paths`, preserving their structure."""
+    if not paths:
+        return data
+
+    result: Any = _MISSING
+    for path in paths:
+        selected = _extract(data, parse_path(path))
+        if selected is not _MISSING:
+            result = selected if result is _MISSING else _merge(result, selected)
+    if result is _MISSING:
+        return {}
+    return _drop_missing(result)
+
+
+def compact(value: Any) -> str:
+    """Encode a value as JSON without insignificant whitespace."""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def project_context(text: str, spec: ProjectionSpec, tokenizer: SimpleTokenizer) -> str:
+    """Project, compact and trim a game_data context string.
+
+    Text that can't be parsed as JSON or a Python literal is returned unchanged.
+    """
+    data = _parse_context(text)
+    if data is _MISSING:
+        return text
+
+    projected = copy.deepcopy(project(data, spec.paths))
+    if spec.max_tokens is None:
+        return compact(projected)
+    return _fit_to_budget(projected, spec.max_tokens, tokenizer)
+
+
+def install_context_projection(specs: dict[str, ProjectionSpec]) -> None:
+    """Install the projection stage in front of each configured expert node."""
+    tokenizer = SimpleTokenizer(characters_per_token=CHARACTERS_PER_TOKEN)
+
+    async def project_before_run(node: BaseNode, process: NodeProcess) -> None:
+        spec = specs[node.name]
+        context = node.get_parameter_value(CONTEXT_PARAMETER)
+        if isinstance(context, str) and context:
+            projected = project_context(context, spec, tokenizer)
+            report = ProjectionReport(
+                node_name=node.name,
+                tokens_before=tokenizer.count_tokens(context),
+                tokens_after=tokenizer.count_tokens(projected),
+            )
+            last_reports[node.name] = report
+            logger.info(
+                "Projected context for %s: %d -> %d tokens",
+                node.name,
+                report.tokens_before,
+                report.tokens_after,
+            )
+            node.set_parameter_value(CONTEXT_PARAMETER, projected)
+        await process()
+
+    wrapped = wrap_nodes_by_name(list(specs), project_before_run)
+    if wrapped:
+        logger.info("Context projection enabled for: %s", ", ".join(wrapped))
+
+
+def _parse_context(text: str) -> Any:
+    # "To Text" renders the parsed game_data as a Python literal rather than JSON
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        logger.warning("Could not parse game_data context, passing it through unprojected")
+        return _MISSING
+
+
+def _extract(value: Any, segments: list[tuple[str, Any]]) -> Any:
+    if not segments:
+        return value
+
+    (kind, arg), rest = segments[0], segments[1:]
+    if kind == "key":
+        if not isinstance(value, dict) or arg not in value:
+            return _MISSING
+        selected = _extract(value[arg], rest)
+        return _MISSING if selected is _MISSING else {arg: selected}
+    if kind == "index":
+        if not isinstance(value, list) or arg >= len(value):
+            return _MISSING
+        selected = _extract(value[arg], rest)
+        return _MISSING if selected is _MISSING else [selected]
+    return _extract_wildcard(value, rest)
+
+
+def _extract_wildcard(value: Any, rest: list[tuple[str, Any]]) -> Any:
+    if isinstance(value, dict):
+        selected_items = {key: _extract(item, rest) for key, item in value.items()}
+        kept = {key: item for key, item in selected_items.items() if item is not _MISSING}
+        return kept or _MISSING
+    if isinstance(value, list):
+        # Keep placeholders so selections from different paths stay aligned when merged
+        selected_list = [_extract(item, rest) for item in value]
+        if value and all(item is _MISSING for item in selected_list):
+            return _MISSING
+        return selected_list
+    return _MISSING
+
+
+def _merge(left: Any, right: Any) -> Any:
+    if left is _MISSING:
+        return right
+    if right is _MISSING:
+        return left
+    if isinstance(left, dict) and isinstance(right, dict):
+        merged = dict(left)
+        for key, value in right.items():
+            merged[key] = _merge(merged[key], value) if key in merged else value
+        return merged
+    if isinstance(left, list) and isinstance(right, list) and len(left) == len(right):
+        return [_merge(a, b) for a, b in zip(left, right, strict=True)]
+    return right
+
+
+def _drop_missing(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _drop_missing(item) for key, item in value.items() if item is not _MISSING}
+    if isinstance(value, list):
+        return [_drop_missing(item) for item in value if item is not _MISSING]
+    return value
+
+
+def _longest_list(value: Any) -> list | None:
+    longest: list | None = None
+    stack = [value]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            stack.extend(current.values())
+        elif isinstance(current, list):
+            if longest is None or len(current) > len(longest):
+                longest = current
+            stack.extend(current)
+    return longest
+
+
+def _fit_to_budget(value: Any, max_tokens: int, tokenizer: SimpleTokenizer) -> str:
+    # Shorten the longest lists first so the result stays valid, structured JSON
+    text = compact(value)
+    while tokenizer.count_tokens(text) > max_tokens:
+        longest = _longest_list(value)
+        if longest is None or len(longest) <= 1:
+            break
+        keep = max(1, min(len(longest) - 1, len(longest) * max_tokens // tokenizer.count_tokens(text)))
+        del longest[keep:]
+        text = compact(value)
+
+    if tokenizer.count_tokens(text) <= max_tokens:
+        return text
+    cutoff = max(0, max_tokens * CHARACTERS_PER_TOKEN - len(TRUNCATION_MARKER))
+    return text[:cutoff] + TRUNCATION_MARKER
@@ -0,0 +1,128 @@
+"""Server-held Start Flow inputs, updated by deltas.
+
+Every run used to resend the whole input set: the rules, character, expert,
+summarizer, speechwriter and music coach prompts and the game data. That
+happened even on a voice-only rerun that changed nothing but the voice
+settings. With an input session, the workflow server keeps each client's last
+inputs. The client sends only the fields that changed, along with the version
+they apply to.
+
+Sessions live in the memory of one server process, keyed by session id, and
+a delta only applies to the session it names there. A version is a hash of
+the complete inputs, so the process can tell whether the delta was made
+against what it holds. A process that doesn't hold the session at that
+version (it restarted, the session was evicted, or it is a different worker)
+answers with a conflict, and the client resends everything. The server
+manager routes each session to the same worker, so with several workers
+that only happens when a worker goes away.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+DEFAULT_MAX_SESSIONS = 256
+DEFAULT_TTL_SECONDS = 3600.0
+
+
+def inputs_version(fields: dict[str, Any]) -> str:
+    """Version identifier of a complete set of inputs."""
+    encoded = json.dumps(fields, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()[:16]
+
+
+class InputSessionConflictError(Exception):
+    """A delta was sent against inputs the server doesn't hold."""
+
+    def __init__(self, session_id: str, base_version: str) -> None:
+        self.session_id = session_id
+        self.base_version = base_version
+        super().__init__(f"Input session {session_id} is not at version {base_version}; send the complete inputs")
+
+
+class InputSessionStore:
+    """The latest inputs of each client session, least recently used evicted first."""
+
+    def __init__(self, max_sessions: int = DEFAULT_MAX_SESSIONS, ttl_seconds: float = DEFAULT_TTL_SECONDS) -> None:
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions: OrderedDict[str, tuple[float, str, dict[str, Any]]] = OrderedDict()
+        self.full_updates = 0
+        self.delta_updates = 0
+        self.conflicts = 0
+
+    def apply(self, session_id: str, base_version: str | None, fields: dict[str, Any]) -> tuple[str, dict[str, Any]]:
+        """Update a session with complete inputs (no base version) or with changes to the version it holds.
+
+        Returns:
+            The new version and the complete inputs.
+
+        Raises:
+            InputSessionConflictError: If the session isn't at base_version.
+        """
+        self._expire()
+        if base_version is None:
+            inputs = dict(fields)
+            self.full_updates += 1
+        else:
+            entry = self._sessions.get(session_id)
+            if entry is None or entry[1] != base_version:
+                self.conflicts += 1
+                raise InputSessionConflictError(session_id, base_version)
+            inputs = {**entry[2], **fields}
+            self.delta_updates += 1
+
+        version = inputs_version(inputs)
+        self._sessions[session_id] = (time.monotonic(), version, inputs)
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return version, inputs
+
+    def stats(self) -> dict[str, int]:
+        """Counters for /health."""
+        return {
+            "sessions": len(self._sessions),
+            "full_updates": self.full_updates,
+            "delta_updates": self.delta_updates,
+            "conflicts": self.conflicts,
+        }
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.ttl_seconds
+        while self._sessions and next(iter(self._sessions.values()))[0] < cutoff:
+            self._sessions.popitem(last=False)
+
+
+class InputSessionClient:
+    """Client side: remembers what each session last sent, to send only what changed since.
+
+    Safe to share between the threads of several app sessions.
+    """
+
+    def __init__(self) -> None:
+        self._sent: dict[str, tuple[str, dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def update(self, session_id: str, fields: dict[str, Any], *, full: bool = False) -> dict[str, Any]:
+        """The input_session payload for a run: the changed fields, or everything when nothing was confirmed yet."""
+        with self._lock:
+            sent = None if full else self._sent.get(session_id)
+        if sent is None:
+            return {"session_id": session_id, "base_version": None, "fields": fields}
+        version, previous = sent
+        changes = {name: value for name, value in fields.items() if name not in previous or previous[name] != value}
+        return {"session_id": session_id, "base_version": version, "fields": changes}
+
+    def confirm(self, session_id: str, version: str, fields: dict[str, Any]) -> None:
+        """Record the inputs the server now holds for the session."""
+        with self._lock:
+            self._sent[session_id] = (version, dict(fields))
+
+    def forget(self, session_id: str) -> None:
+        """Drop a session, so its next run sends everything."""
+        with self._lock:
+            self._sent.pop(session_id, None)
@@ -0,0 +1,187 @@
+"""Opt-in memory leak diagnostics for workflow runs.
+
+The workflow server reuses one retained-mode graph and executor for every run,
+so state left behind by a run (an agent's conversation history, artifacts held
+in parameter values) accumulates. In diagnostics mode, a tracemalloc snapshot
+is taken before and after each run. The allocation sites that grew the most
+are reported, along with the number of objects each node holds, and any figure
+that grew on every one of the last N runs is flagged.
+"""
+
+import gc
+import itertools
+import logging
+import time
+import tracemalloc
+import types
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any
+
+from griptape_nodes.exe_types.node_types import BaseNode
+
+from node_hooks import workflow_nodes
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOP_SITES = 10
+DEFAULT_GROWTH_RUNS = 5
+TRACEBACK_FRAMES = 5
+# Stop counting a node's objects past this many; the count is then a lower bound
+MAX_OBJECTS_PER_NODE = 200_000
+
+# Shared, effectively immortal objects that would otherwise make every node reach the whole process
+_SKIPPED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType, BaseNode)
+
+
+@dataclass
+class RunMemoryReport:
+    """Memory growth measured across one workflow run."""
+
+    started_at: float
+    seconds: float
+    traced_bytes_before: int
+    traced_bytes_after: int
+    top_sites: list[dict[str, Any]]
+    node_objects: dict[str, int]
+
+    @property
+    def growth_bytes(self) -> int:
+        """Net traced memory the run left behind."""
+        return self.traced_bytes_after - self.traced_bytes_before
+
+
+@dataclass
+class _RunInProgress:
+    started_at: float
+    snapshot: tracemalloc.Snapshot
+    traced_bytes: int
+    monotonic_start: float = field(default_factory=time.monotonic)
+
+
+def reachable_object_count(roots: list[Any], limit: int = MAX_OBJECTS_PER_NODE) -> int:
+    """Count the objects reachable from `roots`, not following types, modules, functions or other nodes."""
+    seen: set[int] = set()
+    pending = [root for root in roots if not isinstance(root, _SKIPPED_TYPES)]
+    while pending and len(seen) < limit:
+        obj = pending.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        pending.extend(referent for referent in gc.get_referents(obj) if not isinstance(referent, _SKIPPED_TYPES))
+    return len(seen)
+
+
+def node_object_counts(nodes: list[BaseNode]) -> dict[str, int]:
+    """Objects held in each node's parameter and output values."""
+    return {node.name: reachable_object_count([node.parameter_values, node.parameter_output_values]) for node in nodes}
+
+
+def steadily_growing(values: list[float], runs: int) -> bool:
+    """Whether the last `runs` values increased every time."""
+    if len(values) < runs:
+        return False
+    recent = values[-runs:]
+    return all(later > earlier for earlier, later in itertools.pairwise(recent))
+
+
+class LeakDiagnostics:
+    """Tracks memory across workflow runs with tracemalloc."""
+
+    def __init__(self, top_sites: int = DEFAULT_TOP_SITES, growth_runs: int = DEFAULT_GROWTH_RUNS) -> None:
+        self.top_sites = top_sites
+        self.growth_runs = growth_runs
+        self.reports: deque[RunMemoryReport] = deque(maxlen=max(growth_runs, 20))
+        self._current: _RunInProgress | None = None
+
+    def start(self) -> None:
+        """Start tracing allocations, keeping enough frames to tell call sites apart."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEBACK_FRAMES)
+
+    def before_run(self) -> None:
+        """Take the baseline snapshot for the next run."""
+        self.start()
+        gc.collect()
+        self._current = _RunInProgress(
+            started_at=time.time(),
+            snapshot=tracemalloc.take_snapshot(),
+            traced_bytes=tracemalloc.get_traced_memory()[0],
+        )
+
+    def after_run(self, nodes: list[BaseNode] | None = None) -> RunMemoryReport | None:
+        """Compare against the baseline and record what the run left behind.
+
+        Returns:
+            The report for the run, or None if before_run wasn't called.
+        """
+        current, self._current = self._current, None
+        if current is None:
+            return None
+
+        gc.collect()
+        snapshot = tracemalloc.take_snapshot()
+        differences = snapshot.compare_to(current.snapshot, "traceback")
+        top_sites = [
+            {
+                "site": str(difference.traceback[0]) if difference.traceback else "<unknown>",
+                "traceback": difference.traceback.format(),
+                "size_diff": difference.size_diff,
+                "count_diff": difference.count_diff,
+            }
+            for difference in differences[: self.top_sites]
+            if difference.size_diff > 0
+        ]
+        report = RunMemoryReport(
+            started_at=current.started_at,
+            seconds=time.monotonic() - current.monotonic_start,
+            traced_bytes_before=current.traced_bytes,
+            traced_bytes_after=tracemalloc.get_traced_memory()[0],
+            top_sites=top_sites,
+            node_objects=node_object_counts(workflow_nodes() if nodes is None else nodes),
+        )
+        self.reports.append(report)
+        suspects = self.suspects()
+        if suspects:
+            msg = f"Memory grew on each of the last {self.growth_runs} runs: {', '.join(suspects)}"
+            logger.warning(msg)
+        return report
+
+    def suspects(self) -> list[str]:
+        """Figures that grew on every one of the last `growth_runs` runs.
+
+        "traced_memory" is the process total; other entries name nodes whose held
+        objects kept growing.
+        """
+        reports = list(self.reports)
+        suspects = []
+        if steadily_growing([report.traced_bytes_after for report in reports], self.growth_runs):
+            suspects.append("traced_memory")
+        node_names = reports[-1].node_objects if reports else {}
+        for name in node_names:
+            counts = [report.node_objects.get(name, 0) for report in reports]
+            if steadily_growing(counts, self.growth_runs):
+                suspects.append(name)
+        return suspects
+
+    def summary(self) -> dict[str, Any]:
+        """Everything collected so far, for the admin endpoint."""
+        summary: dict[str, Any] = {
+            "tracing": tracemalloc.is_tracing(),
+            "runs": len(self.reports),
+            "growth_runs": self.growth_runs,
+            "suspects": self.suspects(),
+            "traced_bytes": [report.traced_bytes_after for report in self.reports],
+            "growth_bytes": [report.growth_bytes for report in self.reports],
+            "latest": None,
+        }
+        if self.reports:
+            latest = self.reports[-1]
+            summary["latest"] = {
+                "started_at": latest.started_at,
+                "seconds": round(latest.seconds, 3),
+                "growth_bytes": latest.growth_bytes,
+                "top_sites": latest.top_sites,
+                "node_objects": latest.node_objects,
+            }
+        return summary
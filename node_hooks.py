@@ -0,0 +1,120 @@
+"""Hooks that run around node execution inside a workflow server."""
+
+import logging
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from griptape_nodes.exe_types.node_types import BaseNode, EndNode, StartNode
+from griptape_nodes.retained_mode.griptape_nodes import GriptapeNodes
+
+logger = logging.getLogger(__name__)
+
+NodeProcess = Callable[[], Awaitable[None]]
+NodeHook = Callable[[BaseNode, NodeProcess], Awaitable[None]]
+
+
+def find_node(node_name: str) -> BaseNode | None:
+    """Look up a node in the loaded workflow by name."""
+    try:
+        return GriptapeNodes.NodeManager().get_node_by_name(node_name)
+    except ValueError:
+        return None
+
+
+def wrap_node_process(node: BaseNode, hook: NodeHook) -> None:
+    """Run `hook` around every execution of `node`.
+
+    The hook receives the node and a callable that runs the node's own
+    processing. Hooks stack: the most recently installed hook runs outermost.
+    """
+    inner = node.aprocess
+
+    async def aprocess() -> None:
+        await hook(node, inner)
+
+    node.aprocess = aprocess  # type: ignore[method-assign]
+
+
+def wrap_nodes_by_name(node_names: list[str], hook: NodeHook) -> list[str]:
+    """Install `hook` on each named node that exists in the loaded workflow.
+
+    Returns:
+        The names of the nodes the hook was installed on.
+    """
+    wrapped = []
+    for node_name in node_names:
+        node = find_node(node_name)
+        if node is None:
+            msg = f"Node '{node_name}' not found in workflow, skipping hook"
+            logger.warning(msg)
+            continue
+        wrap_node_process(node, hook)
+        wrapped.append(node_name)
+    return wrapped
+
+
+def without_unchanged_values(flow_input: dict[str, Any]) -> tuple[dict[str, Any], int]:
+    """Drop input values that the Start nodes already hold from the previous run.
+
+    The graph is reused between runs, so a value that didn't change needn't be
+    set again. Nodes that aren't found keep their input as is.
+
+    Returns:
+        The remaining input and the number of values dropped.
+    """
+    remaining: dict[str, Any] = {}
+    skipped = 0
+    for node_name, values in flow_input.items():
+        node = find_node(node_name)
+        if node is None or not isinstance(node, StartNode) or not isinstance(values, dict):
+            remaining[node_name] = values
+            continue
+        changed = {}
+        for name, value in values.items():
+            try:
+                unchanged = node.get_parameter_value(name) == value
+            except (RuntimeError, KeyError, ValueError):
+                unchanged = False
+            if unchanged:
+                skipped += 1
+            else:
+                changed[name] = value
+        remaining[node_name] = changed
+    return remaining, skipped
+
+
+def workflow_nodes() -> list[BaseNode]:
+    """All nodes in the loaded workflow."""
+    return list(GriptapeNodes.ObjectManager().get_filtered_subset(type=BaseNode).values())
+
+
+@contextmanager
+def stubbed_node_processing() -> Iterator[int]:
+    """Skip the processing of every node except Start and End while the context is active.
+
+    The flow still resolves node by node, so a run inside the context exercises
+    the engine without calling any model or provider. Hooks installed on the
+    nodes are bypassed and restored afterwards.
+
+    Yields:
+        The number of nodes stubbed out.
+    """
+
+    async def skip() -> None:
+        return None
+
+    originals = {}
+    for node in workflow_nodes():
+        if isinstance(node, (StartNode, EndNode)):
+            continue
+        originals[node] = node.__dict__.get("aprocess")
+        node.aprocess = skip  # type: ignore[method-assign]
+    try:
+        yield len(originals)
+    finally:
+        for node, original in originals.items():
+            if original is None:
+                del node.aprocess
+            else:
+                node.aprocess = original  # type: ignore[method-assign]
@@ -0,0 +1,450 @@
+"""Cross-process rate limiting of outbound provider calls.
+
+The WorkflowServerManager hosts a single ProviderLimiterServer on a local socket.
+Every workflow server process it launches routes its OpenAI, Anthropic and
+ElevenLabs HTTP calls through a ProviderLimiterClient, which asks the shared
+limiter for a lease before each call. Limits therefore hold across all server
+processes instead of per process.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import random
+import socket
+import socketserver
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Environment variables used to hand limiter settings to workflow server processes
+LIMITER_ADDRESS_ENV = "PROVIDER_LIMITER_ADDRESS"
+LIMITS_FILE_ENV = "PROVIDER_LIMITS_FILE"
+
+# Leases not released within this window are reclaimed (e.g. a worker died mid-call)
+LEASE_TIMEOUT_SECONDS = 600.0
+
+# Hosts whose requests count against a provider's quota
+PROVIDER_HOSTS = {
+    "api.openai.com": "openai",
+    "api.anthropic.com": "anthropic",
+    "api.elevenlabs.io": "elevenlabs",
+}
+
+# Griptape Cloud proxies several providers; the model name tells them apart
+PROXY_HOSTS = {"cloud.griptape.ai"}
+MODEL_PREFIX_PROVIDERS = {
+    "gpt": "openai",
+    "o1": "openai",
+    "o3": "openai",
+    "o4": "openai",
+    "claude": "anthropic",
+    "eleven": "elevenlabs",
+}
+
+
+@dataclass
+class ProviderLimit:
+    """Rate and concurrency limit for a provider, optionally narrowed to one model.
+
+    A limit with model=None applies to every call to the provider. Model-specific
+    limits apply on top of it.
+    """
+
+    provider: str
+    model: str | None = None
+    requests_per_minute: float = 60.0
+    burst: int = 5
+    max_concurrency: int = 4
+
+
+DEFAULT_PROVIDER_LIMITS = [
+    ProviderLimit(provider="openai", requests_per_minute=500.0, burst=20, max_concurrency=10),
+    ProviderLimit(provider="anthropic", requests_per_minute=50.0, burst=5, max_concurrency=5),
+    ProviderLimit(provider="elevenlabs", requests_per_minute=100.0, burst=5, max_concurrency=3),
+]
+
+
+def load_provider_limits(path: str | None = None) -> list[ProviderLimit]:
+    """Load provider limits from a JSON file, falling back to the defaults.
+
+    The file holds a list of objects with the ProviderLimit fields, e.g.
+    [{"provider": "openai", "model": "gpt-4.1-mini", "requests_per_minute": 300, "max_concurrency": 6}].
+
+    Raises:
+        ValueError: If a limit isn't a positive number. A zero limit would never
+            grant a call; leave a provider out of the file to not limit it.
+    """
+    path = path or os.environ.get(LIMITS_FILE_ENV)
+    if not path:
+        return list(DEFAULT_PROVIDER_LIMITS)
+
+    limits_path = Path(path)
+    if not limits_path.exists():
+        msg = f"Provider limits file {limits_path} not found, using defaults"
+        logger.warning(msg)
+        return list(DEFAULT_PROVIDER_LIMITS)
+
+    with limits_path.open() as f:
+        limits = [ProviderLimit(**entry) for entry in json.load(f)]
+    for limit in limits:
+        _check_limit(limit, limits_path)
+    return limits
+
+
+def _check_limit(limit: ProviderLimit, limits_path: Path) -> None:
+    for field in ("requests_per_minute", "burst", "max_concurrency"):
+        value = getattr(limit, field)
+        if not value > 0:
+            target = f"{limit.provider}/{limit.model}" if limit.model else limit.provider
+            msg = f"{field} for {target} in {limits_path} must be greater than 0, got {value}"
+            raise ValueError(msg)
+
+
+def classify_request(url: str, body: bytes | None) -> tuple[str, str | None] | None:
+    """Work out which provider (and model, if visible) an outbound request is for.
+
+    Returns:
+        A (provider, model) tuple, or None if the request isn't to a rate-limited provider.
+    """
+    host = urlsplit(url).hostname or ""
+    model = _model_from_body(body)
+
+    provider = PROVIDER_HOSTS.get(host)
+    if provider is not None:
+        return provider, model
+
+    if host in PROXY_HOSTS and model is not None:
+        for prefix, proxied_provider in MODEL_PREFIX_PROVIDERS.items():
+            if model.startswith(prefix):
+                return proxied_provider, model
+    return None
+
+
+def _model_from_body(body: bytes | None) -> str | None:
+    if not body or not body.lstrip().startswith(b"{"):
+        return None
+    try:
+        payload = json.loads(body)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    model = payload.get("model") or payload.get("model_id")
+    return model if isinstance(model, str) else None
+
+
+@dataclass
+class _Bucket:
+    limit: ProviderLimit
+    tokens: float
+    updated_at: float
+    in_flight: int = 0
+    cooldown_until: float = 0.0
+
+    def refill(self, now: float) -> None:
+        rate = self.limit.requests_per_minute / 60.0
+        self.tokens = min(float(self.limit.burst), self.tokens + (now - self.updated_at) * rate)
+        self.updated_at = now
+
+    def wait_seconds(self, now: float) -> float:
+        """Seconds until this bucket could grant a call, 0 if it can grant one now."""
+        if now < self.cooldown_until:
+            return self.cooldown_until - now
+        if self.in_flight >= self.limit.max_concurrency:
+            # Concurrency frees up when a call finishes; poll again shortly
+            return 0.25
+        if self.tokens < 1.0:
+            return (1.0 - self.tokens) * 60.0 / self.limit.requests_per_minute
+        return 0.0
+
+
+@dataclass
+class _Lease:
+    buckets: list[_Bucket]
+    expires_at: float
+
+
+class ProviderLimiter:
+    """Token-bucket and concurrency limiter shared by all workflow server processes."""
+
+    def __init__(self, limits: list[ProviderLimit], clock: Callable[[], float] = time.monotonic) -> None:
+        self.clock = clock
+        self._buckets: dict[tuple[str, str | None], _Bucket] = {}
+        self._leases: dict[int, _Lease] = {}
+        self._lease_ids = itertools.count()
+        self._lock = threading.Lock()
+
+        now = clock()
+        for limit in limits:
+            self._buckets[(limit.provider, limit.model)] = _Bucket(
+                limit=limit, tokens=float(limit.burst), updated_at=now
+            )
+
+    def try_acquire(self, provider: str, model: str | None) -> tuple[int | None, float]:
+        """Try to take a lease for one call.
+
+        Returns:
+            A (lease_id, retry_in) tuple. lease_id is None when the call must wait
+            retry_in seconds before asking again.
+        """
+        with self._lock:
+            now = self.clock()
+            self._expire_leases(now)
+            buckets = self._matching_buckets(provider, model)
+            for bucket in buckets:
+                bucket.refill(now)
+
+            retry_in = max((bucket.wait_seconds(now) for bucket in buckets), default=0.0)
+            if retry_in > 0:
+                return None, retry_in
+
+            for bucket in buckets:
+                bucket.tokens -= 1.0
+                bucket.in_flight += 1
+            lease_id = next(self._lease_ids)
+            self._leases[lease_id] = _Lease(buckets=buckets, expires_at=now + LEASE_TIMEOUT_SECONDS)
+            return lease_id, 0.0
+
+    def release(self, lease_id: int) -> None:
+        """Return a lease once its call has finished."""
+        with self._lock:
+            lease = self._leases.pop(lease_id, None)
+            if lease is None:
+                return
+            for bucket in lease.buckets:
+                bucket.in_flight -= 1
+
+    def cooldown(self, provider: str, model: str | None, seconds: float) -> None:
+        """Pause a provider after it reported a rate limit of its own."""
+        with self._lock:
+            until = self.clock() + seconds
+            for bucket in self._matching_buckets(provider, model):
+                bucket.cooldown_until = max(bucket.cooldown_until, until)
+
+    def _matching_buckets(self, provider: str, model: str | None) -> list[_Bucket]:
+        keys = [(provider, None)]
+        if model is not None:
+            keys.append((provider, model))
+        return [self._buckets[key] for key in keys if key in self._buckets]
+
+    def _expire_leases(self, now: float) -> None:
+        expired = [lease_id for lease_id, lease in self._leases.items() if lease.expires_at <= now]
+        for lease_id in expired:
+            msg = f"Reclaiming provider lease {lease_id} that was never released"
+            logger.warning(msg)
+            for bucket in self._leases.pop(lease_id).buckets:
+                bucket.in_flight -= 1
+
+
+class _LimiterRequestHandler(socketserver.StreamRequestHandler):
+    """Serves newline-delimited JSON commands against the shared limiter."""
+
+    server: "ProviderLimiterServer"
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                command = json.loads(line)
+                reply = self._dispatch(command)
+            except (json.JSONDecodeError, KeyError, TypeError) as e:
+                reply = {"error": str(e)}
+            self.wfile.write(json.dumps(reply).encode() + b"\n")
+
+    def _dispatch(self, command: dict) -> dict:
+        limiter = self.server.limiter
+        op = command["op"]
+        if op == "acquire":
+            lease_id, retry_in = limiter.try_acquire(command["provider"], command.get("model"))
+            return {"lease": lease_id, "retry_in": retry_in}
+        if op == "release":
+            limiter.release(command["lease"])
+            return {"ok": True}
+        if op == "cooldown":
+            limiter.cooldown(command["provider"], command.get("model"), float(command["seconds"]))
+            return {"ok": True}
+        return {"error": f"Unknown op {op}"}
+
+
+class ProviderLimiterServer(socketserver.ThreadingTCPServer):
+    """Local socket server exposing a ProviderLimiter to workflow server processes."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, limits: list[ProviderLimit], host: str = "127.0.0.1", port: int = 0) -> None:
+        super().__init__((host, port), _LimiterRequestHandler)
+        self.limiter = ProviderLimiter(limits=limits)
+        self._thread: threading.Thread | None = None
+
+    @property
+    def address(self) -> str:
+        host, port = self.server_address[:2]
+        return f"{host}:{port}"
+
+    def start(self) -> None:
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, name="provider-limiter", daemon=True)
+        self._thread.start()
+        msg = f"Provider limiter listening on {self.address}"
+        logger.info(msg)
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self.shutdown()
+        self.server_close()
+
+
+class ProviderLimiterClient:
+    """Client used inside workflow server processes to take and return leases.
+
+    If the limiter cannot be reached the client fails open, so a missing manager
+    never blocks provider calls outright.
+    """
+
+    def __init__(self, address: str, timeout: float = 5.0) -> None:
+        host, port = address.rsplit(":", 1)
+        self._address = (host, int(port))
+        self._timeout = timeout
+        self._local = threading.local()
+
+    @classmethod
+    def from_env(cls) -> "ProviderLimiterClient | None":
+        """Create a client for the limiter address handed down by the manager, if any."""
+        address = os.environ.get(LIMITER_ADDRESS_ENV)
+        if not address:
+            return None
+        return cls(address)
+
+    def acquire(self, provider: str, model: str | None, cancelled: threading.Event | None = None) -> int | None:
+        """Block until the shared limiter grants a lease for one call, or until `cancelled` is set."""
+        cancelled = cancelled or threading.Event()
+        while not cancelled.is_set():
+            reply = self._send({"op": "acquire", "provider": provider, "model": model})
+            if reply is None:
+                return None
+            if reply.get("lease") is not None:
+                return reply["lease"]
+            # Jitter keeps waiting workers from asking again in lockstep
+            cancelled.wait(reply["retry_in"] * random.uniform(1.0, 1.2))  # noqa: S311
+        return None
+
+    async def acquire_async(self, provider: str, model: str | None) -> int | None:
+        """Wait for a lease without blocking the event loop.
+
+        If the caller is cancelled, the waiting thread stops asking, and a lease
+        it was granted in the meantime is released rather than held until it
+        times out.
+        """
+        cancelled = threading.Event()
+        acquiring = asyncio.ensure_future(asyncio.to_thread(self.acquire, provider, model, cancelled))
+        try:
+            return await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            cancelled.set()
+            acquiring.add_done_callback(self._release_abandoned)
+            raise
+
+    def _release_abandoned(self, acquiring: asyncio.Future) -> None:
+        if acquiring.cancelled() or acquiring.exception() is not None or acquiring.result() is None:
+            return
+        asyncio.get_running_loop().run_in_executor(None, self.release, acquiring.result())
+
+    def release(self, lease_id: int | None) -> None:
+        """Return a lease to the shared limiter."""
+        if lease_id is None:
+            return
+        self._send({"op": "release", "lease": lease_id})
+
+    def cooldown(self, provider: str, model: str | None, seconds: float) -> None:
+        """Tell the shared limiter a provider asked us to back off."""
+        self._send({"op": "cooldown", "provider": provider, "model": model, "seconds": seconds})
+
+    def _send(self, command: dict) -> dict | None:
+        try:
+            stream = self._stream()
+            stream.write(json.dumps(command).encode() + b"\n")
+            stream.flush()
+            line = stream.readline()
+            if not line:
+                msg = "Provider limiter closed the connection"
+                raise ConnectionError(msg)
+            return json.loads(line)
+        except OSError as e:
+            msg = f"Provider limiter unavailable, continuing without limits: {e}"
+            logger.warning(msg)
+            self._local.stream = None
+            return None
+
+    def _stream(self) -> Any:
+        stream = getattr(self._local, "stream", None)
+        if stream is None:
+            sock = socket.create_connection(self._address, timeout=self._timeout)
+            stream = sock.makefile("rwb")
+            self._local.stream = stream
+        return stream
+
+
+def _retry_after_seconds(response: httpx.Response) -> float:
+    try:
+        return float(response.headers.get("Retry-After", ""))
+    except ValueError:
+        return 5.0
+
+
+def install_outbound_limits(client: ProviderLimiterClient) -> None:
+    """Route every httpx call to a known provider through the shared limiter.
+
+    The OpenAI, Anthropic and ElevenLabs SDKs, and the Griptape Cloud proxy, all
+    send over httpx, so wrapping httpx covers every Agent and ElevenLabs node
+    without touching the nodes themselves.
+    """
+    original_send = httpx.Client.send
+    original_async_send = httpx.AsyncClient.send
+
+    def send(self: httpx.Client, request: httpx.Request, **kwargs: Any) -> httpx.Response:
+        target = classify_request(str(request.url), _request_body(request))
+        if target is None:
+            return original_send(self, request, **kwargs)
+        lease_id = client.acquire(*target)
+        try:
+            # Streamed responses return once headers arrive, so their lease covers only that part
+            response = original_send(self, request, **kwargs)
+        finally:
+            client.release(lease_id)
+        if response.status_code == httpx.codes.TOO_MANY_REQUESTS:
+            client.cooldown(*target, _retry_after_seconds(response))
+        return response
+
+    async def async_send(self: httpx.AsyncClient, request: httpx.Request, **kwargs: Any) -> httpx.Response:
+        target = classify_request(str(request.url), _request_body(request))
+        if target is None:
+            return await original_async_send(self, request, **kwargs)
+        lease_id = await client.acquire_async(*target)
+        try:
+            response = await original_async_send(self, request, **kwargs)
+        finally:
+            await asyncio.to_thread(client.release, lease_id)
+        if response.status_code == httpx.codes.TOO_MANY_REQUESTS:
+            await asyncio.to_thread(client.cooldown, *target, _retry_after_seconds(response))
+        return response
+
+    httpx.Client.send = send  # type: ignore[method-assign]
+    httpx.AsyncClient.send = async_send  # type: ignore[method-assign]
+    logger.info("Outbound provider calls are now rate limited through the shared limiter")
+
+
+def _request_body(request: httpx.Request) -> bytes | None:
+    try:
+        return request.content
+    except httpx.RequestNotRead:
+        # Streaming uploads can't be inspected without consuming them
+        return None
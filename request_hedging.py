@@ -0,0 +1,345 @@
+"""Hedged provider calls for Agent and TTS nodes.
+
+Most of a run's tail latency comes from the occasional slow LLM response. A
+hedged call sends a duplicate of a provider request that hasn't answered within
+its node's usual (p90) latency. The first answer is used and the other request
+is cancelled. Duplicates cost money, so they are drawn from a budget that
+refills with every call: with a ratio of 0.05, at most about one call in twenty
+is duplicated.
+
+Calls are attributed to the node making them, because Agent nodes with long
+prompts are slower than ones with short prompts. Agent calls stream their
+response, and headers arrive long before the generation is done. Each copy of
+a streamed call is therefore read to the end before it counts as answered, and
+the caller gets the whole body at once. Nodes whose stream is consumed as it
+arrives (the Speechwriter with streaming TTS) are excluded from hedging. Only calls a hedged node makes
+to a known provider (see provider_limiter.classify_request) are hedged. When
+outbound limits are installed too, hedging wraps them, so duplicates take a
+lease like any other call.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from concurrent import futures
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+from griptape_nodes.exe_types.node_types import BaseNode
+
+from node_hooks import NodeProcess, workflow_nodes, wrap_node_process
+from provider_limiter import classify_request
+
+logger = logging.getLogger(__name__)
+
+AGENT_NODE_TYPES = ("Agent",)
+TTS_NODE_TYPES = ("ElevenLabsTextToSpeechGeneration",)
+
+# Latencies kept per node for the hedge delay
+LATENCY_WINDOW = 200
+# Threads that run the two copies of a hedged synchronous call
+SYNC_HEDGE_THREADS = 32
+
+# Name of the hedged node whose processing is making the current call
+_current_node: contextvars.ContextVar[str | None] = contextvars.ContextVar("hedged_node", default=None)
+
+
+@dataclass
+class HedgingPolicy:
+    """When to send a duplicate provider call, and how many may be sent."""
+
+    # Hedge a call still running at this quantile of its node's latencies
+    quantile: float = 0.9
+    # Latencies a node needs before its calls are hedged
+    min_samples: int = 20
+    # Never hedge sooner than this, however fast a node usually is
+    min_delay_seconds: float = 0.5
+    # Duplicates allowed per call made, and how many may be saved up for a burst of slow calls
+    budget_ratio: float = 0.05
+    budget_burst: float = 5.0
+
+
+class LatencyTracker:
+    """Recent call latencies per node."""
+
+    def __init__(self, window: int = LATENCY_WINDOW) -> None:
+        self._latencies: dict[str, deque[float]] = {}
+        self._window = window
+        self._lock = threading.Lock()
+
+    def record(self, key: str, seconds: float) -> None:
+        """Add a call's latency."""
+        with self._lock:
+            self._latencies.setdefault(key, deque(maxlen=self._window)).append(seconds)
+
+    def nodes(self) -> list[str]:
+        """Nodes with recorded latencies."""
+        with self._lock:
+            return list(self._latencies)
+
+    def quantile(self, key: str, quantile: float, min_samples: int = 1) -> float | None:
+        """Latency at the given quantile, or None with fewer than min_samples calls."""
+        with self._lock:
+            latencies = sorted(self._latencies.get(key, ()))
+        if not latencies or len(latencies) < min_samples:
+            return None
+        return latencies[min(int(len(latencies) * quantile), len(latencies) - 1)]
+
+
+class HedgeBudget:
+    """Token bucket for duplicate calls, refilled by a fraction of a token per call."""
+
+    def __init__(self, ratio: float, burst: float) -> None:
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = burst
+        self._lock = threading.Lock()
+
+    def add_call(self) -> None:
+        """Count a call, earning part of a duplicate."""
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        """Take a duplicate from the budget, if one is left."""
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class RequestHedger:
+    """Races a duplicate against provider calls that run past their node's usual latency."""
+
+    def __init__(self, policy: HedgingPolicy | None = None) -> None:
+        self.policy = policy or HedgingPolicy()
+        self.latencies = LatencyTracker()
+        self.budget = HedgeBudget(self.policy.budget_ratio, self.policy.budget_burst)
+        self._pool: futures.ThreadPoolExecutor | None = None
+        self._counts = {"calls": 0, "hedged": 0, "hedge_wins": 0, "over_budget": 0}
+        self._lock = threading.Lock()
+
+    def hedge_delay(self, key: str) -> float | None:
+        """How long to wait before duplicating a call from this node, or None to never duplicate it."""
+        latency = self.latencies.quantile(key, self.policy.quantile, self.policy.min_samples)
+        return None if latency is None else max(latency, self.policy.min_delay_seconds)
+
+    async def asend(
+        self, key: str, send: Callable[[], Awaitable[httpx.Response]], *, read_body: bool = False
+    ) -> httpx.Response:
+        """Make an async call, duplicating it if it is slow.
+
+        With read_body, a copy has answered once its streamed body is fully read.
+
+        Returns:
+            The first successful response; the other request is cancelled.
+        """
+        if read_body:
+            send = functools.partial(_read_async, send)
+        delay = self._start_call(key)
+        started_at = time.monotonic()
+        primary = asyncio.ensure_future(send())
+        attempts = {primary: started_at}
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait({primary}, timeout=delay)
+                if not done and self._spend(key):
+                    attempts[asyncio.ensure_future(send())] = time.monotonic()
+            winner = await _first_success(list(attempts))
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
+        response = winner.result()
+        self._finish_call(key, winner is not primary, time.monotonic() - attempts[winner])
+        return response
+
+    def send(self, key: str, send: Callable[[], httpx.Response], *, read_body: bool = False) -> httpx.Response:
+        """Make a synchronous call, duplicating it if it is slow.
+
+        A thread can't be interrupted mid-request, so the slower copy runs to
+        completion in the background and its response is closed. With
+        read_body, a copy has answered once its streamed body is fully read.
+
+        Returns:
+            The first successful response.
+        """
+        if read_body:
+            send = functools.partial(_read, send)
+        delay = self._start_call(key)
+        if delay is None:
+            started_at = time.monotonic()
+            response = send()
+            self._finish_call(key, hedge_won=False, seconds=time.monotonic() - started_at)
+            return response
+
+        pool = self._thread_pool()
+        started_at = time.monotonic()
+        primary = pool.submit(contextvars.copy_context().run, send)
+        attempts = {primary: started_at}
+        done, _ = futures.wait([primary], timeout=delay)
+        if not done and self._spend(key):
+            attempts[pool.submit(contextvars.copy_context().run, send)] = time.monotonic()
+
+        pending = set(attempts)
+        winner = None
+        while pending and winner is None:
+            done, pending = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+            winner = next((attempt for attempt in done if attempt.exception() is None), None)
+        for attempt in attempts:
+            if attempt is not winner:
+                attempt.add_done_callback(_close_response)
+        if winner is None:
+            return primary.result()
+        self._finish_call(key, winner is not primary, time.monotonic() - attempts[winner])
+        return winner.result()
+
+    def stats(self) -> dict[str, Any]:
+        """Counters and per-node hedge delays for /health."""
+        with self._lock:
+            counts = dict(self._counts)
+        counts["hedge_win_rate"] = counts["hedge_wins"] / counts["hedged"] if counts["hedged"] else None
+        counts["hedge_delay_seconds"] = {key: self.hedge_delay(key) for key in self.latencies.nodes()}
+        return counts
+
+    def _start_call(self, key: str) -> float | None:
+        self.budget.add_call()
+        with self._lock:
+            self._counts["calls"] += 1
+        return self.hedge_delay(key)
+
+    def _spend(self, key: str) -> bool:
+        if not self.budget.try_spend():
+            with self._lock:
+                self._counts["over_budget"] += 1
+            return False
+        with self._lock:
+            self._counts["hedged"] += 1
+        msg = f"Hedging a slow provider call from {key}"
+        logger.info(msg)
+        return True
+
+    def _finish_call(self, key: str, hedge_won: bool, seconds: float) -> None:  # noqa: FBT001
+        # Only the answering copy's time is known; the other was cut short
+        self.latencies.record(key, seconds)
+        if hedge_won:
+            with self._lock:
+                self._counts["hedge_wins"] += 1
+
+    def _thread_pool(self) -> futures.ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = futures.ThreadPoolExecutor(max_workers=SYNC_HEDGE_THREADS, thread_name_prefix="hedge")
+            return self._pool
+
+
+async def _first_success(attempts: list[asyncio.Future]) -> asyncio.Future:
+    """Wait for the first attempt that returns a response, or for all of them to fail.
+
+    Returns:
+        The winning attempt; if every attempt failed, the first one, to raise its error.
+    """
+    pending = set(attempts)
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for attempt in done:
+            if attempt.exception() is None:
+                for other in done - {attempt}:
+                    if other.exception() is None:
+                        await other.result().aclose()
+                return attempt
+    return attempts[0]
+
+
+async def _read_async(send: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+    response = await send()
+    try:
+        await response.aread()
+    except BaseException:
+        await response.aclose()
+        raise
+    return response
+
+
+def _read(send: Callable[[], httpx.Response]) -> httpx.Response:
+    response = send()
+    try:
+        response.read()
+    except BaseException:
+        response.close()
+        raise
+    return response
+
+
+def _close_response(attempt: futures.Future) -> None:
+    if not attempt.cancelled() and attempt.exception() is None:
+        attempt.result().close()
+
+
+def install_request_hedging(
+    hedger: RequestHedger, node_types: tuple[str, ...], exclude: tuple[str, ...] = ()
+) -> list[str]:
+    """Hedge provider calls made by the workflow's nodes of the given types, except the nodes named in exclude.
+
+    Returns:
+        The names of the nodes whose calls are hedged.
+    """
+
+    async def attribute_calls(node: BaseNode, process: NodeProcess) -> None:
+        token = _current_node.set(node.name)
+        try:
+            await process()
+        finally:
+            _current_node.reset(token)
+
+    hedged = []
+    for node in workflow_nodes():
+        if node.metadata.get("node_type") in node_types and node.name not in exclude:
+            wrap_node_process(node, attribute_calls)
+            hedged.append(node.name)
+    if not hedged:
+        msg = f"No nodes of type {', '.join(node_types)} found, provider calls won't be hedged"
+        logger.warning(msg)
+        return hedged
+
+    original_send = httpx.Client.send
+    original_async_send = httpx.AsyncClient.send
+
+    def send(self: httpx.Client, request: httpx.Request, **kwargs: Any) -> httpx.Response:
+        key = _hedge_key(request)
+        if key is None:
+            return original_send(self, request, **kwargs)
+        return hedger.send(key, lambda: original_send(self, request, **kwargs), read_body=bool(kwargs.get("stream")))
+
+    async def async_send(self: httpx.AsyncClient, request: httpx.Request, **kwargs: Any) -> httpx.Response:
+        key = _hedge_key(request)
+        if key is None:
+            return await original_async_send(self, request, **kwargs)
+        return await hedger.asend(
+            key, lambda: original_async_send(self, request, **kwargs), read_body=bool(kwargs.get("stream"))
+        )
+
+    httpx.Client.send = send  # type: ignore[method-assign]
+    httpx.AsyncClient.send = async_send  # type: ignore[method-assign]
+    msg = f"Hedging slow provider calls from {len(hedged)} nodes: {', '.join(hedged)}"
+    logger.info(msg)
+    return hedged
+
+
+def _hedge_key(request: httpx.Request) -> str | None:
+    """The node a provider call is hedged for, or None if it shouldn't be hedged."""
+    node_name = _current_node.get()
+    if node_name is None:
+        return None
+    try:
+        body = request.content
+    except httpx.RequestNotRead:
+        # A streamed upload can only be sent once
+        return None
+    return node_name if classify_request(str(request.url), body) is not None else None
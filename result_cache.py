@@ -0,0 +1,199 @@
+"""Workflow result cache shared by every session of the Streamlit app.
+
+Results are keyed by the canonical flow input plus the request options that
+shape the output (audio formats, mixdown). A small in-memory LRU tier serves
+repeat requests instantly, and a disk tier keeps results across app restarts.
+Both tiers expire entries after a TTL, and the disk tier is bounded by size.
+
+Cached results reference audio files served by the workflow servers, so a hit
+is only as durable as those static files.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR_ENV = "RESULT_CACHE_DIR"
+CACHE_TTL_ENV = "RESULT_CACHE_TTL_SECONDS"
+CACHE_MEMORY_ENTRIES_ENV = "RESULT_CACHE_MEMORY_ENTRIES"
+CACHE_DISK_MB_ENV = "RESULT_CACHE_DISK_MB"
+
+DEFAULT_CACHE_DIR = ".cache/results"
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_MEMORY_ENTRIES = 32
+DEFAULT_DISK_BYTES = 256 * 1024 * 1024
+
+
+def result_cache_key(flow_input: dict[str, Any], options: dict[str, Any]) -> str:
+    """Key a result by its flow input and the options that change the output."""
+    material = {"flow_input": flow_input, "options": options}
+    encoded = json.dumps(material, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class ResultCache:
+    """Two-tier (memory LRU over disk) cache of workflow results.
+
+    Entries are stored as JSON text, so every lookup hands back a fresh copy
+    that the caller can mutate without touching the cache. Safe to use from
+    several threads.
+    """
+
+    def __init__(
+        self,
+        directory: Path | None,
+        *,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+        max_disk_bytes: int = DEFAULT_DISK_BYTES,
+    ) -> None:
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if directory is not None:
+            directory.mkdir(parents=True, exist_ok=True)
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """Return a copy of the cached result, or None if missing or expired."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and not self._expired(entry[0]):
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return json.loads(entry[1])
+            self._memory.pop(key, None)
+
+            entry = self._read_disk(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._remember(key, *entry)
+            self.disk_hits += 1
+            return json.loads(entry[1])
+
+    def put(self, key: str, result: dict[str, Any]) -> None:
+        """Store a result in both tiers; results that aren't JSON-serializable are skipped."""
+        try:
+            encoded = json.dumps(result, separators=(",", ":"), ensure_ascii=False)
+        except (TypeError, ValueError):
+            logger.warning("Not caching a workflow result that can't be serialized to JSON")
+            return
+
+        with self._lock:
+            self._remember(key, time.time(), encoded)
+            self._write_disk(key, encoded)
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers and reset the counters."""
+        with self._lock:
+            self._memory.clear()
+            for path in self._disk_files():
+                path.unlink(missing_ok=True)
+            self.memory_hits = self.disk_hits = self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        """Counters and sizes for display."""
+        with self._lock:
+            files = self._disk_files()
+            return {
+                "memory_entries": len(self._memory),
+                "disk_entries": len(files),
+                "disk_bytes": sum(path.stat().st_size for path in files),
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+            }
+
+    def _expired(self, stored_at: float) -> bool:
+        return time.time() - stored_at > self.ttl_seconds
+
+    def _remember(self, key: str, stored_at: float, encoded: str) -> None:
+        self._memory[key] = (stored_at, encoded)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> Path | None:
+        return None if self.directory is None else self.directory / f"{key}.json"
+
+    def _disk_files(self) -> list[Path]:
+        if self.directory is None:
+            return []
+        return list(self.directory.glob("*.json"))
+
+    def _read_disk(self, key: str) -> tuple[float, str] | None:
+        path = self._path(key)
+        if path is None:
+            return None
+        try:
+            stored_at = path.stat().st_mtime
+            if self._expired(stored_at):
+                path.unlink(missing_ok=True)
+                return None
+            return stored_at, path.read_text(encoding="utf-8")
+        except OSError:
+            return None
+
+    def _write_disk(self, key: str, encoded: str) -> None:
+        path = self._path(key)
+        if path is None:
+            return
+        # Write to a temporary name first so a concurrent reader never sees a partial result
+        try:
+            fd, partial = tempfile.mkstemp(prefix=f".{key}.", dir=path.parent)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(encoded)
+            Path(partial).replace(path)
+        except OSError:
+            logger.exception("Failed to write workflow result to the disk cache")
+            return
+        self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        """Delete expired results, then the oldest ones until the directory fits its size limit."""
+        entries = []
+        for path in self._disk_files():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if self._expired(stat.st_mtime):
+                path.unlink(missing_ok=True)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+def load_result_cache() -> ResultCache:
+    """Build the result cache from environment settings.
+
+    Setting RESULT_CACHE_DIR to an empty value keeps the cache in memory only.
+    """
+    directory = os.environ.get(CACHE_DIR_ENV, DEFAULT_CACHE_DIR)
+    return ResultCache(
+        Path(directory) if directory else None,
+        ttl_seconds=float(os.environ.get(CACHE_TTL_ENV, DEFAULT_TTL_SECONDS)),
+        max_memory_entries=int(os.environ.get(CACHE_MEMORY_ENTRIES_ENV, DEFAULT_MEMORY_ENTRIES)),
+        max_disk_bytes=int(float(os.environ.get(CACHE_DISK_MB_ENV, DEFAULT_DISK_BYTES / 1024 / 1024)) * 1024 * 1024),
+    )
@@ -0,0 +1,230 @@
+"""SQLite-backed history of workflow runs.
+
+Every run the app sends to a workflow server is recorded with its complete
+Start Flow parameters, End Flow outputs, artifact references and timing.
+Mission and voice settings are broken out into indexed columns so the history
+can be searched, and any past run restored without running the workflow again.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+HISTORY_DB_ENV = "RUN_HISTORY_DB"
+DEFAULT_HISTORY_DB = ".cache/run_history.sqlite3"
+DEFAULT_SEARCH_LIMIT = 50
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    inputs_hash TEXT NOT NULL,
+    voice_only INTEGER NOT NULL,
+    mission_type TEXT,
+    location TEXT,
+    stability TEXT,
+    speed REAL,
+    voice_preset TEXT,
+    was_successful INTEGER NOT NULL,
+    duration_seconds REAL,
+    start_flow TEXT NOT NULL,
+    outputs TEXT NOT NULL,
+    artifacts TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_created_at ON runs (created_at);
+CREATE INDEX IF NOT EXISTS runs_inputs_hash ON runs (inputs_hash);
+CREATE INDEX IF NOT EXISTS runs_mission ON runs (mission_type, location);
+CREATE INDEX IF NOT EXISTS runs_voice ON runs (voice_preset, stability, speed);
+"""
+
+_SUMMARY_COLUMNS = (
+    "id, created_at, inputs_hash, voice_only, mission_type, location, stability, speed, voice_preset, "
+    "was_successful, duration_seconds"
+)
+
+
+@dataclass
+class RunSummary:
+    """The indexed columns of a recorded run, enough to list and search runs."""
+
+    run_id: int
+    created_at: float
+    inputs_hash: str
+    voice_only: bool
+    mission_type: str | None
+    location: str | None
+    stability: str | None
+    speed: float | None
+    voice_preset: str | None
+    was_successful: bool
+    duration_seconds: float | None
+
+
+@dataclass
+class RunRecord(RunSummary):
+    """A recorded run with everything needed to restore it."""
+
+    start_flow: dict[str, Any]
+    outputs: dict[str, Any]
+    artifacts: dict[str, str]
+
+
+def mission_fields(game_data: str) -> tuple[str | None, str | None]:
+    """Pull the mission type and location out of the game data JSON, if present."""
+    try:
+        data = json.loads(game_data)
+    except (TypeError, json.JSONDecodeError):
+        return None, None
+    if not isinstance(data, dict):
+        return None, None
+    mission_type, location = data.get("mission_type"), data.get("location")
+    return (
+        mission_type if isinstance(mission_type, str) else None,
+        location if isinstance(location, str) else None,
+    )
+
+
+def artifact_references(outputs: dict[str, Any]) -> dict[str, str]:
+    """Map each artifact output to the URL it points at."""
+    references = {}
+    for name, value in outputs.items():
+        if isinstance(value, dict) and str(value.get("type", "")).endswith("Artifact") and value.get("value"):
+            references[name] = str(value["value"])
+    return references
+
+
+class RunHistory:
+    """Run history stored in a local SQLite database.
+
+    Each call opens its own connection, so one instance can be shared across
+    threads and sessions.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+
+    def record(
+        self,
+        start_flow: dict[str, Any],
+        outputs: dict[str, Any],
+        *,
+        inputs_hash: str,
+        duration_seconds: float | None = None,
+    ) -> int:
+        """Store a finished run.
+
+        Returns:
+            The id of the new history entry.
+        """
+        mission_type, location = mission_fields(start_flow.get("game_data", ""))
+        row = {
+            "created_at": time.time(),
+            "inputs_hash": inputs_hash,
+            "voice_only": bool(start_flow.get("run_voice_generation_only")),
+            "mission_type": mission_type,
+            "location": location,
+            "stability": start_flow.get("stability"),
+            "speed": start_flow.get("speed"),
+            "voice_preset": start_flow.get("voice_preset"),
+            "was_successful": bool(outputs.get("was_successful")),
+            "duration_seconds": duration_seconds,
+            "start_flow": json.dumps(start_flow, ensure_ascii=False),
+            "outputs": json.dumps(outputs, ensure_ascii=False, default=str),
+            "artifacts": json.dumps(artifact_references(outputs)),
+        }
+        columns = ", ".join(row)
+        placeholders = ", ".join(f":{name}" for name in row)
+        with closing(self._connect()) as connection, connection:
+            cursor = connection.execute(f"INSERT INTO runs ({columns}) VALUES ({placeholders})", row)  # noqa: S608
+            run_id = cursor.lastrowid
+        msg = f"Recorded run {run_id} in history"
+        logger.info(msg)
+        return run_id or 0
+
+    def search(
+        self,
+        query: str = "",
+        *,
+        voice_preset: str | None = None,
+        successful_only: bool = False,
+        limit: int = DEFAULT_SEARCH_LIMIT,
+    ) -> list[RunSummary]:
+        """Find runs, newest first.
+
+        Args:
+            query: Text matched against the mission type, location and voice preset
+            voice_preset: Only runs with this voice
+            successful_only: Skip runs that failed
+            limit: Maximum number of runs returned
+
+        Returns:
+            Summaries of the matching runs.
+        """
+        clauses = []
+        params: list[Any] = []
+        if query:
+            clauses.append("(mission_type LIKE ? OR location LIKE ? OR voice_preset LIKE ?)")
+            params += [f"%{query}%"] * 3
+        if voice_preset:
+            clauses.append("voice_preset = ?")
+            params.append(voice_preset)
+        if successful_only:
+            clauses.append("was_successful = 1")
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT {_SUMMARY_COLUMNS} FROM runs {where} ORDER BY created_at DESC, id DESC LIMIT ?"  # noqa: S608
+        with closing(self._connect()) as connection:
+            rows = connection.execute(sql, [*params, limit]).fetchall()
+        return [_summary(row) for row in rows]
+
+    def load(self, run_id: int) -> RunRecord | None:
+        """Load a run with its full inputs and outputs, or None if it doesn't exist."""
+        sql = f"SELECT {_SUMMARY_COLUMNS}, start_flow, outputs, artifacts FROM runs WHERE id = ?"  # noqa: S608
+        with closing(self._connect()) as connection:
+            row = connection.execute(sql, (run_id,)).fetchone()
+        if row is None:
+            return None
+        summary = _summary(row)
+        return RunRecord(
+            **vars(summary),
+            start_flow=json.loads(row["start_flow"]),
+            outputs=json.loads(row["outputs"]),
+            artifacts=json.loads(row["artifacts"]),
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=10)
+        connection.row_factory = sqlite3.Row
+        return connection
+
+
+def _summary(row: sqlite3.Row) -> RunSummary:
+    return RunSummary(
+        run_id=row["id"],
+        created_at=row["created_at"],
+        inputs_hash=row["inputs_hash"],
+        voice_only=bool(row["voice_only"]),
+        mission_type=row["mission_type"],
+        location=row["location"],
+        stability=row["stability"],
+        speed=row["speed"],
+        voice_preset=row["voice_preset"],
+        was_successful=bool(row["was_successful"]),
+        duration_seconds=row["duration_seconds"],
+    )
+
+
+def load_run_history() -> RunHistory:
+    """Open the run history database named by RUN_HISTORY_DB."""
+    return RunHistory(Path(os.environ.get(HISTORY_DB_ENV, DEFAULT_HISTORY_DB)))
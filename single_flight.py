@@ -0,0 +1,79 @@
+"""Single-flight coalescing of identical in-flight workflow runs."""
+
+import asyncio
+import hashlib
+import json
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+
+def canonical_input_key(flow_input: dict[str, Any]) -> str:
+    """Hash a flow input so that equivalent inputs produce the same key.
+
+    Keys are sorted and whitespace is dropped, so dict ordering and formatting
+    differences between callers do not defeat coalescing.
+    """
+    canonical = json.dumps(flow_input, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _Call:
+    task: asyncio.Task
+    waiters: int = 0
+
+
+class SingleFlight:
+    """Shares one in-flight call among concurrent callers asking for the same key.
+
+    The first caller for a key starts the call as its own task; callers that arrive
+    while it is running attach to that task and receive the same result or exception.
+    The key is forgotten as soon as the call finishes, so later callers start fresh.
+    A caller that is cancelled leaves the call running for the others; when the
+    last one leaves, the call itself is cancelled.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[str, _Call] = {}
+        self.coalesced_total = 0
+        self.abandoned_total = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> tuple[Any, bool]:
+        """Run `fn` for `key`, or attach to the call already running for it.
+
+        Returns:
+            A tuple of the call's result and whether it was shared with an earlier caller.
+        """
+        call = self._calls.get(key)
+        shared = call is not None
+        if call is None:
+            call = _Call(task=asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _task: self._forget(key, call))
+        else:
+            self.coalesced_total += 1
+
+        call.waiters += 1
+        try:
+            # Shield so one caller going away doesn't cancel the run for everyone else
+            result = await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+                self.abandoned_total += 1
+        return result, shared
+
+    def stats(self) -> dict:
+        """Snapshot of coalescing activity."""
+        return {
+            "in_flight_keys": len(self._calls),
+            "waiters": sum(call.waiters for call in self._calls.values()),
+            "coalesced_total": self.coalesced_total,
+            "abandoned_total": self.abandoned_total,
+        }
+
+    def _forget(self, key: str, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
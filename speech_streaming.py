@@ -0,0 +1,337 @@
+"""Sentence-level text-to-speech fed by the Speechwriter's streamed output.
+
+Without streaming, "Eleven Labs Text to Speech Generation" waits for the
+Speechwriter agent to finish the whole monologue before it starts. In streaming
+mode, the Speechwriter's output deltas are split into sentences as they arrive
+and each finished sentence is sent to TTS right away. When the flow reaches the
+TTS node, the segments are joined into a single voice track instead of
+synthesizing the monologue a second time.
+"""
+
+import asyncio
+import logging
+import re
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from griptape.artifacts.audio_url_artifact import AudioUrlArtifact
+from griptape_nodes.exe_types.node_types import BaseNode
+from griptape_nodes.files.file import File
+from griptape_nodes.node_library.library_registry import LibraryRegistry
+from griptape_nodes.retained_mode.griptape_nodes import GriptapeNodes
+
+from audio_processing import concat_audio
+from node_hooks import NodeProcess, find_node, wrap_node_process
+
+logger = logging.getLogger(__name__)
+
+SPEECHWRITER_NODE = "Speechwriter"
+TTS_NODE = "Eleven Labs Text to Speech Generation"
+START_FLOW_NODE = "Start Flow"
+AGENT_OUTPUT_PARAMETER = "output"
+TTS_TEXT_PARAMETER = "text"
+TTS_AUDIO_PARAMETER = "audio_url"
+VOICE_SETTING_PARAMETERS = ("stability", "speed", "voice_preset")
+AUDIO_FORMAT = "mp3"
+
+# Sentences shorter than this are merged with the next one; very short TTS calls sound clipped
+DEFAULT_MIN_SENTENCE_CHARS = 24
+DEFAULT_MAX_CONCURRENCY = 2
+
+_TERMINATORS = ".!?…"
+_CLOSERS = "\"')]\u201d\u2019"
+_ABBREVIATIONS = {"capt", "cmdr", "col", "dr", "gen", "lt", "maj", "mr", "mrs", "ms", "no", "sgt", "st", "vs"}
+_LAST_WORD = re.compile(r"(\w+)$")
+
+SegmentSynthesizer = Callable[[str], Awaitable[bytes]]
+
+# Timings of the latest streamed run, exposed through the server's health endpoint
+last_run_stats: dict[str, Any] = {}
+
+
+class SentenceSplitter:
+    """Incrementally split streamed text into sentences.
+
+    Bracketed audio tags such as "[sighs]" are never split, and a tag that opens
+    a sentence stays with that sentence.
+    """
+
+    def __init__(self, min_chars: int = DEFAULT_MIN_SENTENCE_CHARS) -> None:
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, text: str) -> list[str]:
+        """Add streamed text and return the sentences it completed."""
+        self._buffer += text
+        return self._drain(final=False)
+
+    def flush(self) -> list[str]:
+        """Return whatever text remains as a final sentence."""
+        return self._drain(final=True)
+
+    def _drain(self, *, final: bool) -> list[str]:
+        buffer = self._buffer
+        sentences = []
+        start = 0
+        depth = 0
+        position = 0
+        while position < len(buffer):
+            char = buffer[position]
+            if char == "[":
+                depth += 1
+            elif char == "]" and depth:
+                depth -= 1
+            elif depth == 0 and (char in _TERMINATORS or char == "\n"):
+                end = position + 1
+                while end < len(buffer) and buffer[end] in _TERMINATORS + _CLOSERS:
+                    end += 1
+                if end == len(buffer) and not final:
+                    # Can't tell yet whether the sentence really ends here
+                    break
+                at_boundary = end == len(buffer) or buffer[end].isspace()
+                sentence = buffer[start:end].strip()
+                if (
+                    at_boundary
+                    and len(sentence) >= self.min_chars
+                    and not (char == "." and self._ends_with_abbreviation(buffer[start:position]))
+                ):
+                    sentences.append(sentence)
+                    start = end
+                position = end
+                continue
+            position += 1
+
+        if final:
+            remainder = buffer[start:].strip()
+            if remainder:
+                sentences.append(remainder)
+            start = len(buffer)
+        self._buffer = buffer[start:]
+        return sentences
+
+    @staticmethod
+    def _ends_with_abbreviation(text: str) -> bool:
+        match = _LAST_WORD.search(text)
+        if match is None:
+            return False
+        word = match.group(1)
+        return word.lower() in _ABBREVIATIONS or (len(word) == 1 and word.isupper())
+
+
+class SpeechStream:
+    """Sentence-level TTS for one Speechwriter run.
+
+    feed() may be called from the worker thread the agent streams on; sentences
+    are handed to the event loop the stream was created on.
+    """
+
+    def __init__(
+        self,
+        synthesize: SegmentSynthesizer,
+        *,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        min_sentence_chars: int = DEFAULT_MIN_SENTENCE_CHARS,
+    ) -> None:
+        self._synthesize = synthesize
+        self._splitter = SentenceSplitter(min_sentence_chars)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._loop = asyncio.get_running_loop()
+        self._text_parts: list[str] = []
+        self._segments: list[asyncio.Task[bytes]] = []
+        self.started_at = time.monotonic()
+        self.first_segment_seconds: float | None = None
+
+    @property
+    def text(self) -> str:
+        """The text streamed so far."""
+        return "".join(self._text_parts)
+
+    @property
+    def segment_count(self) -> int:
+        """Number of sentences sent to TTS."""
+        return len(self._segments)
+
+    def feed(self, delta: str) -> None:
+        """Accept a streamed delta from any thread."""
+        self._loop.call_soon_threadsafe(self._feed, delta)
+
+    async def finish(self) -> None:
+        """Send the trailing sentence once every pending delta has been processed."""
+        # Callbacks run in order, so this resolves after all deltas queued by feed()
+        drained = self._loop.create_future()
+        self._loop.call_soon(drained.set_result, None)
+        await drained
+        for sentence in self._splitter.flush():
+            self._start_segment(sentence)
+
+    async def collect(self) -> list[bytes]:
+        """Wait for every segment and return the audio in sentence order."""
+        return list(await asyncio.gather(*self._segments))
+
+    def cancel(self) -> None:
+        """Abandon any segments still being synthesized."""
+        for segment in self._segments:
+            segment.cancel()
+
+    def _feed(self, delta: str) -> None:
+        self._text_parts.append(delta)
+        for sentence in self._splitter.feed(delta):
+            self._start_segment(sentence)
+
+    def _start_segment(self, sentence: str) -> None:
+        index = len(self._segments)
+        self._segments.append(asyncio.create_task(self._synthesize_segment(index, sentence)))
+
+    async def _synthesize_segment(self, index: int, sentence: str) -> bytes:
+        async with self._semaphore:
+            audio = await self._synthesize(sentence)
+        if index == 0:
+            self.first_segment_seconds = time.monotonic() - self.started_at
+            logger.info("First voice segment ready %.1fs after the Speechwriter started", self.first_segment_seconds)
+        return audio
+
+
+def voice_settings(tts_node: BaseNode) -> dict[str, Any]:
+    """Collect the TTS node's settings, taking the voice settings from the current run's input."""
+    settings = dict(tts_node.parameter_values)
+    settings.pop(TTS_TEXT_PARAMETER, None)
+
+    # The TTS node only receives these from Start Flow once it runs itself
+    start_flow = find_node(START_FLOW_NODE)
+    if start_flow is not None:
+        for name in VOICE_SETTING_PARAMETERS:
+            value = start_flow.get_parameter_value(name)
+            if value is None:
+                value = start_flow.parameter_output_values.get(name)
+            if value is not None:
+                settings[name] = value
+    return settings
+
+
+async def synthesize_with_node(tts_node: BaseNode, settings: dict[str, Any], text: str) -> bytes:
+    """Synthesize `text` on a throwaway copy of the TTS node and return the encoded audio."""
+    with LibraryRegistry.constructing_node(throwaway=True):
+        clone = type(tts_node)(
+            name=f"{tts_node.name} (segment)",
+            metadata={
+                "library": tts_node.metadata.get("library"),
+                "node_type": tts_node.metadata.get("node_type"),
+            },
+        )
+    for name, value in {**settings, TTS_TEXT_PARAMETER: text}.items():
+        if clone.get_parameter_by_name(name) is not None:
+            clone.set_parameter_value(name, value, initial_setup=True)
+
+    await clone.aprocess()
+
+    artifact = clone.parameter_output_values.get(TTS_AUDIO_PARAMETER)
+    if artifact is None:
+        msg = f"{tts_node.name} produced no audio for segment: {text[:40]!r}"
+        raise RuntimeError(msg)
+    return await File(artifact.value).aread_bytes()
+
+
+async def save_voice_audio(audio: bytes) -> AudioUrlArtifact:
+    """Store joined voice audio as a static file, named like the TTS node's own output.
+
+    The name ends in a random suffix, since runs on other workers can finish in the same second.
+    """
+    file_name = f"eleven_tts_{int(time.time())}_{uuid.uuid4().hex[:12]}.{AUDIO_FORMAT}"
+    url = await asyncio.to_thread(GriptapeNodes.StaticFilesManager().save_static_file, audio, file_name)
+    return AudioUrlArtifact(value=url, name=file_name)
+
+
+class _StreamingTTS:
+    """Hooks connecting the Speechwriter's stream to the TTS node."""
+
+    def __init__(self, tts_node: BaseNode, max_concurrency: int, min_sentence_chars: int) -> None:
+        self.tts_node = tts_node
+        self.max_concurrency = max_concurrency
+        self.min_sentence_chars = min_sentence_chars
+        # The graph runs one flow at a time, so one pending stream is enough
+        self.pending: SpeechStream | None = None
+
+    async def stream_speechwriter(self, node: BaseNode, process: NodeProcess) -> None:
+        settings = voice_settings(self.tts_node)
+        stream = SpeechStream(
+            lambda text: synthesize_with_node(self.tts_node, settings, text),
+            max_concurrency=self.max_concurrency,
+            min_sentence_chars=self.min_sentence_chars,
+        )
+        append_value = node.append_value_to_parameter
+
+        def append_and_stream(parameter_name: str, value: Any) -> None:
+            append_value(parameter_name, value)
+            if parameter_name == AGENT_OUTPUT_PARAMETER and isinstance(value, str):
+                stream.feed(value)
+
+        node.append_value_to_parameter = append_and_stream  # type: ignore[method-assign]
+        try:
+            await process()
+        except BaseException:
+            stream.cancel()
+            raise
+        finally:
+            node.append_value_to_parameter = append_value  # type: ignore[method-assign]
+
+        await stream.finish()
+        output = node.parameter_output_values.get(AGENT_OUTPUT_PARAMETER)
+        if stream.segment_count == 0 and isinstance(output, str):
+            # The agent didn't stream; start from the finished text instead
+            stream.feed(output)
+            await stream.finish()
+        self.pending = stream
+
+    async def join_segments(self, node: BaseNode, process: NodeProcess) -> None:
+        stream, self.pending = self.pending, None
+        text = node.get_parameter_value(TTS_TEXT_PARAMETER)
+        if stream is None or not isinstance(text, str) or stream.text.strip() != text.strip():
+            # Voice-only reruns, or text changed after streaming: synthesize as usual
+            if stream is not None:
+                stream.cancel()
+            await process()
+            return
+
+        try:
+            segments = await stream.collect()
+            audio = await asyncio.to_thread(concat_audio, segments, AUDIO_FORMAT)
+        except Exception:
+            logger.exception("Streamed TTS failed, synthesizing the full monologue instead")
+            stream.cancel()
+            await process()
+            return
+
+        node.parameter_output_values[TTS_AUDIO_PARAMETER] = await save_voice_audio(audio)
+        last_run_stats.update(
+            {
+                "segments": len(segments),
+                "first_segment_seconds": stream.first_segment_seconds,
+                "voice_ready_seconds": time.monotonic() - stream.started_at,
+            }
+        )
+        logger.info("Joined %d streamed voice segments", len(segments))
+
+
+def install_streaming_tts(
+    *,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    min_sentence_chars: int = DEFAULT_MIN_SENTENCE_CHARS,
+) -> bool:
+    """Stream the Speechwriter's output into sentence-level TTS.
+
+    Returns:
+        True if both nodes were found and the hooks were installed.
+    """
+    speechwriter = find_node(SPEECHWRITER_NODE)
+    tts_node = find_node(TTS_NODE)
+    if speechwriter is None or tts_node is None:
+        logger.warning("Streaming TTS needs both '%s' and '%s' nodes, leaving it off", SPEECHWRITER_NODE, TTS_NODE)
+        return False
+
+    hooks = _StreamingTTS(tts_node, max_concurrency, min_sentence_chars)
+    wrap_node_process(speechwriter, hooks.stream_speechwriter)
+    wrap_node_process(tts_node, hooks.join_segments)
+    logger.info("Streaming TTS enabled for %s -> %s", SPEECHWRITER_NODE, TTS_NODE)
+    return True
@@ -0,0 +1,187 @@
+"""Tests for workflow server admission control."""
+
+import asyncio
+
+import pytest
+
+import admission_control
+from admission_control import AdmissionController, AdmissionLimits, AdmissionRejectedError, Priority, _Waiter
+
+
+@pytest.mark.asyncio
+async def test_admit_runs_immediately_under_limit() -> None:
+    """Test that a run is admitted straight away when a slot is free."""
+    controller = AdmissionController(AdmissionLimits(max_in_flight=1, max_queue_depth=1))
+
+    async with controller.admit():
+        assert controller.in_flight == 1
+        assert controller.queue_depth == 0
+
+    assert controller.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_admit_queues_then_rejects_overflow() -> None:
+    """Test that runs queue up to the depth limit and overflow is rejected with an estimate."""
+    controller = AdmissionController(AdmissionLimits(max_in_flight=1, max_queue_depth=1))
+    release = asyncio.Event()
+
+    async def hold_slot() -> None:
+        async with controller.admit():
+            await release.wait()
+
+    first = asyncio.create_task(hold_slot())
+    second = asyncio.create_task(hold_slot())
+    await asyncio.sleep(0)
+
+    assert controller.in_flight == 1
+    assert controller.queue_depth == 1
+
+    with pytest.raises(AdmissionRejectedError) as exc_info:
+        async with controller.admit():
+            pass
+    assert exc_info.value.retry_after >= 1.0
+
+    release.set()
+    await asyncio.gather(first, second)
+
+    assert controller.in_flight == 0
+    assert controller.queue_depth == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_queue() -> None:
+    """Test that a caller who gives up while queued frees its queue position."""
+    controller = AdmissionController(AdmissionLimits(max_in_flight=1, max_queue_depth=1))
+    release = asyncio.Event()
+
+    async def hold_slot() -> None:
+        async with controller.admit():
+            await release.wait()
+
+    holder = asyncio.create_task(hold_slot())
+    waiter = asyncio.create_task(hold_slot())
+    await asyncio.sleep(0)
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    assert controller.queue_depth == 0
+
+    release.set()
+    await holder
+    assert controller.in_flight == 0
+
+
+def test_retry_after_scales_with_backlog() -> None:
+    """Test that the retry estimate grows with the work ahead of the caller."""
+    controller = AdmissionController(AdmissionLimits(max_in_flight=2, max_queue_depth=4))
+    controller._durations.extend([10.0, 20.0])  # noqa: SLF001
+    controller.in_flight = 2
+
+    assert controller.retry_after() == pytest.approx(15.0)
+
+
+@pytest.mark.asyncio
+async def test_high_priority_runs_before_queued_normal() -> None:
+    """Test that a high-priority run overtakes normal runs already waiting."""
+    controller = AdmissionController(AdmissionLimits(max_in_flight=1, max_queue_depth=4))
+    release = asyncio.Event()
+    order: list[str] = []
+
+    async def run(name: str, priority: Priority) -> None:
+        async with controller.admit(priority):
+            order.append(name)
+            await release.wait()
+
+    holder = asyncio.create_task(run("holder", Priority.NORMAL))
+    await asyncio.sleep(0)
+    normal = asyncio.create_task(run("normal", Priority.NORMAL))
+    await asyncio.sleep(0)
+    high = asyncio.create_task(run("high", Priority.HIGH))
+    await asyncio.sleep(0)
+
+    release.set()
+    await asyncio.gather(holder, normal, high)
+
+    assert order == ["holder", "high", "normal"]
+
+
+@pytest.mark.asyncio
+async def test_lanes_are_bounded_separately() -> None:
+    """Test that a full low-priority lane doesn't cause high-priority runs to be rejected."""
+    controller = AdmissionController(AdmissionLimits(max_in_flight=1, max_queue_depth=1))
+    release = asyncio.Event()
+
+    async def hold_slot(priority: Priority) -> None:
+        async with controller.admit(priority):
+            await release.wait()
+
+    holder = asyncio.create_task(hold_slot(Priority.LOW))
+    low = asyncio.create_task(hold_slot(Priority.LOW))
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmissionRejectedError):
+        async with controller.admit(Priority.LOW):
+            pass
+
+    high = asyncio.create_task(hold_slot(Priority.HIGH))
+    await asyncio.sleep(0)
+    assert controller.lane_depth(Priority.HIGH) == 1
+
+    release.set()
+    await asyncio.gather(holder, low, high)
+
+
+def test_aging_promotes_long_waiting_runs_one_lane() -> None:
+    """Test that a low-priority run gains rank once it has waited, but rises at most one lane."""
+    loop = asyncio.new_event_loop()
+    waiter = _Waiter(priority=Priority.LOW, sequence=0, future=loop.create_future(), enqueued_at=0.0)
+
+    fresh_rank = waiter.effective_rank(now=10.0, aging_seconds=30.0)
+    aged_rank = waiter.effective_rank(now=35.0, aging_seconds=30.0)
+
+    assert aged_rank == fresh_rank - 1
+    assert waiter.effective_rank(now=600.0, aging_seconds=30.0) == aged_rank
+    loop.close()
+
+
+@pytest.mark.asyncio
+async def test_high_priority_run_overtakes_aged_normal_run(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a voice-only rerun arriving after a full run has aged still runs first."""
+    now = [0.0]
+    monkeypatch.setattr(admission_control.time, "monotonic", lambda: now[0])
+    controller = AdmissionController(AdmissionLimits(max_in_flight=1, max_queue_depth=4, aging_seconds=30.0))
+    release = asyncio.Event()
+    order: list[str] = []
+
+    async def run(name: str, priority: Priority) -> None:
+        async with controller.admit(priority):
+            order.append(name)
+            await release.wait()
+
+    holder = asyncio.create_task(run("holder", Priority.NORMAL))
+    await asyncio.sleep(0)
+    full = asyncio.create_task(run("full", Priority.NORMAL))
+    await asyncio.sleep(0)
+    now[0] = 300.0
+    voice = asyncio.create_task(run("voice", Priority.HIGH))
+    await asyncio.sleep(0)
+
+    release.set()
+    await asyncio.gather(holder, full, voice)
+
+    assert order == ["holder", "voice", "full"]
+
+
+def test_p95_run_seconds_tracks_slow_tail() -> None:
+    """Test that the p95 run time reflects the slowest recent runs."""
+    controller = AdmissionController(AdmissionLimits())
+    assert controller.p95_run_seconds() is None
+
+    controller._durations.extend([1.0] * 19 + [30.0])  # noqa: SLF001
+
+    assert controller.p95_run_seconds() == pytest.approx(1.0)
+    controller._durations.append(40.0)  # noqa: SLF001
+    assert controller.p95_run_seconds() == pytest.approx(30.0)
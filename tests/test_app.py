@@ -4,7 +4,32 @@ from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from app import execute_workflow_async
+from app import WORKFLOW_MODULE, execute_workflow_async, restore_run, set_input, start_voice_rerun
+from result_cache import ResultCache
+from run_history import RunRecord
+from workflow_server_manager import WorkflowConfig, WorkflowServerManager
+
+WORKFLOW_INPUTS = {
+    "world_rules": "Test world",
+    "character_definition": "Test character",
+    "data_expert_1": "Expert 1",
+    "data_expert_2": "Expert 2",
+    "data_expert_3": "Expert 3",
+    "summarizer": "Summarizer",
+    "speechwriter_rules": "Speech rules",
+    "music_coach_rules": "Music rules",
+    "game_data": '{"test": "data"}',
+    "stability": "0.5",
+    "speed": 1.0,
+    "voice_preset": "Default",
+}
+
+
+class SessionState(dict):
+    """A stand-in for st.session_state, which supports both item and attribute access."""
+
+    __getattr__ = dict.__getitem__
+    __setattr__ = dict.__setitem__
 
 
 @pytest.mark.asyncio
@@ -147,3 +172,184 @@ async def test_execute_workflow_async_with_workflow_error() -> None:
 
     assert result["was_successful"] is False
     assert result["result_details"] == "Agent processing error"
+
+
+@pytest.mark.asyncio
+async def test_execute_workflow_async_posts_to_hosted_module_path(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a run for a module hosted in another workflow's server goes to that module's run path."""
+    host = WorkflowConfig(name="Briefing", module="briefing_workflow", port=9000, hosted_modules=[WORKFLOW_MODULE])
+    manager = WorkflowServerManager([host])
+    monkeypatch.setattr(manager, "_launch", lambda _config, _port: object())
+    call = AsyncMock(return_value={"End Flow": {"was_successful": True}})
+
+    with (
+        patch("app.get_server_manager", return_value=manager),
+        patch("app.get_run_history", return_value=MagicMock()),
+        patch("app.call_workflow_server_with_retry", call),
+    ):
+        result = await execute_workflow_async(
+            world_rules="Test world",
+            character_definition="Test character",
+            data_expert_1="Expert 1",
+            data_expert_2="Expert 2",
+            data_expert_3="Expert 3",
+            summarizer="Summarizer",
+            speechwriter_rules="Speech rules",
+            music_coach_rules="Music rules",
+            game_data='{"test": "data"}',
+            stability="0.5",
+            speed=1.0,
+            voice_preset="Default",
+            run_voice_generation_only=False,
+            use_cache=False,
+        )
+
+    assert result["was_successful"] is True
+    assert call.await_args.args[0].port == host.port
+    assert call.await_args.kwargs["path"] == f"/workflows/{WORKFLOW_MODULE}/run"
+
+
+@pytest.mark.asyncio
+async def test_fresh_run_bypasses_cached_result_and_replaces_it() -> None:
+    """Test that an explicit re-run generates a new result instead of returning the cached one."""
+    cache = MagicMock()
+    cache.get.return_value = {"was_successful": True, "speechwriter_output": "cached take"}
+    manager = MagicMock()
+    manager.get_port.return_value = 9000
+    manager.run_path.return_value = "/run"
+    output = {"End Flow": {"was_successful": True, "speechwriter_output": "new take"}}
+
+    with (
+        patch("app.get_result_cache", return_value=cache),
+        patch("app.get_server_manager", return_value=manager),
+        patch("app.get_run_history", return_value=MagicMock()),
+        patch("app.call_workflow_server_with_retry", AsyncMock(return_value=output)),
+    ):
+        result = await execute_workflow_async(
+            world_rules="Test world",
+            character_definition="Test character",
+            data_expert_1="Expert 1",
+            data_expert_2="Expert 2",
+            data_expert_3="Expert 3",
+            summarizer="Summarizer",
+            speechwriter_rules="Speech rules",
+            music_coach_rules="Music rules",
+            game_data='{"test": "data"}',
+            stability="0.5",
+            speed=1.0,
+            voice_preset="Default",
+            run_voice_generation_only=False,
+            fresh_run=True,
+        )
+
+    assert result["speechwriter_output"] == "new take"
+    cache.get.assert_not_called()
+    assert cache.put.call_args.args[1] is result
+
+
+@pytest.mark.asyncio
+async def test_voice_only_rerun_goes_to_the_worker_of_the_sessions_full_run(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that with two workers, a session's voice-only rerun reaches the worker that wrote its monologue."""
+    config = WorkflowConfig(name="Test", module=WORKFLOW_MODULE, port=9000, max_workers=2)
+    manager = WorkflowServerManager([config])
+    monkeypatch.setattr(manager, "_launch", lambda _config, _port: object())
+    manager.get_port(WORKFLOW_MODULE)
+    manager.scaled_workers[WORKFLOW_MODULE] = {9001: object()}  # type: ignore[dict-item]
+    call = AsyncMock(return_value={"End Flow": {"was_successful": True}})
+
+    async def run(session: str, *, voice_only: bool) -> int:
+        await execute_workflow_async(
+            **WORKFLOW_INPUTS, run_voice_generation_only=voice_only, use_cache=False, input_session=session
+        )
+        return call.await_args.args[0].port
+
+    with (
+        patch("app.get_server_manager", return_value=manager),
+        patch("app.get_run_history", return_value=MagicMock()),
+        patch("app.call_workflow_server_with_retry", call),
+    ):
+        full_run_port = await run("session-1", voice_only=False)
+        other_session_port = await run("session-2", voice_only=False)
+        voice_only_port = await run("session-1", voice_only=True)
+
+    assert other_session_port != full_run_port
+    assert voice_only_port == full_run_port
+
+
+@pytest.mark.asyncio
+async def test_voice_only_results_are_cached_by_the_monologue_they_voice() -> None:
+    """Test that a voice-only run sends the monologue on screen and is only reused for that same monologue."""
+    manager = MagicMock()
+    manager.get_port.return_value = 9000
+    manager.run_path.return_value = "/run"
+    call = AsyncMock(return_value={"End Flow": {"was_successful": True}})
+
+    async def voice_only(voice_text: str | None) -> None:
+        await execute_workflow_async(**WORKFLOW_INPUTS, run_voice_generation_only=True, voice_text=voice_text)
+
+    with (
+        patch("app.get_result_cache", return_value=ResultCache(None)),
+        patch("app.get_server_manager", return_value=manager),
+        patch("app.get_run_history", return_value=MagicMock()),
+        patch("app.call_workflow_server_with_retry", call),
+    ):
+        await voice_only("First take.")
+        await voice_only("Second take.")
+        assert call.await_count == 2  # noqa: PLR2004
+        assert call.await_args.kwargs["voice_text"] == "Second take."
+
+        await voice_only("First take.")
+        assert call.await_count == 2  # noqa: PLR2004
+
+        # Without the monologue, the server voices its own last output, which may be another take's
+        await voice_only(None)
+        await voice_only(None)
+        assert call.await_count == 4  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_voice_rerun_after_restore_voices_the_restored_monologue() -> None:
+    """Test that re-voicing a run restored from the history sends its monologue, not the server's last one."""
+    session = SessionState(active_job=None, workflow_outputs={"speechwriter_output": "Server's last take."})
+    record = RunRecord(
+        run_id=7,
+        created_at=0.0,
+        inputs_hash="",
+        voice_only=False,
+        mission_type=None,
+        location=None,
+        stability="Natural",
+        speed=1.0,
+        voice_preset="James",
+        was_successful=True,
+        duration_seconds=None,
+        start_flow={**WORKFLOW_INPUTS, "stability": "Natural", "voice_preset": "James"},
+        outputs={"was_successful": True, "speechwriter_output": "Restored take."},
+        artifacts={},
+    )
+    history = MagicMock()
+    history.load.return_value = record
+    executor = MagicMock()
+    manager = MagicMock()
+    manager.get_port.return_value = 9000
+    manager.run_path.return_value = "/run"
+    call = AsyncMock(return_value={"End Flow": {"was_successful": True}})
+
+    with (
+        patch("streamlit.session_state", session),
+        patch("streamlit.rerun"),
+        patch("app.get_run_history", return_value=history),
+        patch("app.get_job_executor", return_value=executor),
+        patch("app.preferred_audio_formats", return_value=["opus"]),
+        patch("app.get_result_cache", return_value=ResultCache(None)),
+        patch("app.get_server_manager", return_value=manager),
+        patch("app.call_workflow_server_with_retry", call),
+    ):
+        restore_run(record.run_id)
+        set_input("voice_preset", "Rachel")
+        start_voice_rerun()
+        await executor.submit.call_args.args[0]
+
+    assert call.await_args.kwargs["voice_text"] == "Restored take."
+    assert call.await_args.args[1]["Start Flow"]["voice_preset"] == "Rachel"
+    assert call.await_args.args[1]["Start Flow"]["run_voice_generation_only"] is True
@@ -0,0 +1,112 @@
+"""Tests for audio post-processing helpers."""
+
+import os
+import subprocess
+from pathlib import Path
+
+import pytest
+
+import audio_processing
+from audio_processing import (
+    AUDIO_ENCODINGS,
+    MixSettings,
+    concat_audio,
+    file_digest,
+    mix_cache_key,
+    negotiate_encoding,
+    render_mix,
+    transcode_file,
+)
+
+
+@pytest.fixture
+def no_ffmpeg(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Simulate a machine without ffmpeg."""
+    monkeypatch.setattr(audio_processing, "find_ffmpeg", lambda: None)
+
+
+@pytest.fixture
+def fake_ffmpeg(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Pretend ffmpeg is installed without ever running it."""
+    monkeypatch.setattr(audio_processing, "find_ffmpeg", lambda: "/usr/bin/ffmpeg")
+
+
+@pytest.mark.usefixtures("fake_ffmpeg")
+def test_negotiate_picks_first_supported_preference() -> None:
+    """Test that the client's first producible encoding wins and "original" stops the search."""
+    assert negotiate_encoding(["flac", "opus", "aac"]) == AUDIO_ENCODINGS["opus"]
+    assert negotiate_encoding(["original", "opus"]) is None
+    assert negotiate_encoding([]) is None
+
+
+@pytest.mark.usefixtures("no_ffmpeg")
+def test_negotiate_keeps_original_without_ffmpeg() -> None:
+    """Test that clients get the original audio when the server can't transcode."""
+    assert negotiate_encoding(["opus", "aac"]) is None
+
+
+@pytest.mark.usefixtures("no_ffmpeg")
+def test_transcode_reuses_cached_variant(tmp_path: Path) -> None:
+    """Test that a variant already stored next to the original is returned without transcoding."""
+    source = tmp_path / "eleven_tts_1.mp3"
+    source.write_bytes(b"mp3")
+    cached = tmp_path / "eleven_tts_1.64k.ogg"
+    cached.write_bytes(b"ogg")
+    os.utime(cached, (source.stat().st_mtime + 1, source.stat().st_mtime + 1))
+
+    assert transcode_file(source, AUDIO_ENCODINGS["opus"], 64) == cached
+
+    with pytest.raises(RuntimeError, match="ffmpeg is required"):
+        transcode_file(source, AUDIO_ENCODINGS["aac"])
+
+
+@pytest.mark.usefixtures("fake_ffmpeg")
+@pytest.mark.parametrize(
+    "error", [subprocess.TimeoutExpired("ffmpeg", 120), FileNotFoundError("No such file or directory: ffmpeg")]
+)
+def test_hung_or_missing_ffmpeg_fails_like_ffmpeg_errors(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, error: Exception
+) -> None:
+    """Test that a timeout or an ffmpeg that can't start raises RuntimeError, which callers fall back on."""
+
+    def run(*_args: object, **_kwargs: object) -> None:
+        raise error
+
+    monkeypatch.setattr(audio_processing.subprocess, "run", run)
+    source = tmp_path / "eleven_tts_1.mp3"
+    source.write_bytes(b"mp3")
+
+    with pytest.raises(RuntimeError, match="Unable to transcode"):
+        transcode_file(source, AUDIO_ENCODINGS["opus"])
+    assert [path.name for path in tmp_path.iterdir()] == [source.name]
+    with pytest.raises(RuntimeError, match="Unable to join"):
+        concat_audio([b"one", b"two"])
+
+
+@pytest.mark.usefixtures("no_ffmpeg")
+def test_concat_joins_mp3_frames_without_ffmpeg() -> None:
+    """Test that MP3 segments are still joined when ffmpeg is unavailable."""
+    assert concat_audio([b"one", b"two"]) == b"onetwo"
+
+    with pytest.raises(RuntimeError, match="requires ffmpeg"):
+        concat_audio([b"one", b"two"], audio_format="ogg")
+
+
+@pytest.mark.usefixtures("no_ffmpeg")
+def test_mix_is_cached_by_inputs_and_settings(tmp_path: Path) -> None:
+    """Test that a render for the same voice, music and settings is reused, and new settings need a new one."""
+    voice = tmp_path / "voice.mp3"
+    voice.write_bytes(b"voice")
+    music = tmp_path / "music.mp3"
+    music.write_bytes(b"music")
+    settings = MixSettings()
+    key = mix_cache_key(file_digest(voice), file_digest(music), settings)
+    cached = tmp_path / f"mix_{key[:16]}.mp3"
+    cached.write_bytes(b"mixed")
+
+    assert render_mix(str(voice), str(music), str(tmp_path), settings) == str(cached)
+
+    louder = MixSettings(music_gain_db=-4.0)
+    assert mix_cache_key(file_digest(voice), file_digest(music), louder) != key
+    with pytest.raises(RuntimeError, match="ffmpeg is required"):
+        render_mix(str(voice), str(music), str(tmp_path), louder)
@@ -0,0 +1,56 @@
+"""Tests for workflow worker autoscaling."""
+
+from autoscaling import Autoscaler, LoadSample, ScalingPolicy
+
+POLICY = ScalingPolicy(
+    min_workers=1,
+    max_workers=3,
+    scale_up_checks=2,
+    scale_down_checks=3,
+    scale_up_cooldown_seconds=60,
+    scale_down_cooldown_seconds=300,
+)
+
+
+def _sample(workers: int, in_flight: int = 0, queued: int = 0, p95: float | None = None) -> LoadSample:
+    return LoadSample(workers=workers, in_flight=in_flight, queue_depth=queued, slots_per_worker=1, p95_run_seconds=p95)
+
+
+def test_scale_up_needs_sustained_queue_and_respects_cooldown() -> None:
+    """Test that one busy check isn't enough, and a second worker waits out the cooldown."""
+    autoscaler = Autoscaler()
+    busy = _sample(workers=1, in_flight=1, queued=3)
+
+    assert autoscaler.decide("wf", POLICY, busy, now=0) is None
+    decision = autoscaler.decide("wf", POLICY, busy, now=15)
+    assert decision is not None
+    assert (decision.current, decision.target) == (1, 2)
+
+    busier = _sample(workers=2, in_flight=2, queued=6)
+    assert autoscaler.decide("wf", POLICY, busier, now=30) is None
+    assert autoscaler.decide("wf", POLICY, busier, now=45) is None
+    decision = autoscaler.decide("wf", POLICY, busier, now=80)
+    assert decision is not None
+    assert decision.target == POLICY.max_workers
+    assert autoscaler.decide("wf", POLICY, _sample(workers=3, in_flight=3, queued=9), now=200) is None
+
+
+def test_scale_down_after_quiet_streak_and_never_below_minimum() -> None:
+    """Test that workers are removed only after sustained low load, down to the minimum."""
+    autoscaler = Autoscaler()
+    quiet = _sample(workers=2)
+    decisions = [autoscaler.decide("wf", POLICY, quiet, now=now) for now in (0, 15, 30)]
+
+    assert decisions[:2] == [None, None]
+    assert decisions[2] is not None
+    assert decisions[2].target == 1
+    assert autoscaler.decide("wf", POLICY, _sample(workers=1), now=1000) is None
+    assert autoscaler.decide("wf", ScalingPolicy(min_workers=2, max_workers=2), _sample(workers=1)) is not None
+
+
+def test_latency_scales_up_only_when_saturated() -> None:
+    """Test that slow runs add a worker only while every slot is busy."""
+    policy = ScalingPolicy(max_workers=2, target_p95_seconds=60, scale_up_checks=1)
+
+    assert Autoscaler().decide("wf", policy, _sample(workers=1, in_flight=0, p95=120)) is None
+    assert Autoscaler().decide("wf", policy, _sample(workers=1, in_flight=1, p95=120)) is not None
@@ -0,0 +1,74 @@
+"""Tests for chunked TTS synthesis."""
+
+import asyncio
+
+import pytest
+
+from chunked_tts import ChunkAudioCache, chunk_cache_key, split_into_chunks, synthesize_chunks
+
+SETTINGS = {"model": "eleven_v3", "voice_preset": "Rachel", "stability": "0.5", "speed": 1.0}
+
+
+def test_split_packs_sentences_within_paragraphs() -> None:
+    """Test that sentences are packed up to the limit and paragraphs always start a new chunk."""
+    text = "[calm] One two three. Four five six. Seven eight.\n\nNew paragraph here."
+
+    chunks = split_into_chunks(text, max_chars=40)
+
+    assert chunks == ["[calm] One two three. Four five six.", "Seven eight.", "New paragraph here."]
+
+
+def test_cache_key_ignores_unrelated_settings() -> None:
+    """Test that only text and voice-shaping settings affect the chunk key."""
+    key = chunk_cache_key("Hello there.", SETTINGS)
+
+    assert key == chunk_cache_key("Hello there.", {**SETTINGS, "result_details": "done"})
+    assert key != chunk_cache_key("Hello there.", {**SETTINGS, "speed": 1.2})
+    assert key != chunk_cache_key("Hello there!", SETTINGS)
+
+
+def test_cache_evicts_least_recently_used() -> None:
+    """Test that the cache stays under its size limit by dropping the oldest chunks."""
+    cache = ChunkAudioCache(max_bytes=10)
+    cache.put("a", b"aaaa")
+    cache.put("b", b"bbbb")
+    assert cache.get("a") == b"aaaa"
+
+    cache.put("c", b"cccc")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"aaaa"
+    assert cache.stats()["bytes"] == len(b"aaaa" + b"cccc")
+
+
+@pytest.mark.asyncio
+async def test_rerun_only_resynthesizes_changed_chunks() -> None:
+    """Test that chunks are synthesized concurrently under the limit and unchanged ones are reused."""
+    cache = ChunkAudioCache()
+    calls: list[str] = []
+    active = 0
+    peak = 0
+
+    async def synthesize(text: str) -> bytes:
+        nonlocal active, peak
+        calls.append(text)
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return text.encode()
+
+    limit = 2
+    first = ["Alpha.", "Bravo.", "Charlie."]
+    segments, cached = await synthesize_chunks(first, SETTINGS, synthesize, cache, max_concurrency=limit)
+    assert segments == [b"Alpha.", b"Bravo.", b"Charlie."]
+    assert cached == 0
+    assert peak == limit
+
+    calls.clear()
+    edited = ["Alpha.", "Bravo, edited.", "Charlie."]
+    segments, cached = await synthesize_chunks(edited, SETTINGS, synthesize, cache)
+
+    assert calls == ["Bravo, edited."]
+    assert cached == len(edited) - 1
+    assert segments == [b"Alpha.", b"Bravo, edited.", b"Charlie."]
@@ -0,0 +1,93 @@
+"""Tests for per-expert game_data projection."""
+
+import json
+
+import pytest
+from griptape.tokenizers import SimpleTokenizer
+
+from context_projection import (
+    TRUNCATION_MARKER,
+    ProjectionSpec,
+    parse_path,
+    project,
+    project_context,
+)
+
+GAME_DATA = {
+    "location": "Kessel Run",
+    "mission_type": "Escort",
+    "performance": {
+        "encounters": [
+            {"enemy": "Interceptor", "outcome": "destroyed", "range": 400},
+            {"enemy": "Bomber", "range": 900},
+        ],
+        "kills": 3,
+    },
+    "mission_results": {"losses": 0, "pilot_status": "healthy"},
+}
+
+
+@pytest.fixture
+def tokenizer() -> SimpleTokenizer:
+    """Tokenizer matching the one used by the projection stage."""
+    return SimpleTokenizer(characters_per_token=4)
+
+
+def test_parse_path_segments() -> None:
+    """Test that dotted keys, indexes, wildcards and quoted keys are recognized."""
+    assert parse_path("$.performance.encounters[0]['enemy name'][*]") == [
+        ("key", "performance"),
+        ("key", "encounters"),
+        ("index", 0),
+        ("key", "enemy name"),
+        ("wildcard", None),
+    ]
+    with pytest.raises(ValueError, match="Unsupported"):
+        parse_path("$.performance..kills")
+
+
+def test_project_merges_paths_and_keeps_list_alignment() -> None:
+    """Test that several paths build one pruned document with list items kept in step."""
+    projected = project(
+        GAME_DATA,
+        ["$.mission_type", "$.performance.encounters[*].enemy", "$.performance.encounters[*].outcome"],
+    )
+
+    assert projected == {
+        "mission_type": "Escort",
+        "performance": {
+            "encounters": [{"enemy": "Interceptor", "outcome": "destroyed"}, {"enemy": "Bomber"}],
+        },
+    }
+
+
+def test_project_context_reads_python_literal_text(tokenizer: SimpleTokenizer) -> None:
+    """Test that the Python-literal text produced by "To Text" is projected and compacted."""
+    text = str(GAME_DATA)
+
+    projected = project_context(text, ProjectionSpec(paths=["$.mission_results.losses"]), tokenizer)
+
+    assert projected == '{"mission_results":{"losses":0}}'
+
+
+def test_project_context_trims_longest_list_to_budget(tokenizer: SimpleTokenizer) -> None:
+    """Test that a token budget shortens lists before falling back to a hard cut."""
+    data = {"location": "Hoth", "events": [f"event number {i}" for i in range(200)]}
+    spec = ProjectionSpec(max_tokens=100)
+
+    projected = project_context(json.dumps(data), spec, tokenizer)
+
+    assert tokenizer.count_tokens(projected) <= spec.max_tokens
+    trimmed = json.loads(projected)
+    assert trimmed["location"] == "Hoth"
+    assert 0 < len(trimmed["events"]) < len(data["events"])
+
+    hard_cut = project_context(json.dumps({"notes": "x" * 2000}), ProjectionSpec(max_tokens=10), tokenizer)
+    assert hard_cut.endswith(TRUNCATION_MARKER)
+
+
+def test_unparseable_context_passes_through(tokenizer: SimpleTokenizer) -> None:
+    """Test that free text is left unchanged rather than dropped."""
+    text = "The squadron flew a night mission."
+
+    assert project_context(text, ProjectionSpec(paths=["$.location"]), tokenizer) == text
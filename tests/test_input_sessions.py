@@ -0,0 +1,39 @@
+"""Tests for server-held input sessions."""
+
+import pytest
+
+from input_sessions import InputSessionClient, InputSessionConflictError, InputSessionStore, inputs_version
+
+INPUTS = {"world_rules": "rules " * 500, "game_data": "{}", "stability": "Natural", "speed": 1.0}
+
+
+def test_voice_tweak_sends_only_changed_fields() -> None:
+    """Test that after a full update, the next run carries just the changed voice settings."""
+    store, client = InputSessionStore(), InputSessionClient()
+
+    first = client.update("tab", INPUTS)
+    version, held = store.apply("tab", first["base_version"], first["fields"])
+    client.confirm("tab", version, INPUTS)
+
+    tweaked = {**INPUTS, "speed": 1.1}
+    delta = client.update("tab", tweaked)
+    version, held = store.apply("tab", delta["base_version"], delta["fields"])
+
+    assert first["base_version"] is None
+    assert delta["fields"] == {"speed": 1.1}
+    assert held == tweaked
+    assert version == inputs_version(tweaked)
+
+
+def test_delta_against_unknown_version_conflicts() -> None:
+    """Test that a server without the session's inputs refuses a delta rather than guessing."""
+    store = InputSessionStore(max_sessions=1)
+    expected_conflicts = 2
+    version, _ = store.apply("a", None, INPUTS)
+    store.apply("b", None, INPUTS)
+
+    with pytest.raises(InputSessionConflictError):
+        store.apply("a", version, {"speed": 1.1})
+    with pytest.raises(InputSessionConflictError):
+        store.apply("b", "stale", {"speed": 1.1})
+    assert store.stats()["conflicts"] == expected_conflicts
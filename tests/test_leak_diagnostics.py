@@ -0,0 +1,45 @@
+"""Tests for leak diagnostics."""
+
+from leak_diagnostics import LeakDiagnostics, reachable_object_count, steadily_growing
+
+
+def test_steadily_growing_needs_growth_on_every_run() -> None:
+    """Test that only strictly increasing values over the full window are flagged."""
+    runs = 3
+    assert steadily_growing([5, 1, 2, 3], runs)
+    assert not steadily_growing([1, 2, 2, 3], runs)
+    assert not steadily_growing([1, 2], runs)
+
+
+def test_reachable_count_follows_containers_but_not_types() -> None:
+    """Test that held objects are counted while shared classes are not followed."""
+    history: list[object] = []
+    small = reachable_object_count([{"history": history}])
+    history.extend([["turn", index] for index in range(10)])
+
+    assert reachable_object_count([{"history": history}]) > small
+    assert reachable_object_count([LeakDiagnostics, {}]) == 1
+
+
+def test_growing_node_state_is_flagged_across_runs() -> None:
+    """Test that a run report names the allocation sites and a node whose state keeps growing."""
+
+    class FakeNode:
+        def __init__(self) -> None:
+            self.name = "Agent"
+            self.parameter_values: dict[str, list[str]] = {"history": []}
+            self.parameter_output_values: dict[str, object] = {}
+
+    node = FakeNode()
+    runs = 3
+    diagnostics = LeakDiagnostics(growth_runs=runs)
+    for run in range(runs):
+        diagnostics.before_run()
+        node.parameter_values["history"].extend(f"message {run}-{index}" * 10 for index in range(1000))
+        report = diagnostics.after_run([node])  # type: ignore[list-item]
+        assert report is not None
+
+    assert report.growth_bytes > 0
+    assert report.top_sites
+    assert "Agent" in diagnostics.suspects()
+    assert diagnostics.summary()["latest"]["node_objects"]["Agent"] > runs * 1000
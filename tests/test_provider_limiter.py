@@ -0,0 +1,166 @@
+"""Tests for the cross-process provider rate limiter."""
+
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from provider_limiter import (
+    ProviderLimit,
+    ProviderLimiter,
+    ProviderLimiterClient,
+    ProviderLimiterServer,
+    classify_request,
+    load_provider_limits,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_classify_request_by_host_and_proxied_model() -> None:
+    """Test that direct provider hosts and Griptape Cloud proxied models are recognized."""
+    body = json.dumps({"model": "gpt-4.1-mini", "messages": []}).encode()
+
+    assert classify_request("https://api.openai.com/v1/chat/completions", body) == ("openai", "gpt-4.1-mini")
+    assert classify_request("https://api.elevenlabs.io/v1/text-to-speech/abc", None) == ("elevenlabs", None)
+    assert classify_request("https://cloud.griptape.ai/api/proxy", body) == ("openai", "gpt-4.1-mini")
+    assert classify_request("https://example.com/anything", body) is None
+
+
+def test_token_bucket_spaces_out_calls_after_burst() -> None:
+    """Test that calls beyond the burst must wait for the bucket to refill."""
+    clock = FakeClock()
+    limiter = ProviderLimiter(
+        [ProviderLimit(provider="openai", requests_per_minute=60.0, burst=2, max_concurrency=10)], clock=clock
+    )
+
+    first, _ = limiter.try_acquire("openai", None)
+    second, _ = limiter.try_acquire("openai", None)
+    third, retry_in = limiter.try_acquire("openai", None)
+
+    assert first is not None
+    assert second is not None
+    assert third is None
+    assert retry_in == pytest.approx(1.0)
+
+    clock.now = 1.0
+    fourth, _ = limiter.try_acquire("openai", None)
+    assert fourth is not None
+
+
+def test_concurrency_limit_frees_on_release() -> None:
+    """Test that the concurrency cap holds until a lease is released."""
+    limiter = ProviderLimiter(
+        [ProviderLimit(provider="elevenlabs", requests_per_minute=600.0, burst=10, max_concurrency=1)],
+        clock=FakeClock(),
+    )
+
+    lease, _ = limiter.try_acquire("elevenlabs", None)
+    blocked, _ = limiter.try_acquire("elevenlabs", None)
+    assert lease is not None
+    assert blocked is None
+
+    limiter.release(lease)
+    granted, _ = limiter.try_acquire("elevenlabs", None)
+    assert granted is not None
+
+
+def test_model_limit_applies_on_top_of_provider_limit() -> None:
+    """Test that a model-specific limit narrows calls for that model only."""
+    limiter = ProviderLimiter(
+        [
+            ProviderLimit(provider="openai", requests_per_minute=600.0, burst=10, max_concurrency=10),
+            ProviderLimit(provider="openai", model="gpt-4.1", requests_per_minute=600.0, burst=10, max_concurrency=1),
+        ],
+        clock=FakeClock(),
+    )
+
+    first, _ = limiter.try_acquire("openai", "gpt-4.1")
+    second, _ = limiter.try_acquire("openai", "gpt-4.1")
+    other_model, _ = limiter.try_acquire("openai", "gpt-4.1-mini")
+
+    assert first is not None
+    assert second is None
+    assert other_model is not None
+
+
+def test_cooldown_pauses_provider() -> None:
+    """Test that a provider-reported 429 pauses further grants."""
+    clock = FakeClock()
+    limiter = ProviderLimiter([ProviderLimit(provider="openai", burst=10)], clock=clock)
+
+    limiter.cooldown("openai", None, 5.0)
+    lease, retry_in = limiter.try_acquire("openai", None)
+
+    assert lease is None
+    assert retry_in == pytest.approx(5.0)
+
+
+def test_limits_file_is_loaded(tmp_path: Path) -> None:
+    """Test that limits are read from the file given."""
+    limits_path = tmp_path / "limits.json"
+    limits_path.write_text(json.dumps([{"provider": "openai", "model": "gpt-4.1-mini", "requests_per_minute": 300}]))
+
+    assert load_provider_limits(str(limits_path)) == [
+        ProviderLimit(provider="openai", model="gpt-4.1-mini", requests_per_minute=300)
+    ]
+
+
+@pytest.mark.parametrize("field", ["requests_per_minute", "burst", "max_concurrency"])
+def test_zero_limit_in_file_is_rejected(tmp_path: Path, field: str) -> None:
+    """Test that a limit of 0, which would never grant a call, is refused at load time."""
+    limits_path = tmp_path / "limits.json"
+    limits_path.write_text(json.dumps([{"provider": "anthropic", field: 0}]))
+
+    with pytest.raises(ValueError, match=f"{field} for anthropic"):
+        load_provider_limits(str(limits_path))
+
+
+def test_client_talks_to_server_over_socket() -> None:
+    """Test that a client in another process can take and return leases through the server."""
+    server = ProviderLimiterServer([ProviderLimit(provider="openai", burst=1, max_concurrency=1)])
+    server.start()
+    try:
+        client = ProviderLimiterClient(server.address)
+        lease = client.acquire("openai", None)
+        assert lease is not None
+        client.release(lease)
+    finally:
+        server.stop()
+
+
+def test_client_fails_open_without_server() -> None:
+    """Test that an unreachable limiter doesn't block provider calls."""
+    client = ProviderLimiterClient("127.0.0.1:1", timeout=0.5)
+
+    assert client.acquire("openai", None) is None
+
+
+@pytest.mark.asyncio
+async def test_cancelled_acquire_leaves_no_lease_behind() -> None:
+    """Test that a call cancelled while waiting for a lease doesn't keep one once the provider frees up."""
+    server = ProviderLimiterServer([ProviderLimit(provider="openai", burst=10, max_concurrency=1)])
+    server.start()
+    try:
+        client = ProviderLimiterClient(server.address)
+        held = client.acquire("openai", None)
+        waiting = asyncio.create_task(client.acquire_async("openai", None))
+        await asyncio.sleep(0.1)
+
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        await asyncio.to_thread(client.release, held)
+        await asyncio.sleep(0.5)
+
+        lease, _ = server.limiter.try_acquire("openai", None)
+        assert lease is not None
+    finally:
+        server.stop()
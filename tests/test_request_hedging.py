@@ -0,0 +1,94 @@
+"""Tests for hedged provider calls."""
+
+import asyncio
+from collections.abc import AsyncIterator
+
+import httpx
+import pytest
+
+from request_hedging import HedgeBudget, HedgingPolicy, RequestHedger
+
+POLICY = HedgingPolicy(min_samples=3, min_delay_seconds=0.01, budget_ratio=0.5, budget_burst=1.0)
+
+
+def _warmed_hedger(policy: HedgingPolicy = POLICY, latency: float = 0.01) -> RequestHedger:
+    hedger = RequestHedger(policy)
+    for _ in range(policy.min_samples):
+        hedger.latencies.record("Agent", latency)
+    return hedger
+
+
+@pytest.mark.asyncio
+async def test_slow_call_is_hedged_and_loser_cancelled() -> None:
+    """Test that a call past the node's p90 is duplicated, the faster copy wins and the slower is cancelled."""
+    hedger = _warmed_hedger()
+    delays = [10.0, 0.0]
+    cancelled: list[float] = []
+
+    async def send() -> httpx.Response:
+        delay = delays.pop(0)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            cancelled.append(delay)
+            raise
+        return httpx.Response(200, json={"delay": delay})
+
+    response = await asyncio.wait_for(hedger.asend("Agent", send), timeout=5)
+    await asyncio.sleep(0)
+
+    assert response.json() == {"delay": 0.0}
+    assert cancelled == [10.0]
+    stats = hedger.stats()
+    assert stats["hedged"] == stats["hedge_wins"] == 1
+    assert stats["hedge_win_rate"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_nodes_without_enough_samples_are_not_hedged() -> None:
+    """Test that calls are sent once until the node has a latency history."""
+    hedger = RequestHedger(POLICY)
+    sends = 0
+
+    async def send() -> httpx.Response:
+        nonlocal sends
+        sends += 1
+        await asyncio.sleep(0.05)
+        return httpx.Response(200)
+
+    await hedger.asend("Agent", send)
+
+    assert sends == 1
+    assert hedger.stats()["hedged"] == 0
+
+
+def test_budget_caps_duplicates_per_call() -> None:
+    """Test that duplicates are limited to the burst plus the share earned by later calls."""
+    budget = HedgeBudget(ratio=0.5, burst=1.0)
+
+    assert budget.try_spend()
+    assert not budget.try_spend()
+    budget.add_call()
+    assert not budget.try_spend()
+    budget.add_call()
+    assert budget.try_spend()
+
+
+@pytest.mark.asyncio
+async def test_streamed_call_is_hedged_on_its_whole_body() -> None:
+    """Test that a streamed call whose headers came back quickly is still hedged while its body is slow."""
+    hedger = _warmed_hedger()
+    body_delays = [10.0, 0.0]
+
+    async def body(delay: float) -> AsyncIterator[bytes]:
+        await asyncio.sleep(delay)
+        yield f"delay={delay}".encode()
+
+    async def send() -> httpx.Response:
+        # Headers arrive at once, as they do for a streamed completion
+        return httpx.Response(200, content=body(body_delays.pop(0)))
+
+    response = await asyncio.wait_for(hedger.asend("Agent", send, read_body=True), timeout=5)
+
+    assert response.content == b"delay=0.0"
+    assert hedger.stats()["hedge_wins"] == 1
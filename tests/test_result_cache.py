@@ -0,0 +1,61 @@
+"""Tests for the cross-session workflow result cache."""
+
+import os
+import time
+from pathlib import Path
+
+from result_cache import ResultCache, result_cache_key
+
+FLOW_INPUT = {"Start Flow": {"game_data": "{}", "speed": 1.0, "run_voice_generation_only": False}}
+RESULT = {"was_successful": True, "voice_audio_artifact": {"type": "AudioUrlArtifact", "value": "voice.ogg"}}
+
+
+def test_key_is_canonical_and_covers_options() -> None:
+    """Test that key order doesn't matter but output-shaping options do."""
+    reordered = {"Start Flow": dict(reversed(list(FLOW_INPUT["Start Flow"].items())))}
+    options = {"audio_formats": ["opus"], "mixdown": None}
+
+    assert result_cache_key(FLOW_INPUT, options) == result_cache_key(reordered, options)
+    assert result_cache_key(FLOW_INPUT, options) != result_cache_key(FLOW_INPUT, {**options, "audio_formats": ["aac"]})
+
+
+def test_results_survive_a_restart_and_are_copies(tmp_path: Path) -> None:
+    """Test that a new cache over the same directory serves results, and callers can't mutate cached entries."""
+    ResultCache(tmp_path).put("key", RESULT)
+
+    restarted = ResultCache(tmp_path)
+    first = restarted.get("key")
+    assert first == RESULT
+    assert first is not None
+    first["voice_audio_artifact"] = None
+
+    assert restarted.get("key") == RESULT
+    stats = restarted.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 0)
+
+
+def test_expired_results_are_misses(tmp_path: Path) -> None:
+    """Test that entries older than the TTL are dropped from disk."""
+    ttl = 60
+    cache = ResultCache(tmp_path, ttl_seconds=ttl)
+    cache.put("key", RESULT)
+    stale = time.time() - ttl - 1
+    os.utime(tmp_path / "key.json", (stale, stale))
+
+    assert ResultCache(tmp_path, ttl_seconds=ttl).get("key") is None
+    assert not (tmp_path / "key.json").exists()
+
+
+def test_disk_tier_evicts_oldest_over_size_limit(tmp_path: Path) -> None:
+    """Test that the oldest results are deleted once the directory exceeds its size limit."""
+    cache = ResultCache(tmp_path, max_memory_entries=1, max_disk_bytes=250)
+    for index in range(3):
+        cache.put(f"key{index}", {**RESULT, "index": index})
+        stored_at = time.time() - 10 + index
+        os.utime(tmp_path / f"key{index}.json", (stored_at, stored_at))
+
+    cache.put("key3", {**RESULT, "index": 3})
+
+    assert sorted(path.stem for path in tmp_path.glob("*.json")) == ["key2", "key3"]
+    assert cache.get("key0") is None
+    assert cache.stats()["memory_entries"] == 1
@@ -0,0 +1,42 @@
+"""Tests for the SQLite run history."""
+
+import json
+from pathlib import Path
+
+from run_history import RunHistory
+
+GAME_DATA = json.dumps({"location": "Deneb system", "mission_type": "Patrol"})
+START_FLOW = {"game_data": GAME_DATA, "stability": "Natural", "speed": 1.0, "voice_preset": "Rachel"}
+OUTPUTS = {
+    "was_successful": True,
+    "voice_audio_artifact": {"type": "AudioUrlArtifact", "value": "http://localhost:8124/voice.mp3"},
+    "speechwriter_output": "Good work out there, pilots.",
+}
+
+
+def test_recorded_run_restores_inputs_and_outputs(tmp_path: Path) -> None:
+    """Test that a run loads back with its parameters, outputs, artifacts and indexed fields."""
+    history = RunHistory(tmp_path / "history.sqlite3")
+    run_id = history.record(START_FLOW, OUTPUTS, inputs_hash="abc", duration_seconds=42.0)
+
+    record = RunHistory(tmp_path / "history.sqlite3").load(run_id)
+
+    assert record is not None
+    assert record.start_flow == START_FLOW
+    assert record.outputs == OUTPUTS
+    assert record.artifacts == {"voice_audio_artifact": "http://localhost:8124/voice.mp3"}
+    assert (record.mission_type, record.location, record.voice_preset) == ("Patrol", "Deneb system", "Rachel")
+    assert history.load(run_id + 1) is None
+
+
+def test_search_filters_newest_first(tmp_path: Path) -> None:
+    """Test that search matches mission and voice, skips failures on request, and lists newest runs first."""
+    history = RunHistory(tmp_path / "history.sqlite3")
+    escort = json.dumps({"location": "Vega", "mission_type": "Escort"})
+    patrol = history.record(START_FLOW, OUTPUTS, inputs_hash="a")
+    failed = history.record(START_FLOW, {"was_successful": False}, inputs_hash="b")
+    escort_run = history.record({**START_FLOW, "game_data": escort, "voice_preset": "Paul"}, OUTPUTS, inputs_hash="c")
+
+    assert [run.run_id for run in history.search()] == [escort_run, failed, patrol]
+    assert [run.run_id for run in history.search("deneb", successful_only=True)] == [patrol]
+    assert [run.run_id for run in history.search(voice_preset="Paul")] == [escort_run]
@@ -0,0 +1,109 @@
+"""Tests for single-flight coalescing of workflow runs."""
+
+import asyncio
+
+import pytest
+
+from single_flight import SingleFlight, canonical_input_key
+
+
+def test_canonical_input_key_ignores_key_order() -> None:
+    """Test that equivalent inputs hash identically regardless of dict ordering."""
+    first = {"Start Flow": {"speed": 1.0, "voice_preset": "James"}}
+    second = {"Start Flow": {"voice_preset": "James", "speed": 1.0}}
+
+    assert canonical_input_key(first) == canonical_input_key(second)
+    assert canonical_input_key(first) != canonical_input_key({"Start Flow": {"speed": 1.1, "voice_preset": "James"}})
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_call() -> None:
+    """Test that callers arriving while a call is in flight share its result."""
+    single_flight = SingleFlight()
+    release = asyncio.Event()
+    calls = 0
+
+    async def run() -> str:
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "result"
+
+    first = asyncio.create_task(single_flight.do("key", run))
+    second = asyncio.create_task(single_flight.do("key", run))
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await first == ("result", False)
+    assert await second == ("result", True)
+    assert calls == 1
+    assert single_flight.stats()["in_flight_keys"] == 0
+
+
+@pytest.mark.asyncio
+async def test_exception_reaches_every_caller() -> None:
+    """Test that a failed call raises for the leader and all attached callers."""
+    single_flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def run() -> str:
+        await release.wait()
+        msg = "boom"
+        raise RuntimeError(msg)
+
+    first = asyncio.create_task(single_flight.do("key", run))
+    second = asyncio.create_task(single_flight.do("key", run))
+    await asyncio.sleep(0)
+    release.set()
+
+    results = await asyncio.gather(first, second, return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_caller_leaving_does_not_cancel_shared_call() -> None:
+    """Test that cancelling one caller leaves the shared call running for the others."""
+    single_flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def run() -> str:
+        await release.wait()
+        return "result"
+
+    leader = asyncio.create_task(single_flight.do("key", run))
+    follower = asyncio.create_task(single_flight.do("key", run))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    release.set()
+
+    assert await follower == ("result", True)
+
+
+@pytest.mark.asyncio
+async def test_last_caller_leaving_cancels_call() -> None:
+    """Test that the shared call is cancelled once every caller has gone."""
+    single_flight = SingleFlight()
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def run() -> str:
+        started.set()
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return "result"
+
+    callers = [asyncio.create_task(single_flight.do("key", run)) for _ in range(2)]
+    await started.wait()
+
+    callers[0].cancel()
+    await asyncio.sleep(0)
+    assert not cancelled.is_set()
+    callers[1].cancel()
+    await asyncio.gather(*callers, return_exceptions=True)
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+    assert single_flight.stats()["abandoned_total"] == 1
@@ -0,0 +1,87 @@
+"""Tests for sentence-level streaming TTS."""
+
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import speech_streaming
+from speech_streaming import SentenceSplitter, SpeechStream, save_voice_audio
+
+
+def test_splitter_waits_for_sentence_end() -> None:
+    """Test that a sentence is only emitted once the text after its terminator arrives."""
+    splitter = SentenceSplitter(min_chars=1)
+
+    assert splitter.feed("Pilot, good work out") == []
+    assert splitter.feed(" there.") == []
+    assert splitter.feed(" Next time") == ["Pilot, good work out there."]
+    assert splitter.flush() == ["Next time"]
+
+
+def test_splitter_keeps_audio_tags_intact() -> None:
+    """Test that bracketed audio tags are never split and stay with their sentence."""
+    splitter = SentenceSplitter(min_chars=1)
+
+    sentences = splitter.feed("[sighs] We lost one. [serious tone] Not. Again! Understood?")
+    sentences += splitter.flush()
+
+    assert sentences == ["[sighs] We lost one.", "[serious tone] Not.", "Again!", "Understood?"]
+
+    splitter = SentenceSplitter(min_chars=1)
+    assert splitter.feed("[pause. then softly] Well done. ") == ["[pause. then softly] Well done."]
+
+
+def test_splitter_merges_short_sentences_and_abbreviations() -> None:
+    """Test that abbreviations don't end a sentence and short fragments join the next one."""
+    splitter = SentenceSplitter(min_chars=12)
+
+    sentences = splitter.feed("Lt. Vance flew well. Yes. She held formation the whole way. ")
+
+    assert sentences == ["Lt. Vance flew well.", "Yes. She held formation the whole way."]
+
+
+@pytest.mark.asyncio
+async def test_stream_synthesizes_sentences_in_order_from_another_thread() -> None:
+    """Test that deltas fed from a worker thread become ordered segments as sentences complete."""
+    synthesized: list[str] = []
+
+    async def synthesize(text: str) -> bytes:
+        synthesized.append(text)
+        await asyncio.sleep(0)
+        return text.encode()
+
+    stream = SpeechStream(synthesize, min_sentence_chars=1)
+
+    def agent_stream() -> None:
+        for delta in ["First line. Sec", "ond line! Last", " line"]:
+            stream.feed(delta)
+
+    worker = threading.Thread(target=agent_stream)
+    worker.start()
+    worker.join()
+    await stream.finish()
+
+    assert await stream.collect() == [b"First line.", b"Second line!", b"Last line"]
+    assert stream.text == "First line. Second line! Last line"
+    assert stream.first_segment_seconds is not None
+
+
+@pytest.mark.asyncio
+async def test_voice_audio_saved_in_the_same_second_gets_distinct_files(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that two runs finishing at once don't overwrite each other's voice audio."""
+    saved: dict[str, bytes] = {}
+
+    def save_static_file(data: bytes, file_name: str) -> str:
+        saved[file_name] = data
+        return f"http://localhost/static/{file_name}"
+
+    static_files = SimpleNamespace(save_static_file=save_static_file)
+    monkeypatch.setattr(speech_streaming, "GriptapeNodes", SimpleNamespace(StaticFilesManager=lambda: static_files))
+    monkeypatch.setattr(speech_streaming.time, "time", lambda: 1_700_000_000.0)
+
+    first, second = await asyncio.gather(save_voice_audio(b"first"), save_voice_audio(b"second"))
+
+    assert first.value != second.value
+    assert sorted(saved.values()) == [b"first", b"second"]
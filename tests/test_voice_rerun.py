@@ -0,0 +1,43 @@
+"""Tests for voice-only reruns that carry their monologue."""
+
+import pytest
+
+import node_hooks
+import voice_rerun
+from voice_rerun import AGENT_OUTPUT_PARAMETER, SPEECHWRITER_NODE, install_voice_text, voicing
+
+
+class Speechwriter:
+    """The parts of the Speechwriter node the hook uses."""
+
+    def __init__(self) -> None:
+        self.name = SPEECHWRITER_NODE
+        self.parameter_output_values: dict[str, str] = {}
+        self.generated = 0
+
+    async def aprocess(self) -> None:
+        self.generated += 1
+        self.parameter_output_values[AGENT_OUTPUT_PARAMETER] = f"take {self.generated}"
+
+
+@pytest.mark.asyncio
+async def test_voiced_run_uses_the_given_monologue_without_generating(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that inside voicing() the Speechwriter outputs the given text, and generates as usual outside it."""
+    node = Speechwriter()
+
+    def find_node(name: str) -> Speechwriter | None:
+        return node if name == SPEECHWRITER_NODE else None
+
+    monkeypatch.setattr(voice_rerun, "find_node", find_node)
+    monkeypatch.setattr(node_hooks, "find_node", find_node)
+    assert install_voice_text([SPEECHWRITER_NODE]) == [SPEECHWRITER_NODE]
+
+    with voicing("Good work out there, pilot."):
+        # Set before the run, for an engine that considers the Speechwriter resolved
+        assert node.parameter_output_values[AGENT_OUTPUT_PARAMETER] == "Good work out there, pilot."
+        await node.aprocess()
+    assert node.parameter_output_values[AGENT_OUTPUT_PARAMETER] == "Good work out there, pilot."
+    assert node.generated == 0
+
+    await node.aprocess()
+    assert node.parameter_output_values[AGENT_OUTPUT_PARAMETER] == "take 1"
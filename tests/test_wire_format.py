@@ -0,0 +1,46 @@
+"""Tests for /run body negotiation."""
+
+import gzip
+
+import pytest
+
+import wire_format
+
+
+def test_negotiate_prefers_compact_formats_the_client_accepts() -> None:
+    """Test that only formats both sides support are chosen, and q=0 refuses one."""
+    assert wire_format.negotiate(None, None) == (wire_format.JSON, wire_format.IDENTITY)
+    assert wire_format.negotiate("*/*", "gzip, deflate") == (wire_format.JSON, wire_format.GZIP)
+    assert wire_format.negotiate("application/json", "gzip;q=0") == (wire_format.JSON, wire_format.IDENTITY)
+
+    content_type, encoding = wire_format.negotiate(*wire_format.request_headers().values())
+    assert content_type == wire_format.content_types()[0]
+    assert encoding == wire_format.encodings()[0]
+
+
+@pytest.mark.parametrize("content_type", wire_format.content_types())
+@pytest.mark.parametrize("encoding", [*wire_format.encodings(), wire_format.IDENTITY])
+def test_round_trip_compresses_large_bodies(content_type: str, encoding: str) -> None:
+    """Test that every supported combination decodes to the original, compressing only large bodies."""
+    small = {"flow_input": {"Start Flow": {"speed": 1.0}}}
+    large = {"flow_input": {"Start Flow": {"game_data": "sortie " * 2000}}}
+
+    body, applied = wire_format.encode(small, content_type, encoding)
+    assert applied == wire_format.IDENTITY
+    assert wire_format.decode(body, content_type, applied) == small
+
+    body, applied = wire_format.encode(large, content_type, encoding)
+    assert applied == encoding
+    assert wire_format.decode(body, content_type, applied) == large
+
+
+def test_decode_rejects_unknown_and_malformed_bodies() -> None:
+    """Test that unsupported formats and corrupt bodies raise distinct errors."""
+    with pytest.raises(wire_format.UnsupportedWireFormatError):
+        wire_format.decode(b"{}", "text/plain")
+    with pytest.raises(wire_format.UnsupportedWireFormatError):
+        wire_format.decode(b"{}", wire_format.JSON, "br")
+    with pytest.raises(wire_format.MalformedBodyError):
+        wire_format.decode(b"not gzip", wire_format.JSON, wire_format.GZIP)
+    with pytest.raises(wire_format.MalformedBodyError):
+        wire_format.decode(gzip.compress(b"{"), wire_format.JSON, wire_format.GZIP)
@@ -0,0 +1,18 @@
+"""Tests for hosting several workflows in one process."""
+
+from workflow_host import HostedWorkflow
+
+
+def test_node_names_translate_between_module_and_engine() -> None:
+    """Test that clients address nodes by their module names while the engine sees its own."""
+    hosted = HostedWorkflow(
+        module="second_workflow",
+        flow_name="ControlFlow_2",
+        node_names={"Start Flow": "Start Flow_1", "End Flow": "End Flow_1"},
+    )
+
+    engine_input = hosted.engine_input({"Start Flow": {"speed": 1.0}})
+    output = hosted.client_output({"End Flow_1": {"was_successful": True}, "Other": {}})
+
+    assert engine_input == {"Start Flow_1": {"speed": 1.0}}
+    assert output == {"End Flow": {"was_successful": True}, "Other": {}}
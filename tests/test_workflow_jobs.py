@@ -0,0 +1,85 @@
+"""Tests for background workflow execution."""
+
+import asyncio
+import time
+from collections.abc import Iterator
+
+import pytest
+
+from workflow_jobs import WorkflowJobExecutor
+
+
+@pytest.fixture
+def executor() -> Iterator[WorkflowJobExecutor]:
+    """An executor whose background loop is stopped after the test."""
+    executor = WorkflowJobExecutor()
+    yield executor
+    executor.shutdown()
+
+
+async def _run(result: dict, delay: float = 0) -> dict:
+    await asyncio.sleep(delay)
+    return result
+
+
+def test_job_runs_in_background_until_collected(executor: WorkflowJobExecutor) -> None:
+    """Test that a submitted run finishes off the caller's thread and is removed once collected."""
+    job_id = executor.submit(_run({"was_successful": True}), kind="full")
+
+    job = executor.get(job_id)
+    assert job is not None
+    assert job.future.result(timeout=5) == {"was_successful": True}
+    assert job.done
+    assert executor.pop(job_id) is job
+    assert executor.get(job_id) is None
+
+
+def test_failed_job_keeps_its_exception(executor: WorkflowJobExecutor) -> None:
+    """Test that a run's error is reported to the session that polls it."""
+
+    async def fail() -> dict:
+        msg = "server down"
+        raise RuntimeError(msg)
+
+    job_id = executor.submit(fail(), kind="voice")
+    job = executor.get(job_id)
+    assert job is not None
+
+    with pytest.raises(RuntimeError, match="server down"):
+        job.future.result(timeout=5)
+
+
+def test_uncollected_finished_jobs_expire() -> None:
+    """Test that finished jobs nobody polled are dropped after the TTL, while running ones are kept."""
+    executor = WorkflowJobExecutor(result_ttl_seconds=0)
+    try:
+        finished = executor.submit(_run({}), kind="full")
+        finished_job = executor.get(finished)
+        assert finished_job is not None
+        finished_job.future.result(timeout=5)
+
+        running = executor.submit(_run({}, delay=60), kind="full")
+
+        assert executor.get(finished) is None
+        assert executor.get(running) is not None
+        assert executor.active_count() == 1
+    finally:
+        executor.shutdown()
+
+
+def test_unpolled_running_job_is_cancelled_as_abandoned() -> None:
+    """Test that a running job nobody polls is cancelled, while a polled one keeps running."""
+    executor = WorkflowJobExecutor(abandon_after_seconds=0.05)
+    try:
+        abandoned = executor.submit(_run({}, delay=60), kind="full")
+        polled = executor.submit(_run({}, delay=60), kind="full")
+        time.sleep(0.1)
+        executor.get(polled)
+
+        assert executor.cancel_abandoned() == [abandoned]
+        abandoned_job = executor.get(abandoned)
+        assert abandoned_job is not None
+        assert abandoned_job.future.cancelled()
+        assert executor.active_count() == 1
+    finally:
+        executor.shutdown()
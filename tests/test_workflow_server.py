@@ -0,0 +1,253 @@
+"""Tests for the workflow server's endpoints and run handling."""
+
+import asyncio
+import subprocess
+from pathlib import Path
+from typing import Any
+from unittest.mock import AsyncMock
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from griptape_nodes.retained_mode.griptape_nodes import GriptapeNodes
+
+import audio_processing
+import workflow_server
+from workflow_server import MixdownRequest, WorkflowRequest, WorkflowResponse
+
+CANCELLED = WorkflowResponse(output={"error": "Run cancelled"})
+
+
+class SlowFlow:
+    """Stands in for the engine: a run that lasts until released, noting whether it was cancelled."""
+
+    def __init__(self) -> None:
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+        self.cancelled = asyncio.Event()
+        self.runs = 0
+        self.voice_texts: list[str | None] = []
+
+    async def __call__(
+        self, flow_input: dict[str, Any], _hosted: object = None, voice_text: str | None = None
+    ) -> WorkflowResponse:
+        self.runs += 1
+        self.voice_texts.append(voice_text)
+        self.started.set()
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled.set()
+            raise
+        return WorkflowResponse(output={"End Flow": flow_input["Start Flow"]})
+
+
+class ClientRequest:
+    """The parts of an HTTP request the cancellation watcher looks at."""
+
+    def __init__(self) -> None:
+        self.disconnected = False
+
+    async def is_disconnected(self) -> bool:
+        return self.disconnected
+
+
+@pytest.fixture
+def warmup_report(monkeypatch: pytest.MonkeyPatch) -> dict:
+    """A fresh warm-up report, as at server start."""
+    report: dict = {"ready": False}
+    monkeypatch.setattr(workflow_server, "_warmup_report", report)
+    return report
+
+
+@pytest.mark.asyncio
+async def test_ready_only_after_warm_up(monkeypatch: pytest.MonkeyPatch, warmup_report: dict) -> None:
+    """Test that /health/ready answers 503 during warm-up and 200 once it has finished, while /health/live is up."""
+    monkeypatch.setattr(workflow_server, "_initialize_executor", AsyncMock())
+    monkeypatch.setattr(workflow_server, "_import_provider_modules", lambda: ["httpx"])
+    client = TestClient(workflow_server.app)
+
+    assert client.get("/health/live").status_code == 200  # noqa: PLR2004
+    assert client.get("/health/ready").status_code == 503  # noqa: PLR2004
+
+    await workflow_server._warm_up()  # noqa: SLF001
+
+    response = client.get("/health/ready")
+    assert response.status_code == 200  # noqa: PLR2004
+    assert response.json()["provider_modules"] == ["httpx"]
+    assert warmup_report["ready"]
+
+
+@pytest.mark.asyncio
+async def test_failed_warm_up_still_marks_server_ready(monkeypatch: pytest.MonkeyPatch, warmup_report: dict) -> None:
+    """Test that a warm-up error is reported but doesn't keep the server from taking runs."""
+    monkeypatch.setattr(workflow_server, "_initialize_executor", AsyncMock(side_effect=RuntimeError("no flow")))
+
+    await workflow_server._warm_up()  # noqa: SLF001
+
+    assert warmup_report["ready"]
+    assert warmup_report["error"] == "no flow"
+    assert TestClient(workflow_server.app).get("/health/ready").status_code == 200  # noqa: PLR2004
+
+
+@pytest.fixture
+def slow_flow(monkeypatch: pytest.MonkeyPatch) -> SlowFlow:
+    """Runs go to a SlowFlow instead of the engine."""
+    flow = SlowFlow()
+    monkeypatch.setattr(workflow_server, "_execute_flow", flow)
+    monkeypatch.setattr(workflow_server, "DISCONNECT_POLL_SECONDS", 0.01)
+    return flow
+
+
+def _run(request_id: str, client: ClientRequest | None = None, *, coalesce: bool = False) -> asyncio.Task:
+    request = WorkflowRequest(flow_input={"Start Flow": {"topic": "cancellation"}}, coalesce=coalesce)
+    run = workflow_server._handle_run(request)  # noqa: SLF001
+    return asyncio.create_task(
+        workflow_server._cancellable_run(client or ClientRequest(), request_id, run)  # type: ignore[arg-type]  # noqa: SLF001
+    )
+
+
+@pytest.mark.asyncio
+async def test_run_is_cancelled_by_request_id(slow_flow: SlowFlow) -> None:
+    """Test that POST /runs/{request_id}/cancel stops the flow and answers the caller with an error output."""
+    run = _run("request-1")
+    await slow_flow.started.wait()
+
+    assert await workflow_server.cancel_run("request-1") == {"request_id": "request-1", "cancelled": True}
+    assert await asyncio.wait_for(run, timeout=1) == CANCELLED
+    assert slow_flow.cancelled.is_set()
+    assert "request-1" not in workflow_server._runs_by_request_id  # noqa: SLF001
+
+
+@pytest.mark.asyncio
+async def test_client_disconnect_cancels_its_run(slow_flow: SlowFlow) -> None:
+    """Test that a run stops once the client that started it has gone away."""
+    client = ClientRequest()
+    run = _run("request-2", client)
+    await slow_flow.started.wait()
+
+    client.disconnected = True
+
+    assert await asyncio.wait_for(run, timeout=1) == CANCELLED
+    assert slow_flow.cancelled.is_set()
+
+
+@pytest.mark.asyncio
+async def test_coalesced_run_survives_one_caller_leaving(slow_flow: SlowFlow) -> None:
+    """Test that cancelling one of two coalesced callers leaves the shared run going for the other."""
+    leaving = _run("request-3", coalesce=True)
+    staying = _run("request-4", coalesce=True)
+    await slow_flow.started.wait()
+    await asyncio.sleep(0)
+
+    await workflow_server.cancel_run("request-3")
+    assert await asyncio.wait_for(leaving, timeout=1) == CANCELLED
+    slow_flow.release.set()
+
+    response = await asyncio.wait_for(staying, timeout=1)
+    assert response.output == {"End Flow": {"topic": "cancellation"}}
+    assert slow_flow.runs == 1
+    assert not slow_flow.cancelled.is_set()
+
+
+@pytest.mark.asyncio
+async def test_voice_only_runs_of_different_monologues_are_not_coalesced(slow_flow: SlowFlow) -> None:
+    """Test that identical inputs voicing different text run separately, each with its own text."""
+    flow_input = {"Start Flow": {"run_voice_generation_only": True}}
+    runs = [
+        asyncio.create_task(workflow_server._handle_run(WorkflowRequest(flow_input=flow_input, voice_text=text)))  # noqa: SLF001
+        for text in ("First take.", "Second take.")
+    ]
+    await slow_flow.started.wait()
+    await asyncio.sleep(0)
+    slow_flow.release.set()
+    await asyncio.wait_for(asyncio.gather(*runs), timeout=1)
+
+    assert sorted(slow_flow.voice_texts) == ["First take.", "Second take."]
+
+
+@pytest.mark.asyncio
+async def test_transcode_timeout_falls_back_to_original_audio(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """Test that a hung ffmpeg leaves a finished run's audio as it was instead of failing the response."""
+    source = tmp_path / "eleven_tts_1.mp3"
+    source.write_bytes(b"mp3")
+
+    def run(*_args: object, **_kwargs: object) -> None:
+        raise subprocess.TimeoutExpired(["ffmpeg"], audio_processing.FFMPEG_TIMEOUT_SECONDS)
+
+    monkeypatch.setattr(audio_processing, "find_ffmpeg", lambda: "/usr/bin/ffmpeg")
+    monkeypatch.setattr(audio_processing.subprocess, "run", run)
+    monkeypatch.setattr(workflow_server, "_local_audio_path", lambda _url: source)
+    artifact = {"type": "AudioUrlArtifact", "value": "http://localhost/static/eleven_tts_1.mp3"}
+
+    transcoded = await workflow_server._transcoded_artifact(artifact, audio_processing.AUDIO_ENCODINGS["opus"])  # noqa: SLF001
+
+    assert transcoded == artifact
+
+
+@pytest.fixture
+def workspace(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    """A temporary workspace for the server's stored files."""
+    path = tmp_path / "workspace"
+    path.mkdir()
+    monkeypatch.setattr(GriptapeNodes.ConfigManager(), "_workspace_path", str(path))
+    return path
+
+
+@pytest.mark.asyncio
+async def test_mixdown_timeout_returns_the_separate_tracks(monkeypatch: pytest.MonkeyPatch, workspace: Path) -> None:
+    """Test that a hung ffmpeg during the mixdown still answers with the run's voice and music."""
+    paths = {name: workspace / f"{name}.mp3" for name in ("voice", "music")}
+    for name, path in paths.items():
+        path.write_bytes(name.encode())
+    renders: list[list[str]] = []
+
+    def run(command: list[str], **_kwargs: object) -> None:
+        renders.append(command)
+        raise subprocess.TimeoutExpired(command, audio_processing.FFMPEG_TIMEOUT_SECONDS)
+
+    monkeypatch.setattr(audio_processing, "find_ffmpeg", lambda: "/usr/bin/ffmpeg")
+    monkeypatch.setattr(audio_processing.subprocess, "run", run)
+    # The default thread pool instead of worker processes, which wouldn't see the patches
+    monkeypatch.setattr(workflow_server, "_get_mix_pool", lambda: None)
+    monkeypatch.setattr(workflow_server, "_local_audio_path", lambda url: paths[url.rsplit("/", 1)[-1][:-4]])
+    output = {
+        "End Flow": {
+            "voice_audio_artifact": {"type": "AudioUrlArtifact", "value": "http://localhost/static/voice.mp3"},
+            "music_audio_artifact": {"type": "AudioUrlArtifact", "value": "http://localhost/static/music.mp3"},
+        }
+    }
+
+    assert await workflow_server._with_mixdown(output, MixdownRequest()) == output  # noqa: SLF001
+    assert len(renders) == 1
+
+
+def test_only_audio_in_the_workspace_is_mixed(workspace: Path) -> None:
+    """Test that mixdown inputs must be files in the workspace, however the URL names them."""
+    stored = workspace / "staticfiles" / "music.mp3"
+    stored.parent.mkdir()
+    stored.write_bytes(b"music")
+    outside = workspace.parent / "secret.mp3"
+    outside.write_bytes(b"secret")
+
+    assert workflow_server._workspace_audio_path(str(stored)) == stored  # noqa: SLF001
+    assert workflow_server._workspace_audio_path("staticfiles/music.mp3") == stored  # noqa: SLF001
+    assert workflow_server._workspace_audio_path(str(outside)) is None  # noqa: SLF001
+    assert workflow_server._workspace_audio_path("../secret.mp3") is None  # noqa: SLF001
+    assert workflow_server._workspace_audio_path("https://example.com/music.mp3") is None  # noqa: SLF001
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("workspace")
+async def test_music_url_outside_the_workspace_is_rejected_before_the_run(slow_flow: SlowFlow) -> None:
+    """Test that a mixdown with a music URL the server didn't store answers 400 without running the flow."""
+    request = WorkflowRequest(
+        flow_input={"Start Flow": {"run_voice_generation_only": True}},
+        mixdown=MixdownRequest(music_url="/etc/passwd"),
+    )
+
+    with pytest.raises(HTTPException) as rejected:
+        await workflow_server._handle_run(request)  # noqa: SLF001
+
+    assert rejected.value.status_code == 400  # noqa: PLR2004
+    assert slow_flow.runs == 0
@@ -0,0 +1,240 @@
+"""Tests for workflow server recycling."""
+
+import json
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import httpx
+import pytest
+
+from workflow_server_manager import (
+    ServerAddress,
+    WorkflowConfig,
+    WorkflowServerManager,
+    is_idle,
+    load_workflow_configs,
+    recycle_reason,
+)
+
+CONFIG = WorkflowConfig(name="Test", module="test_workflow", port=9000, max_rss_mb=100, max_requests=10)
+MB = 1024 * 1024
+
+
+def _health(rss_mb: float = 50, requests_total: int = 1, active: int = 0, queued: int = 0) -> dict[str, Any]:
+    return {
+        "process": {"rss_bytes": int(rss_mb * MB), "requests_total": requests_total, "active_requests": active},
+        "admission": {"queue_depth": queued},
+    }
+
+
+def test_recycle_reason_checks_memory_and_request_limits() -> None:
+    """Test that a server is recycled past either limit, and never when limits are off."""
+    assert recycle_reason(CONFIG, _health()) is None
+    assert "RSS" in (recycle_reason(CONFIG, _health(rss_mb=150)) or "")
+    assert "requests" in (recycle_reason(CONFIG, _health(requests_total=10)) or "")
+    unlimited = WorkflowConfig(name="Test", module="test_workflow", port=9000)
+    assert recycle_reason(unlimited, _health(rss_mb=10_000, requests_total=10_000)) is None
+
+
+def test_idle_needs_no_active_or_queued_requests() -> None:
+    """Test that a draining server counts as busy while it still has work."""
+    assert is_idle(_health())
+    assert not is_idle(_health(active=1))
+    assert not is_idle(_health(queued=1))
+
+
+def test_recycle_routes_to_replacement_before_stopping_old_server(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that new requests go to the replacement while the old server drains, and only then is it stopped."""
+    manager = WorkflowServerManager([CONFIG])
+    old_process, new_process = object(), object()
+    manager.processes[CONFIG.module] = old_process  # type: ignore[assignment]
+    manager.ports[CONFIG.module] = CONFIG.port
+    events: list[tuple[str, Any]] = []
+
+    def launch(_config: WorkflowConfig, port: int) -> object:
+        events.append(("launch", port))
+        return new_process
+
+    def drain(port: int, _process: subprocess.Popen) -> None:
+        events.append(("drain", port))
+        assert manager.get_port(CONFIG.module) != CONFIG.port
+
+    def stop(_module: str, process: subprocess.Popen) -> None:
+        events.append(("stop", process))
+
+    monkeypatch.setattr(manager, "_launch", launch)
+    monkeypatch.setattr(manager, "_drain", drain)
+    monkeypatch.setattr(manager, "_stop_process", stop)
+
+    assert manager.recycle(CONFIG)
+
+    new_port = manager.get_port(CONFIG.module)
+    assert events == [("launch", new_port), ("drain", CONFIG.port), ("stop", old_process)]
+    assert manager.processes[CONFIG.module] is new_process
+
+
+def test_startup_waits_for_readiness_not_liveness(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a starting server is polled on /health/ready until it stops answering 503."""
+    paths: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        paths.append(request.url.path)
+        return httpx.Response(503 if len(paths) < 3 else 200)  # noqa: PLR2004
+
+    def client(address: ServerAddress, **kwargs: Any) -> httpx.Client:
+        return httpx.Client(base_url=address.base_url, transport=httpx.MockTransport(handler), **kwargs)
+
+    monkeypatch.setattr(ServerAddress, "client", client)
+
+    assert WorkflowServerManager([CONFIG])._wait_for_health(CONFIG.port, timeout=5, interval=0)  # noqa: SLF001
+    assert paths == ["/health/ready"] * 3
+
+
+def test_configs_load_from_file(tmp_path: Path) -> None:
+    """Test that workflows are read from the configured JSON file."""
+    idle_seconds = 60
+    path = tmp_path / "workflows.json"
+    entry = {"name": "Test", "module": "test_workflow", "port": 9000, "idle_shutdown_seconds": idle_seconds}
+    path.write_text(json.dumps([entry]))
+
+    (config,) = load_workflow_configs(str(path))
+
+    assert config.module == "test_workflow"
+    assert config.idle_shutdown_seconds == idle_seconds
+    assert not config.preload
+
+
+def test_server_starts_on_first_request_and_stops_when_idle(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that get_port starts a stopped server once, and an idle server is stopped only after its idle period."""
+    config = WorkflowConfig(name="Test", module="test_workflow", port=9000, idle_shutdown_seconds=60)
+    manager = WorkflowServerManager([config])
+    launches: list[int] = []
+    stopped: list[str] = []
+    monkeypatch.setattr(manager, "_launch", lambda _config, port: launches.append(port) or object())
+    monkeypatch.setattr(manager, "_stop_process", lambda module, _process: stopped.append(module))
+
+    assert manager.get_port("test_workflow") == config.port
+    assert manager.get_port("test_workflow") == config.port
+    assert manager.get_port("unknown_workflow") is None
+    assert launches == [config.port]
+
+    assert not manager.stop_if_idle(config, _health())
+    manager.last_used["test_workflow"] = time.monotonic() - 61
+    assert not manager.stop_if_idle(config, _health(active=1))
+    assert manager.stop_if_idle(config, _health())
+    assert stopped == ["test_workflow"]
+    assert "test_workflow" not in manager.ports
+
+
+def test_hosted_module_routes_to_its_host_process(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a hosted module shares its host's server and runs at its own path."""
+    config = WorkflowConfig(name="Test", module="test_workflow", port=9000, hosted_modules=["other_workflow"])
+    manager = WorkflowServerManager([config])
+    launches: list[int] = []
+    monkeypatch.setattr(manager, "_launch", lambda _config, port: launches.append(port) or object())
+
+    assert manager.get_port("other_workflow") == config.port
+    assert manager.get_port("test_workflow") == config.port
+    assert launches == [config.port]
+    assert manager.run_path("other_workflow") == "/workflows/other_workflow/run"
+    assert manager.run_path("test_workflow") == "/run"
+
+
+def test_busy_module_gains_a_worker_that_shares_requests(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a sustained queue adds a worker and requests then rotate across both."""
+    config = WorkflowConfig(name="Test", module="test_workflow", port=9000, max_workers=2)
+    manager = WorkflowServerManager([config])
+    launches: list[int] = []
+    monkeypatch.setattr(manager, "_launch", lambda _config, port: launches.append(port) or object())
+    manager.get_port(config.module)
+
+    for _ in range(2):
+        manager.check_workers(config, {config.port: _health(active=1, queued=3)})
+        assert manager.wait_for_maintenance(config.module, timeout=5)
+
+    added_port = launches[-1]
+    assert manager.worker_ports(config.module) == [config.port, added_port]
+    assert {manager.get_port(config.module) for _ in range(2)} == {config.port, added_port}
+
+
+def test_socket_mode_launches_servers_on_unix_sockets(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """Test that servers bind sockets in the socket directory and added workers need no TCP port."""
+    manager = WorkflowServerManager([CONFIG], socket_dir=tmp_path / "sockets")
+    commands: list[list[str]] = []
+    monkeypatch.setattr(subprocess, "Popen", lambda command, **_kwargs: commands.append(command) or object())
+    monkeypatch.setattr(manager, "_wait_for_health", lambda _port: True)
+
+    port = manager.get_port(CONFIG.module)
+    manager._add_worker(CONFIG)  # noqa: SLF001
+
+    socket_paths = [manager.address(worker).socket_path for worker in manager.worker_ports(CONFIG.module)]
+    assert port == CONFIG.port
+    assert [command[command.index("--uds") + 1] for command in commands] == socket_paths
+    assert all(Path(path).parent == tmp_path / "sockets" for path in socket_paths if path)
+    assert manager.address(port).base_url == "http://workflow-server"
+
+
+class _RunningProcess:
+    def poll(self) -> None:
+        return None
+
+
+def test_drain_waits_through_missed_health_checks(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a server too busy to answer /health is drained until it reports idle, not stopped at once."""
+    manager = WorkflowServerManager([CONFIG])
+    reports = iter([None, _health(active=1), None, _health()])
+    polls: list[dict | None] = []
+    monkeypatch.setattr("workflow_server_manager.DRAIN_GRACE_SECONDS", 0)
+    monkeypatch.setattr(manager._stop_monitor, "wait", lambda _seconds: False)  # noqa: SLF001
+
+    def get_health(_port: int) -> dict[str, Any] | None:
+        report = next(reports)
+        polls.append(report)
+        return report
+
+    monkeypatch.setattr(manager, "_get_health", get_health)
+    manager._drain(CONFIG.port, _RunningProcess())  # type: ignore[arg-type]  # noqa: SLF001
+
+    expected_polls = 4
+    assert len(polls) == expected_polls
+
+
+def test_worker_over_its_limits_is_replaced_in_the_background(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a scaled worker past its limits gets a replacement before it drains, off the monitor thread."""
+    config = WorkflowConfig(name="Test", module="test_workflow", port=9000, max_rss_mb=100, max_workers=2)
+    manager = WorkflowServerManager([config])
+    events: list[tuple[str, Any]] = []
+    draining = threading.Event()
+    monkeypatch.setattr(manager, "_launch", lambda _config, port: events.append(("launch", port)) or object())
+    monkeypatch.setattr(manager, "_drain", lambda port, _process: draining.wait(5) and events.append(("drain", port)))
+    monkeypatch.setattr(manager, "_stop_process", lambda _module, _process: events.append(("stop", None)))
+    manager.get_port(config.module)
+    old_port = 9001
+    manager.scaled_workers[config.module] = {old_port: object()}  # type: ignore[dict-item]
+
+    manager.check_workers(config, {config.port: _health(), old_port: _health(rss_mb=150)})
+    assert manager.maintenance_running(config.module)
+    draining.set()
+    assert manager.wait_for_maintenance(config.module, timeout=5)
+
+    new_port = events[1][1]
+    assert events[1:] == [("launch", new_port), ("drain", old_port), ("stop", None)]
+    assert manager.worker_ports(config.module) == [config.port, new_port]
+
+
+def test_missing_health_report_doesnt_count_as_a_lost_worker(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a worker missing from one check isn't replaced as if it were gone."""
+    config = WorkflowConfig(name="Test", module="test_workflow", port=9000, min_workers=2, max_workers=2)
+    manager = WorkflowServerManager([config])
+    launches: list[int] = []
+    monkeypatch.setattr(manager, "_launch", lambda _config, port: launches.append(port) or object())
+    manager.get_port(config.module)
+    manager.scaled_workers[config.module] = {9001: object()}  # type: ignore[dict-item]
+
+    manager.check_workers(config, {config.port: _health()})
+    manager.wait_for_maintenance(config.module, timeout=5)
+
+    assert launches == [config.port]
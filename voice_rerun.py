@@ -0,0 +1,66 @@
+"""Voice-only reruns that bring the monologue they voice.
+
+A voice-only run skips the Speechwriter, and the TTS node voices whatever the
+Speechwriter last output in this process. That is only the monologue the user
+sees if this process ran the session's last full run. A new, recycled or
+different worker has no output (the engine would then run the Speechwriter and
+voice a new take), and a result served from the app's cache or restored from
+its history belongs to another run entirely.
+
+The client therefore sends the monologue it is showing with a voice-only run.
+It is set as the Speechwriter's output before the run, and a Speechwriter the
+engine runs anyway to resolve the TTS node's input returns it without calling
+the model.
+"""
+
+import contextvars
+import logging
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from griptape_nodes.exe_types.node_types import BaseNode
+
+from node_hooks import NodeProcess, find_node, wrap_nodes_by_name
+from speech_streaming import AGENT_OUTPUT_PARAMETER, SPEECHWRITER_NODE
+
+logger = logging.getLogger(__name__)
+
+# Monologue the current run voices instead of asking the Speechwriter for one
+_voice_text: contextvars.ContextVar[str | None] = contextvars.ContextVar("voice_text", default=None)
+
+
+@contextmanager
+def voicing(text: str, node_name: str = SPEECHWRITER_NODE) -> Iterator[None]:
+    """Make runs started inside the block voice `text` as the Speechwriter's output."""
+    node = find_node(node_name)
+    if node is not None:
+        node.parameter_output_values[AGENT_OUTPUT_PARAMETER] = text
+    token = _voice_text.set(text)
+    try:
+        yield
+    finally:
+        _voice_text.reset(token)
+
+
+async def _use_voice_text(node: BaseNode, process: NodeProcess) -> None:
+    text = _voice_text.get()
+    if text is None:
+        await process()
+        return
+    node.parameter_output_values[AGENT_OUTPUT_PARAMETER] = text
+
+
+def install_voice_text(node_names: list[str]) -> list[str]:
+    """Let voicing() stand in for the named Speechwriter nodes.
+
+    Install after every other hook on these nodes, so that it runs outermost
+    and a voiced run doesn't stream or hedge a call that never happens.
+
+    Returns:
+        The names of the nodes the hook was installed on.
+    """
+    installed = wrap_nodes_by_name(node_names, _use_voice_text)
+    if installed:
+        msg = f"Voice-only runs can supply the monologue for {', '.join(installed)}"
+        logger.info(msg)
+    return installed
@@ -0,0 +1,138 @@
+"""Content negotiation for /run request and response bodies.
+
+A run carries every Start Flow field, including several kilobytes of rules
+text and game data that can be much larger, and the response carries the
+full generated text. Bodies can be msgpack instead of JSON, and zstd or gzip
+compressed, in both directions. msgpack and zstd need the optional `msgpack`
+and `zstandard` packages. Without them, only JSON and gzip are offered, so
+either side falls back to what the other can read.
+"""
+
+import gzip
+import json
+from typing import Any
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+_MSGPACK_ALIASES = {MSGPACK, "application/x-msgpack"}
+
+ZSTD = "zstd"
+GZIP = "gzip"
+IDENTITY = "identity"
+
+# Bodies smaller than this aren't worth the compression round trip
+MIN_COMPRESS_BYTES = 1024
+
+
+class UnsupportedWireFormatError(Exception):
+    """A body uses a content type or encoding this side can't read."""
+
+
+class MalformedBodyError(Exception):
+    """A body couldn't be decompressed or parsed."""
+
+
+_DECODE_ERRORS: tuple[type[Exception], ...] = (ValueError, OSError, EOFError)
+if zstandard is not None:
+    _DECODE_ERRORS += (zstandard.ZstdError,)
+
+
+def content_types() -> list[str]:
+    """Body formats this side can read and write, most preferred first."""
+    return [MSGPACK, JSON] if msgpack is not None else [JSON]
+
+
+def encodings() -> list[str]:
+    """Compression schemes this side can read and write, most preferred first."""
+    return [ZSTD, GZIP] if zstandard is not None else [GZIP]
+
+
+def _media_type(header: str | None) -> str:
+    media_type = (header or JSON).split(";", 1)[0].strip().lower()
+    return MSGPACK if media_type in _MSGPACK_ALIASES else media_type
+
+
+def _accepted(header: str | None) -> list[str]:
+    """Values listed in an Accept or Accept-Encoding header, skipping those refused with q=0."""
+    accepted = []
+    for item in (header or "").split(","):
+        value, *params = (part.strip() for part in item.split(";"))
+        if value and not any(param.replace(" ", "") in {"q=0", "q=0.0"} for param in params):
+            accepted.append(value.lower())
+    return accepted
+
+
+def negotiate(accept: str | None, accept_encoding: str | None) -> tuple[str, str]:
+    """Pick the response content type and encoding from a client's Accept headers.
+
+    Returns:
+        The content type and encoding to respond with; JSON and identity when nothing better is accepted.
+    """
+    accepted_types = {_media_type(value) for value in _accepted(accept)}
+    content_type = next((value for value in content_types() if value in accepted_types), JSON)
+    accepted_encodings = set(_accepted(accept_encoding))
+    encoding = next((value for value in encodings() if value in accepted_encodings), IDENTITY)
+    return content_type, encoding
+
+
+def encode(data: Any, content_type: str = JSON, encoding: str = IDENTITY) -> tuple[bytes, str]:
+    """Serialize and compress a body.
+
+    Returns:
+        The body and the encoding actually applied; small bodies are left uncompressed.
+    """
+    if _media_type(content_type) == MSGPACK and msgpack is not None:
+        body = msgpack.packb(data, use_bin_type=True)
+    else:
+        body = json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode()
+    if len(body) < MIN_COMPRESS_BYTES:
+        return body, IDENTITY
+    if encoding == ZSTD and zstandard is not None:
+        return zstandard.ZstdCompressor().compress(body), ZSTD
+    if encoding == GZIP:
+        return gzip.compress(body, compresslevel=5), GZIP
+    return body, IDENTITY
+
+
+def decode(body: bytes, content_type: str | None = JSON, encoding: str | None = None) -> Any:
+    """Decompress and parse a body.
+
+    Raises:
+        UnsupportedWireFormatError: If the content type or encoding isn't available here.
+        MalformedBodyError: If the body doesn't decode as declared.
+    """
+    encoding = (encoding or IDENTITY).strip().lower()
+    media_type = _media_type(content_type)
+    if encoding not in {*encodings(), IDENTITY}:
+        msg = f"Unsupported content encoding {encoding!r}"
+        raise UnsupportedWireFormatError(msg)
+    if media_type not in content_types():
+        msg = f"Unsupported content type {media_type!r}"
+        raise UnsupportedWireFormatError(msg)
+
+    try:
+        if encoding == ZSTD:
+            body = zstandard.ZstdDecompressor().decompressobj().decompress(body)
+        elif encoding == GZIP:
+            body = gzip.decompress(body)
+        if media_type == MSGPACK:
+            return msgpack.unpackb(body, raw=False)
+        return json.loads(body)
+    except _DECODE_ERRORS as e:
+        msg = f"Malformed {media_type} body ({encoding}): {e}"
+        raise MalformedBodyError(msg) from e
+
+
+def request_headers() -> dict[str, str]:
+    """Accept headers a client sends to get the most compact response this side can read."""
+    return {"Accept": ", ".join(content_types()), "Accept-Encoding": ", ".join(encodings())}
@@ -0,0 +1,123 @@
+"""Hosting several workflow modules in one server process.
+
+Each workflow server process otherwise imports the whole griptape_nodes stack
+and node libraries for a single workflow. In multi-workflow mode the modules
+share one process: the libraries load once, and each workflow adds only its
+graph.
+
+The engine allows a single top-level flow, so the host creates an empty one
+and imports every module under it. Each module's flow becomes its own child
+flow, and a run selects that flow as the current context. Node names are
+unique across the process, so a node the module named "Start Flow" may be
+called "Start Flow_1" in the engine. Inputs and outputs are translated
+between the two names, and clients keep using the names from the module.
+"""
+
+import importlib
+import logging
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+from griptape_nodes.retained_mode.events.flow_events import CreateFlowRequest, CreateFlowResultSuccess
+from griptape_nodes.retained_mode.events.node_events import CreateNodeRequest, CreateNodeResultSuccess
+from griptape_nodes.retained_mode.griptape_nodes import GriptapeNodes
+
+logger = logging.getLogger(__name__)
+
+HOST_WORKFLOW_NAME = "workflow_host"
+HOST_FLOW_NAME = "Workflow Host"
+
+
+class WorkflowHostError(Exception):
+    """A workflow module couldn't be hosted."""
+
+
+@dataclass
+class HostedWorkflow:
+    """A workflow module loaded into its own flow within the shared process."""
+
+    module: str
+    flow_name: str
+    # Name each node was given in the module -> the name the engine assigned it
+    node_names: dict[str, str] = field(default_factory=dict)
+
+    def engine_input(self, flow_input: dict[str, Any]) -> dict[str, Any]:
+        """Rename the nodes in a client's flow_input to their names in the engine."""
+        return {self.node_names.get(name, name): values for name, values in flow_input.items()}
+
+    def client_output(self, output: dict[str, Any]) -> dict[str, Any]:
+        """Rename the nodes in a run's output back to their names in the module."""
+        module_names = {engine_name: name for name, engine_name in self.node_names.items()}
+        return {module_names.get(name, name): values for name, values in output.items()}
+
+    @contextmanager
+    def flow_context(self) -> Iterator[None]:
+        """Make this workflow's flow the one the executor runs."""
+        with GriptapeNodes.ContextManager().flow(self.flow_name):
+            yield
+
+
+@contextmanager
+def _recording_creations(hosted: HostedWorkflow) -> Iterator[None]:
+    """Record the flow and node names a module's import creates.
+
+    Published workflow modules build their graph through
+    GriptapeNodes.handle_request, which is wrapped while the module imports.
+    """
+    original = vars(GriptapeNodes)["handle_request"]
+    handle_request = GriptapeNodes.handle_request
+
+    def recording_handle_request(request: Any) -> Any:
+        result = handle_request(request)
+        if isinstance(request, CreateFlowRequest) and isinstance(result, CreateFlowResultSuccess):
+            hosted.flow_name = hosted.flow_name or result.flow_name
+        elif (
+            isinstance(request, CreateNodeRequest)
+            and isinstance(result, CreateNodeResultSuccess)
+            and request.node_name not in (None, result.node_name)
+        ):
+            hosted.node_names[request.node_name] = result.node_name
+        return result
+
+    GriptapeNodes.handle_request = recording_handle_request  # type: ignore[method-assign]
+    try:
+        yield
+    finally:
+        GriptapeNodes.handle_request = original  # type: ignore[method-assign]
+
+
+def _push_host_flow() -> None:
+    """Create the empty top-level flow the hosted workflows live under, and enter it."""
+    context_manager = GriptapeNodes.ContextManager()
+    if not context_manager.has_current_workflow():
+        context_manager.push_workflow(workflow_name=HOST_WORKFLOW_NAME)
+    result = GriptapeNodes.handle_request(
+        CreateFlowRequest(parent_flow_name=None, flow_name=HOST_FLOW_NAME, set_as_new_context=False, metadata={})
+    )
+    if not isinstance(result, CreateFlowResultSuccess):
+        msg = f"Failed to create the host flow: {result.result_details}"
+        raise WorkflowHostError(msg)
+    context_manager.push_flow(GriptapeNodes.FlowManager().get_flow_by_name(result.flow_name))
+
+
+def load_hosted_workflows(modules: list[str]) -> dict[str, HostedWorkflow]:
+    """Import each workflow module into its own flow under a shared host flow.
+
+    Returns:
+        The hosted workflows by module name, in the order given.
+    """
+    _push_host_flow()
+    hosted_workflows = {}
+    for module in modules:
+        hosted = HostedWorkflow(module=module, flow_name="")
+        with _recording_creations(hosted):
+            importlib.import_module(module)
+        if not hosted.flow_name:
+            msg = f"Workflow module {module} didn't create a flow"
+            raise WorkflowHostError(msg)
+        hosted_workflows[module] = hosted
+        msg = f"Hosting {module} in flow {hosted.flow_name} ({len(hosted.node_names)} nodes renamed)"
+        logger.info(msg)
+    return hosted_workflows
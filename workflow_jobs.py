@@ -0,0 +1,184 @@
+"""Background execution of workflow runs for the Streamlit app.
+
+Streamlit runs each session's script on a thread of its own, so awaiting a
+workflow inside the script pins that thread for the whole run and blocks the
+session from reacting to anything else. Runs are submitted here instead: one
+event loop on a daemon thread drives every session's workflow calls, and each
+session polls its job by id until it finishes.
+
+A session that stops polling (its browser tab was closed) no longer wants the
+result, so a running job left unpolled for a while is cancelled. Cancelling a
+job aborts its HTTP call, which the workflow server sees as a disconnect and
+answers by stopping the run.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from collections.abc import Coroutine
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Finished jobs that no session collected (e.g. the browser tab was closed) are dropped after this long
+DEFAULT_RESULT_TTL_SECONDS = 3600.0
+# Running jobs no session has polled for this long are cancelled. Sessions poll every second or so, but
+# browsers throttle timers in background tabs to about once a minute.
+DEFAULT_ABANDON_AFTER_SECONDS = 180.0
+# How often to look for abandoned jobs
+ABANDON_CHECK_SECONDS = 10.0
+
+
+@dataclass
+class WorkflowJob:
+    """A workflow run submitted from a Streamlit session."""
+
+    job_id: str
+    kind: str
+    future: Future
+    submitted_at: float = field(default_factory=time.monotonic)
+    finished_at: float | None = None
+    last_polled_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def done(self) -> bool:
+        """Whether the run has finished, successfully or not."""
+        return self.future.done()
+
+    @property
+    def elapsed_seconds(self) -> float:
+        """Time since submission, or the total run time once finished."""
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return end - self.submitted_at
+
+
+class WorkflowJobExecutor:
+    """Runs workflow coroutines on a single background event loop shared by all sessions."""
+
+    def __init__(
+        self,
+        result_ttl_seconds: float = DEFAULT_RESULT_TTL_SECONDS,
+        abandon_after_seconds: float | None = DEFAULT_ABANDON_AFTER_SECONDS,
+    ) -> None:
+        self.result_ttl_seconds = result_ttl_seconds
+        self.abandon_after_seconds = abandon_after_seconds
+        self.cancelled_total = 0
+        self.abandoned_total = 0
+        self._jobs: dict[str, WorkflowJob] = {}
+        self._lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="workflow-jobs", daemon=True)
+        self._thread.start()
+        if abandon_after_seconds is not None:
+            self._loop.call_soon_threadsafe(self._schedule_abandon_check)
+
+    def submit(self, coroutine: Coroutine[Any, Any, dict], kind: str) -> str:
+        """Start a workflow coroutine in the background.
+
+        Returns:
+            The id to poll the job with.
+        """
+        self._prune()
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+        job = WorkflowJob(job_id=uuid.uuid4().hex, kind=kind, future=future)
+        future.add_done_callback(lambda _: self._mark_finished(job))
+        with self._lock:
+            self._jobs[job.job_id] = job
+        msg = f"Submitted {kind} workflow job {job.job_id}"
+        logger.info(msg)
+        return job.job_id
+
+    def get(self, job_id: str) -> WorkflowJob | None:
+        """Look up a job, or None if it is unknown or was already collected.
+
+        Looking a job up counts as polling it, which keeps it from being cancelled as abandoned.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            job.last_polled_at = time.monotonic()
+        return job
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a running job, e.g. when the session starts a run that supersedes it.
+
+        Returns:
+            Whether the job was still running.
+        """
+        job = self.get(job_id)
+        if job is None or not job.future.cancel():
+            return False
+        self.cancelled_total += 1
+        msg = f"Cancelled {job.kind} workflow job {job.job_id}"
+        logger.info(msg)
+        return True
+
+    def pop(self, job_id: str) -> WorkflowJob | None:
+        """Collect a job, removing it from the executor."""
+        with self._lock:
+            return self._jobs.pop(job_id, None)
+
+    def active_count(self) -> int:
+        """Number of jobs still running."""
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if not job.done)
+
+    def shutdown(self) -> None:
+        """Cancel jobs still running and stop the background loop."""
+        asyncio.run_coroutine_threadsafe(self._cancel_running(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+    async def _cancel_running(self) -> None:
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _mark_finished(self, job: WorkflowJob) -> None:
+        if job.finished_at is None:
+            job.finished_at = time.monotonic()
+        if job.future.cancelled() or job.future.exception() is not None:
+            msg = f"Workflow job {job.job_id} failed after {job.elapsed_seconds:.1f}s"
+            logger.warning(msg)
+
+    def cancel_abandoned(self) -> list[str]:
+        """Cancel running jobs that no session has polled within abandon_after_seconds.
+
+        Returns:
+            The ids of the cancelled jobs.
+        """
+        if self.abandon_after_seconds is None:
+            return []
+        cutoff = time.monotonic() - self.abandon_after_seconds
+        with self._lock:
+            abandoned = [job for job in self._jobs.values() if not job.done and job.last_polled_at < cutoff]
+        cancelled = [job.job_id for job in abandoned if job.future.cancel()]
+        for job_id in cancelled:
+            msg = f"Cancelled workflow job {job_id}: no session has polled it for {self.abandon_after_seconds:.0f}s"
+            logger.info(msg)
+        self.abandoned_total += len(cancelled)
+        return cancelled
+
+    def _schedule_abandon_check(self) -> None:
+        self.cancel_abandoned()
+        self._loop.call_later(ABANDON_CHECK_SECONDS, self._schedule_abandon_check)
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for job in self._jobs.values():
+                # The future's done callbacks run after its waiters wake, so a done job may not be marked yet
+                if job.finished_at is None and job.done:
+                    job.finished_at = now
+            expired = [
+                job_id
+                for job_id, job in self._jobs.items()
+                if job.finished_at is not None and now - job.finished_at >= self.result_ttl_seconds
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
@@ -1,18 +1,46 @@
 """FastAPI server for executing Griptape Nodes workflows."""
 
+import asyncio
+import contextlib
+import copy
 import importlib
 import json
 import logging
+import math
+import multiprocessing
 import os
+import time
+from collections.abc import Coroutine
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import asynccontextmanager
+from pathlib import Path
 from typing import Any
+from urllib.parse import urlsplit, urlunsplit
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request, Response, status
+from fastapi.exceptions import RequestValidationError
 from griptape_nodes.bootstrap.workflow_executors.local_workflow_executor import LocalWorkflowExecutor
 from griptape_nodes.drivers.storage.storage_backend import StorageBackend
+from griptape_nodes.files.file import File, FileLoadError
+from griptape_nodes.retained_mode.events.execution_events import CancelFlowRequest, CancelFlowResultSuccess
 from griptape_nodes.retained_mode.events.flow_events import GetTopLevelFlowRequest, GetTopLevelFlowResultSuccess
 from griptape_nodes.retained_mode.griptape_nodes import GriptapeNodes
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
+
+import chunked_tts
+import context_projection
+import speech_streaming
+import voice_rerun
+import wire_format
+from admission_control import AdmissionController, AdmissionLimits, AdmissionRejectedError, Priority
+from audio_processing import AudioEncoding, MixSettings, negotiate_encoding, render_mix, transcode_file
+from input_sessions import InputSessionConflictError, InputSessionStore
+from leak_diagnostics import LeakDiagnostics
+from node_hooks import stubbed_node_processing, without_unchanged_values
+from provider_limiter import ProviderLimiterClient, install_outbound_limits
+from request_hedging import AGENT_NODE_TYPES, TTS_NODE_TYPES, HedgingPolicy, RequestHedger, install_request_hedging
+from single_flight import SingleFlight, canonical_input_key
+from workflow_host import HostedWorkflow, load_hosted_workflows
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -21,19 +49,174 @@ logger = logging.getLogger(__name__)
 # Get workflow module from environment variable
 WORKFLOW_MODULE = os.environ.get("WORKFLOW_MODULE", "published_nodes_workflow")
 
+# Host several workflow modules in this process, each in its own flow at /workflows/{module}/run; the first also
+# serves /run. Empty hosts WORKFLOW_MODULE alone.
+WORKFLOW_MODULES = [module.strip() for module in os.environ.get("WORKFLOW_MODULES", "").split(",") if module.strip()]
+
+# Admission limits - the server hosts a single retained-mode graph, so one run at a time by default
+MAX_IN_FLIGHT = int(os.environ.get("WORKFLOW_MAX_IN_FLIGHT", "1"))
+MAX_QUEUE_DEPTH = int(os.environ.get("WORKFLOW_MAX_QUEUE_DEPTH", "8"))
+PRIORITY_AGING_SECONDS = float(os.environ.get("WORKFLOW_PRIORITY_AGING_SECONDS", "30"))
+
+# Trim game_data down to what each expert agent needs before it reaches the prompt
+CONTEXT_PROJECTION_ENABLED = os.environ.get("WORKFLOW_CONTEXT_PROJECTION", "1") != "0"
+
+# Send the Speechwriter's monologue to TTS sentence by sentence while it is still being written
+STREAMING_TTS_ENABLED = os.environ.get("WORKFLOW_STREAMING_TTS", "0") == "1"
+TTS_MAX_CONCURRENCY = int(os.environ.get("WORKFLOW_TTS_MAX_CONCURRENCY", "2"))
+
+# Synthesize long monologues as concurrent chunks, reusing audio for unchanged chunks
+CHUNKED_TTS_ENABLED = os.environ.get("WORKFLOW_CHUNKED_TTS", "0") == "1"
+TTS_CHUNK_CHARS = int(os.environ.get("WORKFLOW_TTS_CHUNK_CHARS", "800"))
+
+# Bitrates for compact audio variants requested by clients
+AUDIO_BITRATES_KBPS = {
+    "opus": int(os.environ.get("WORKFLOW_OPUS_BITRATE_KBPS", "64")),
+    "aac": int(os.environ.get("WORKFLOW_AAC_BITRATE_KBPS", "96")),
+}
+
+# Worker processes for voice-over-music mixdowns
+MIX_WORKERS = int(os.environ.get("WORKFLOW_MIX_WORKERS", "1"))
+
+# Snapshot memory around every run and report growth at /admin/leaks; slows runs, meant for staging
+LEAK_DIAGNOSTICS_ENABLED = os.environ.get("WORKFLOW_LEAK_DIAGNOSTICS", "0") == "1"
+LEAK_GROWTH_RUNS = int(os.environ.get("WORKFLOW_LEAK_GROWTH_RUNS", "5"))
+
+# Per-client Start Flow inputs held between runs, so clients can send only what changed
+INPUT_SESSIONS_MAX = int(os.environ.get("WORKFLOW_INPUT_SESSIONS_MAX", "256"))
+INPUT_SESSION_TTL_SECONDS = float(os.environ.get("WORKFLOW_INPUT_SESSION_TTL_SECONDS", "3600"))
+# Don't set Start Flow values that are unchanged since the previous run
+SKIP_UNCHANGED_INPUTS = os.environ.get("WORKFLOW_SKIP_UNCHANGED_INPUTS", "1") != "0"
+
+# Send a duplicate of Agent (and optionally TTS) provider calls still running at the node's p90 latency
+HEDGE_AGENT_CALLS = os.environ.get("WORKFLOW_HEDGE_AGENT_CALLS", "0") == "1"
+HEDGE_TTS_CALLS = os.environ.get("WORKFLOW_HEDGE_TTS_CALLS", "0") == "1"
+HEDGE_QUANTILE = float(os.environ.get("WORKFLOW_HEDGE_QUANTILE", "0.9"))
+HEDGE_MIN_SAMPLES = int(os.environ.get("WORKFLOW_HEDGE_MIN_SAMPLES", "20"))
+# Duplicates allowed per provider call, e.g. 0.05 for at most one extra call in twenty
+HEDGE_BUDGET_RATIO = float(os.environ.get("WORKFLOW_HEDGE_BUDGET_RATIO", "0.05"))
+
+# How often a waiting run checks whether its client has disconnected
+DISCONNECT_POLL_SECONDS = float(os.environ.get("WORKFLOW_DISCONNECT_POLL_SECONDS", "0.5"))
+# How long a cancelled flow gets to stop its nodes before its run is abandoned
+FLOW_CANCEL_GRACE_SECONDS = float(os.environ.get("WORKFLOW_FLOW_CANCEL_GRACE_SECONDS", "10"))
+
+# Warm-up before reporting ready: provider SDKs to import, and an optional dry run with every node stubbed out
+WARMUP_PROVIDER_MODULES = ("openai", "anthropic", "elevenlabs", "httpx")
+WARMUP_DRY_RUN = os.environ.get("WORKFLOW_WARMUP_DRY_RUN", "0") == "1"
+
+START_FLOW_NODE = "Start Flow"
+END_FLOW_NODE = "End Flow"
+VOICE_AUDIO_OUTPUT = "voice_audio_artifact"
+MUSIC_AUDIO_OUTPUT = "music_audio_artifact"
+MIXED_AUDIO_OUTPUT = "mixed_audio_artifact"
+
 # Global executor instance
 _executor: LocalWorkflowExecutor | None = None
 _executor_initialized = False
 
+# Workflows loaded in multi-workflow mode, by module; empty when hosting WORKFLOW_MODULE alone
+_hosted_workflows: dict[str, HostedWorkflow] = {}
+
+# Request counters reported in /health; the server manager recycles the process based on them
+_requests_total = 0
+_active_requests = 0
+
+# Runs in progress by client request id, for POST /runs/{request_id}/cancel
+_runs_by_request_id: dict[str, asyncio.Task] = {}
+_cancellations = {"client_disconnects": 0, "cancel_requests": 0, "flows_cancelled": 0}
+
+# Warm-up runs in the background so /health/live answers while /health/ready waits for it
+_warmup_task: asyncio.Task | None = None
+_warmup_report: dict[str, Any] = {"ready": False}
+
+_admission = AdmissionController(
+    AdmissionLimits(
+        max_in_flight=MAX_IN_FLIGHT,
+        max_queue_depth=MAX_QUEUE_DEPTH,
+        aging_seconds=PRIORITY_AGING_SECONDS,
+    )
+)
+_single_flight = SingleFlight()
+_input_sessions = InputSessionStore(max_sessions=INPUT_SESSIONS_MAX, ttl_seconds=INPUT_SESSION_TTL_SECONDS)
+_leak_diagnostics = LeakDiagnostics(growth_runs=LEAK_GROWTH_RUNS) if LEAK_DIAGNOSTICS_ENABLED else None
+_mix_pool: ProcessPoolExecutor | None = None
+_hedger = (
+    RequestHedger(
+        HedgingPolicy(quantile=HEDGE_QUANTILE, min_samples=HEDGE_MIN_SAMPLES, budget_ratio=HEDGE_BUDGET_RATIO)
+    )
+    if HEDGE_AGENT_CALLS or HEDGE_TTS_CALLS
+    else None
+)
+
+
+class MixdownRequest(BaseModel):
+    """Settings for rendering the voice over the music as one track.
+
+    music_url supplies the music when the run doesn't produce any, such as a
+    voice-only rerun mixing against music the client already has. It must
+    point to an audio file in this server's workspace, where the static file
+    server stores run outputs; anything else is rejected with a 400.
+    """
+
+    music_url: str | None = None
+    music_gain_db: float = MixSettings.music_gain_db
+    duck_ratio: float = MixSettings.duck_ratio
+
+
+class InputSessionUpdate(BaseModel):
+    """Start Flow inputs given as changes to what the server holds for a client session.
+
+    With no base_version, fields are the complete inputs and replace the
+    session. Otherwise they are merged into the inputs at base_version, and
+    the server answers 409 if it holds a different version.
+    """
+
+    session_id: str
+    base_version: str | None = None
+    fields: dict[str, Any] = {}
+
 
 class WorkflowRequest(BaseModel):
     """Generic input model for workflow execution.
 
     The flow_input field contains the complete workflow input structure,
     including the "Start Flow" key and all workflow-specific parameters.
+
+    When coalesce is true, a request whose flow_input matches a run already in
+    flight shares that run's result instead of starting another one. Set it to
+    false to force a fresh generation.
+
+    priority selects the scheduling lane while the server is busy. When omitted,
+    voice-only reruns are classified as high priority and everything else as
+    normal.
+
+    audio_formats lists the audio encodings the client can play, most preferred
+    first ("opus", "aac", or "original"). Audio artifacts in the output are
+    transcoded to the first one the server can produce.
+
+    mixdown, when set, adds a mixed_audio_artifact to the End Flow output with
+    the music ducked under the voice.
+
+    input_session, when set, supplies the "Start Flow" inputs from the
+    client's input session instead of flow_input.
+
+    request_id (or the X-Request-ID header) names the run, so that
+    POST /runs/{request_id}/cancel can stop it.
+
+    voice_text is the monologue a voice-only run voices, normally the
+    speechwriter_output the client is showing. Without it, the run voices
+    whatever the Speechwriter last generated in this process.
     """
 
-    flow_input: dict[str, Any]
+    flow_input: dict[str, Any] = {}
+    coalesce: bool = True
+    priority: Priority | None = None
+    audio_formats: list[str] = []
+    mixdown: MixdownRequest | None = None
+    input_session: InputSessionUpdate | None = None
+    request_id: str | None = None
+    voice_text: str | None = None
 
 
 class WorkflowResponse(BaseModel):
@@ -41,9 +224,13 @@ class WorkflowResponse(BaseModel):
 
     The output field contains the complete workflow output structure,
     including the "End Flow" key and all workflow-specific outputs.
+
+    input_version is the version of the client's input session after the run's
+    update, for the next delta to build on.
     """
 
     output: dict[str, Any] | None
+    input_version: str | None = None
 
 
 def _ensure_workflow_context() -> None:
@@ -64,6 +251,25 @@ def _ensure_workflow_context() -> None:
     context_manager.push_flow(flow_obj)
 
 
+def _classify_priority(request: WorkflowRequest) -> Priority:
+    """Pick the scheduling lane for a request."""
+    if request.priority is not None:
+        return request.priority
+    start_flow_input = request.flow_input.get("Start Flow", {})
+    if start_flow_input.get("run_voice_generation_only"):
+        return Priority.HIGH
+    return Priority.NORMAL
+
+
+def _get_mix_pool() -> ProcessPoolExecutor:
+    """Get or create the process pool that renders mixdowns."""
+    global _mix_pool  # noqa: PLW0603
+    if _mix_pool is None:
+        # Spawn rather than fork: the server process runs threads that a fork would copy mid-state
+        _mix_pool = ProcessPoolExecutor(max_workers=MIX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _mix_pool
+
+
 def _get_executor() -> LocalWorkflowExecutor:
     """Get or create the workflow executor instance."""
     global _executor  # noqa: PLW0603
@@ -73,46 +279,581 @@ def _get_executor() -> LocalWorkflowExecutor:
     return _executor
 
 
+async def _initialize_executor() -> LocalWorkflowExecutor:
+    """Push the flow context and enter the shared executor, once."""
+    global _executor_initialized  # noqa: PLW0603
+
+    executor = _get_executor()
+    _ensure_workflow_context()
+    if not _executor_initialized:
+        await executor.__aenter__()
+        _executor_initialized = True
+    return executor
+
+
+def _rss_bytes() -> int | None:
+    """Resident memory of this process, read from /proc where available."""
+    try:
+        with Path("/proc/self/statm").open() as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def _import_provider_modules() -> list[str]:
+    """Import provider SDKs up front so the first run doesn't pay for it."""
+    imported = []
+    for module_name in WARMUP_PROVIDER_MODULES:
+        try:
+            importlib.import_module(module_name)
+        except ImportError:
+            continue
+        imported.append(module_name)
+    return imported
+
+
+async def _dry_run(executor: LocalWorkflowExecutor) -> None:
+    """Run each flow once with every node stubbed out, warming the engine's execution path."""
+    with stubbed_node_processing() as stubbed:
+        if not _hosted_workflows:
+            await executor.arun(flow_input={START_FLOW_NODE: {}}, pickle_control_flow_result=False)
+        for hosted in _hosted_workflows.values():
+            with hosted.flow_context():
+                flow_input = hosted.engine_input({START_FLOW_NODE: {}})
+                await executor.arun(flow_input=flow_input, pickle_control_flow_result=False)
+    logger.info("Dry run resolved %d flow(s) with %d nodes stubbed", max(len(_hosted_workflows), 1), stubbed)
+
+
+async def _warm_up() -> None:
+    """Do every first-run initialization before the server reports ready.
+
+    A failed warm-up is reported but still marks the server ready: runs then
+    initialize lazily and surface the error themselves, as before warm-up existed.
+    """
+    started_at = time.monotonic()
+    try:
+        executor = await _initialize_executor()
+        _warmup_report["provider_modules"] = await asyncio.to_thread(_import_provider_modules)
+        if WARMUP_DRY_RUN:
+            await _dry_run(executor)
+    except Exception as e:
+        logger.exception("Warm-up failed, initializing on the first run instead")
+        _warmup_report["error"] = str(e)
+    _warmup_report["seconds"] = round(time.monotonic() - started_at, 3)
+    _warmup_report["ready"] = True
+    logger.info("Workflow server ready after %.2fs warm-up", _warmup_report["seconds"])
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):  # noqa: ARG001
     """Lifespan context manager for FastAPI startup/shutdown."""
-    logger.info("Loading workflow module: %s", WORKFLOW_MODULE)
-    importlib.import_module(WORKFLOW_MODULE)
-    logger.info("Workflow module %s loaded successfully", WORKFLOW_MODULE)
+    if WORKFLOW_MODULES:
+        logger.info("Loading workflow modules: %s", ", ".join(WORKFLOW_MODULES))
+        _hosted_workflows.update(load_hosted_workflows(WORKFLOW_MODULES))
+        logger.info("Hosting %d workflows in one process", len(_hosted_workflows))
+    else:
+        logger.info("Loading workflow module: %s", WORKFLOW_MODULE)
+        importlib.import_module(WORKFLOW_MODULE)
+        logger.info("Workflow module %s loaded successfully", WORKFLOW_MODULE)
+
+    if CONTEXT_PROJECTION_ENABLED:
+        context_projection.install_context_projection(context_projection.load_projection_specs())
+    # Streaming installs last so it wraps chunking and falls back to it when nothing was streamed
+    if CHUNKED_TTS_ENABLED:
+        chunked_tts.install_chunked_tts(max_chunk_chars=TTS_CHUNK_CHARS, max_concurrency=TTS_MAX_CONCURRENCY)
+    if STREAMING_TTS_ENABLED:
+        speech_streaming.install_streaming_tts(max_concurrency=TTS_MAX_CONCURRENCY)
+
+    limiter_client = ProviderLimiterClient.from_env()
+    if limiter_client is not None:
+        install_outbound_limits(limiter_client)
+    # Hedging installs after the limits so duplicate calls take a lease too
+    if _hedger is not None:
+        hedged_types = (AGENT_NODE_TYPES if HEDGE_AGENT_CALLS else ()) + (TTS_NODE_TYPES if HEDGE_TTS_CALLS else ())
+        # The streaming Speechwriter's output is voiced as it arrives, which reading it whole would undo
+        streamed = (speech_streaming.SPEECHWRITER_NODE,) if STREAMING_TTS_ENABLED else ()
+        install_request_hedging(_hedger, hedged_types, exclude=streamed)
+    # Outermost on the Speechwriter, so a voiced run skips its other hooks too
+    voice_rerun.install_voice_text(
+        [_speechwriter_name(hosted) for hosted in list(_hosted_workflows.values()) or [None]]
+    )
+
+    if _leak_diagnostics is not None:
+        _leak_diagnostics.start()
+
+    global _warmup_task  # noqa: PLW0603
+    _warmup_task = asyncio.create_task(_warm_up())
     yield
 
+    if not _warmup_task.done():
+        _warmup_task.cancel()
+
+    if _mix_pool is not None:
+        _mix_pool.shutdown(cancel_futures=True)
+
 
 # FastAPI app with lifespan
 app = FastAPI(title="Griptape Nodes Workflow Server", lifespan=lifespan)
 
 
+@app.get("/health/live")
+async def liveness_check() -> dict:
+    """Liveness endpoint: the process is up and serving requests."""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def readiness_check(response: Response) -> dict:
+    """Readiness endpoint: 503 until warm-up has finished, 200 afterwards."""
+    if not _warmup_report["ready"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "warming_up"}
+    return {"status": "ready", **_warmup_report}
+
+
 @app.get("/health")
 async def health_check() -> dict:
     """Health check endpoint."""
-    return {"status": "healthy", "workflow_module": WORKFLOW_MODULE}
+    return {
+        "status": "healthy",
+        "workflow_module": WORKFLOW_MODULES[0] if WORKFLOW_MODULES else WORKFLOW_MODULE,
+        "hosted_workflows": list(_hosted_workflows),
+        "warmup": _warmup_report,
+        "process": {
+            "pid": os.getpid(),
+            "rss_bytes": _rss_bytes(),
+            "requests_total": _requests_total,
+            "active_requests": _active_requests,
+        },
+        "admission": _admission.stats(),
+        "coalescing": _single_flight.stats(),
+        "input_sessions": _input_sessions.stats(),
+        "cancellation": {**_cancellations, "cancellable_runs": len(_runs_by_request_id)},
+        "context_projection": {
+            node_name: {"tokens_before": report.tokens_before, "tokens_after": report.tokens_after}
+            for node_name, report in context_projection.last_reports.items()
+        },
+        "streaming_tts": speech_streaming.last_run_stats,
+        "chunked_tts": {**chunked_tts.last_run_stats, "cache": chunked_tts.cache_stats()},
+        "hedging": _hedger.stats() if _hedger is not None else None,
+    }
+
+
+@app.get("/admin/leaks")
+async def leak_report() -> dict:
+    """Memory growth per run, top growing allocation sites and per-node object counts.
+
+    Only available when the server runs with WORKFLOW_LEAK_DIAGNOSTICS=1.
+    """
+    if _leak_diagnostics is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Leak diagnostics are off; start the server with WORKFLOW_LEAK_DIAGNOSTICS=1",
+        )
+    return _leak_diagnostics.summary()
 
 
-@app.post("/run")
-async def run_workflow(request: WorkflowRequest) -> WorkflowResponse:
+@app.post("/run", response_model=WorkflowResponse)
+async def run_workflow(http_request: Request) -> Response:
     """Execute the workflow with the given flow_input.
 
-    The flow_input should contain the complete workflow input structure,
-    typically with a "Start Flow" key containing all workflow parameters.
+    The body is a WorkflowRequest. The flow_input should contain the complete
+    workflow input structure, typically with a "Start Flow" key containing all
+    workflow parameters.
+
+    Bodies may be JSON or msgpack (Content-Type), compressed with gzip or zstd
+    (Content-Encoding). The response uses the most compact format the Accept
+    and Accept-Encoding headers allow.
+
+    Identical concurrent requests are coalesced onto a single run unless the
+    request opts out. Runs beyond the in-flight limit wait in a bounded queue
+    per priority lane. When the lane is full the request is rejected with 429
+    and a Retry-After estimate.
+
+    A run stops when its client disconnects or cancels it by request id. A run
+    shared with coalesced callers stops only once all of them have gone.
 
     Returns the raw workflow output dict.
     """
-    global _executor_initialized  # noqa: PLW0603
+    hosted = next(iter(_hosted_workflows.values()), None)
+    return await _counted_run(http_request, hosted)
+
+
+@app.post("/workflows/{module}/run", response_model=WorkflowResponse)
+async def run_hosted_workflow(module: str, http_request: Request) -> Response:
+    """Execute one of the workflows hosted by this process, like /run.
+
+    All hosted workflows share the process's admission limits, since the engine
+    runs one flow at a time.
+    """
+    if module in _hosted_workflows:
+        return await _counted_run(http_request, _hosted_workflows[module])
+    if not _hosted_workflows and module == WORKFLOW_MODULE:
+        return await _counted_run(http_request, None)
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Workflow {module} is not hosted here")
+
 
+@app.post("/runs/{request_id}/cancel")
+async def cancel_run(request_id: str) -> dict:
+    """Cancel the run a client started with this request id.
+
+    The client's /run call answers with an error output. A run shared with
+    coalesced callers keeps going for the others.
+    """
+    task = _runs_by_request_id.get(request_id)
+    if task is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No run in progress for {request_id}")
+    _cancellations["cancel_requests"] += 1
+    task.cancel()
+    logger.info("Cancelling run %s on request", request_id)
+    return {"request_id": request_id, "cancelled": True}
+
+
+async def _counted_run(http_request: Request, hosted: HostedWorkflow | None) -> Response:
+    """Handle a run, keeping the request counters reported in /health."""
+    global _requests_total, _active_requests  # noqa: PLW0603
+    request = await _read_run_request(http_request)
+    input_version = None
+    if request.input_session is not None:
+        request, input_version = _with_session_inputs(request, request.input_session)
+    request_id = request.request_id or http_request.headers.get("x-request-id")
+    _requests_total += 1
+    _active_requests += 1
+    try:
+        response = await _cancellable_run(http_request, request_id, _handle_run(request, hosted))
+    finally:
+        _active_requests -= 1
+    if input_version is not None:
+        response = response.model_copy(update={"input_version": input_version})
+    return _encoded_response(http_request, response)
+
+
+async def _cancellable_run(
+    http_request: Request, request_id: str | None, run: Coroutine[Any, Any, WorkflowResponse]
+) -> WorkflowResponse:
+    """Await a run as a task that a client disconnect or a cancel request can stop."""
+    task = asyncio.create_task(run)
+    if request_id is not None:
+        _runs_by_request_id[request_id] = task
+    watcher = asyncio.create_task(_cancel_on_disconnect(http_request, task))
     try:
-        executor = _get_executor()
-        _ensure_workflow_context()
+        return await task
+    except asyncio.CancelledError:
+        current = asyncio.current_task()
+        if current is not None and current.cancelling():
+            task.cancel()
+            raise
+        return WorkflowResponse(output={"error": "Run cancelled"})
+    finally:
+        watcher.cancel()
+        if request_id is not None and _runs_by_request_id.get(request_id) is task:
+            del _runs_by_request_id[request_id]
+
+
+async def _cancel_on_disconnect(http_request: Request, task: asyncio.Task) -> None:
+    """Cancel a run when the client that asked for it goes away."""
+    while not task.done():
+        if await http_request.is_disconnected():
+            _cancellations["client_disconnects"] += 1
+            logger.info("Client disconnected, cancelling its run")
+            task.cancel()
+            return
+        await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+
+
+def _with_session_inputs(request: WorkflowRequest, update: InputSessionUpdate) -> tuple[WorkflowRequest, str]:
+    """Apply an input session update and fill in the request's Start Flow inputs from the session."""
+    try:
+        version, inputs = _input_sessions.apply(update.session_id, update.base_version, update.fields)
+    except InputSessionConflictError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e)) from e
+    flow_input = {**request.flow_input, START_FLOW_NODE: inputs}
+    return request.model_copy(update={"flow_input": flow_input, "input_session": None}), version
 
-        if not _executor_initialized:
-            await executor.__aenter__()
-            _executor_initialized = True
 
-        await executor.arun(flow_input=request.flow_input, pickle_control_flow_result=False)
+async def _read_run_request(http_request: Request) -> WorkflowRequest:
+    """Parse a run request body in whichever wire format the client sent."""
+    headers = http_request.headers
+    try:
+        data = wire_format.decode(
+            await http_request.body(), headers.get("content-type"), headers.get("content-encoding")
+        )
+    except wire_format.UnsupportedWireFormatError as e:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=str(e)) from e
+    except wire_format.MalformedBodyError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+    try:
+        return WorkflowRequest.model_validate(data)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors()) from e
+
+
+def _encoded_response(http_request: Request, response: WorkflowResponse) -> Response:
+    """Serialize a run response in the most compact format the client accepts."""
+    content_type, encoding = wire_format.negotiate(
+        http_request.headers.get("accept"), http_request.headers.get("accept-encoding")
+    )
+    body, encoding = wire_format.encode(response.model_dump(), content_type, encoding)
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if encoding != wire_format.IDENTITY:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=content_type, headers=headers)
+
+
+async def _handle_run(request: WorkflowRequest, hosted: HostedWorkflow | None = None) -> WorkflowResponse:
+    """Run or join the workflow, then post-process its audio as requested."""
+    if request.mixdown is not None and request.mixdown.music_url is not None:
+        # Checked before the run, so a bad URL doesn't cost the caller a run
+        await _check_music_url(request.mixdown.music_url)
+    priority = _classify_priority(request)
+    if not request.coalesce:
+        response = await _admitted_run(request.flow_input, priority, hosted, request.voice_text)
+    else:
+        key = canonical_input_key(request.flow_input)
+        if request.voice_text is not None:
+            key = canonical_input_key({"flow_input": key, "voice_text": request.voice_text})
+        if hosted is not None:
+            key = f"{hosted.module}:{key}"
+        response, shared = await _single_flight.do(
+            key, lambda: _admitted_run(request.flow_input, priority, hosted, request.voice_text)
+        )
+        if shared:
+            logger.info("Coalesced request onto in-flight run %s", key[:12])
+
+    output = response.output
+    if output and request.mixdown is not None:
+        output = await _with_mixdown(output, request.mixdown)
+    encoding = negotiate_encoding(request.audio_formats)
+    if output and encoding is not None:
+        output = await _transcode_audio_outputs(output, encoding)
+    return WorkflowResponse(output=output)
+
+
+async def _with_mixdown(output: dict[str, Any], mixdown: MixdownRequest) -> dict[str, Any]:
+    """Add a voice-over-music track to the End Flow outputs.
+
+    Rendering runs in a worker process and is cached by both inputs and the
+    mix settings, so voice-only reruns only pay for mixing against the new voice.
+    """
+    end_flow = output.get(END_FLOW_NODE)
+    if not isinstance(end_flow, dict):
+        return output
+    voice_url = _artifact_url(end_flow.get(VOICE_AUDIO_OUTPUT))
+    music_url = mixdown.music_url or _artifact_url(end_flow.get(MUSIC_AUDIO_OUTPUT))
+    if voice_url is None or music_url is None:
+        return output
+
+    voice_path, music_path = await asyncio.gather(
+        asyncio.to_thread(_workspace_audio_path, voice_url), asyncio.to_thread(_workspace_audio_path, music_url)
+    )
+    if voice_path is None or music_path is None:
+        return output
+
+    settings = MixSettings(music_gain_db=mixdown.music_gain_db, duck_ratio=mixdown.duck_ratio)
+    loop = asyncio.get_running_loop()
+    try:
+        mix_path = await loop.run_in_executor(
+            _get_mix_pool(), render_mix, str(voice_path), str(music_path), str(voice_path.parent), settings
+        )
+    except (RuntimeError, OSError):
+        # A failed mix mustn't cost the caller the run it already paid for
+        logger.exception("Mixdown failed, returning separate voice and music tracks")
+        return output
+
+    mixed_artifact = {
+        "type": "AudioUrlArtifact",
+        "value": _sibling_url(voice_url, Path(mix_path)),
+        "name": Path(mix_path).name,
+        "meta": {"voice_url": voice_url, "music_url": music_url},
+    }
+    return {**output, END_FLOW_NODE: {**end_flow, MIXED_AUDIO_OUTPUT: mixed_artifact}}
+
+
+async def _transcode_audio_outputs(output: dict[str, Any], encoding: AudioEncoding) -> dict[str, Any]:
+    """Swap audio artifacts in a workflow output for compact variants.
+
+    Coalesced callers share one output, so the swap happens on a copy.
+    """
+    output = copy.deepcopy(output)
+    for node_outputs in output.values():
+        if not isinstance(node_outputs, dict):
+            continue
+        for name, value in node_outputs.items():
+            if isinstance(value, dict) and value.get("type") == "AudioUrlArtifact":
+                node_outputs[name] = await _transcoded_artifact(value, encoding)
+    return output
+
+
+async def _transcoded_artifact(artifact: dict[str, Any], encoding: AudioEncoding) -> dict[str, Any]:
+    """Point an audio artifact at a transcoded variant stored next to the original file."""
+    url = artifact.get("value")
+    if not isinstance(url, str):
+        return artifact
+    try:
+        target = await asyncio.to_thread(_transcode_local_audio, url, encoding)
+    except RuntimeError:
+        logger.exception("Returning original audio for %s", url)
+        return artifact
+    if target is None:
+        return artifact
+
+    meta = {**(artifact.get("meta") or {}), "original_url": url, "mime_type": encoding.mime_type}
+    return {**artifact, "value": _sibling_url(url, target), "name": target.name, "meta": meta}
+
+
+def _transcode_local_audio(url: str, encoding: AudioEncoding) -> Path | None:
+    """Transcode the file behind an artifact URL, or return None if it isn't stored on this machine."""
+    source = _local_audio_path(url)
+    if source is None:
+        return None
+    return transcode_file(source, encoding, AUDIO_BITRATES_KBPS.get(encoding.name))
+
+
+def _artifact_url(artifact: Any) -> str | None:
+    """The URL of a serialized audio artifact, preferring the original over a transcoded variant."""
+    if not isinstance(artifact, dict):
+        return None
+    url = (artifact.get("meta") or {}).get("original_url") or artifact.get("value")
+    return url if isinstance(url, str) else None
+
+
+def _local_audio_path(url: str) -> Path | None:
+    """Resolve an artifact URL to the file on this machine, or None if it isn't stored here."""
+    try:
+        path = Path(File(url).resolve())
+    except FileLoadError:
+        return None
+    return path if path.is_file() else None
+
+
+def _workspace_audio_path(url: str) -> Path | None:
+    """Like _local_audio_path, but only for files inside the workspace the static file server serves.
+
+    Client-supplied URLs go through this, so a request can't make ffmpeg read
+    arbitrary files on the server.
+    """
+    path = _local_audio_path(url)
+    if path is None:
+        return None
+    workspace = GriptapeNodes.ConfigManager().workspace_path.resolve()
+    return path if path.resolve().is_relative_to(workspace) else None
+
+
+async def _check_music_url(url: str) -> None:
+    """Reject a mixdown music URL that doesn't name an audio file stored by this server."""
+    if await asyncio.to_thread(_workspace_audio_path, url) is None:
+        logger.warning("Rejected mixdown music URL outside the workspace: %s", url)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="music_url must point to an audio file stored by this server",
+        )
+
+
+def _sibling_url(url: str, path: Path) -> str:
+    """URL for a file written next to the one `url` points at."""
+    parts = urlsplit(url)
+    if not parts.scheme:
+        return str(path)
+    return urlunsplit(parts._replace(path=f"{parts.path.rsplit('/', 1)[0]}/{path.name}", query=""))
+
+
+async def _admitted_run(
+    flow_input: dict[str, Any], priority: Priority, hosted: HostedWorkflow | None = None, voice_text: str | None = None
+) -> WorkflowResponse:
+    """Run the workflow once an admission slot is available."""
+    try:
+        async with _admission.admit(priority):
+            return await _execute_flow(flow_input, hosted, voice_text)
+    except AdmissionRejectedError as e:
+        logger.warning("Rejecting run: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        ) from e
+
+
+def _changed_inputs(flow_input: dict[str, Any]) -> dict[str, Any]:
+    """The flow input without the values the Start node already holds, when skipping is enabled."""
+    if not SKIP_UNCHANGED_INPUTS:
+        return flow_input
+    flow_input, skipped = without_unchanged_values(flow_input)
+    if skipped:
+        logger.info("Skipped setting %d unchanged input values", skipped)
+    return flow_input
+
+
+async def _arun_cancellable(executor: LocalWorkflowExecutor, flow_input: dict[str, Any]) -> None:
+    """Run the current flow; if the run is cancelled, stop the flow through the engine.
+
+    Cancelling the executor's task alone would leave the flow's node tasks and
+    provider calls running, and the engine still mid-run for the next request.
+    A CancelFlowRequest cancels the nodes and resets the control flow, which
+    ends the executor's run, so the flow is ready to run again. A flow that
+    doesn't stop within FLOW_CANCEL_GRACE_SECONDS is abandoned.
+    """
+    run = asyncio.ensure_future(executor.arun(flow_input=flow_input, pickle_control_flow_result=False))
+    try:
+        await asyncio.shield(run)
+    except asyncio.CancelledError:
+        if run.done():
+            raise
+        flow_name = GriptapeNodes.ContextManager().get_current_flow().name
+        result = await GriptapeNodes.ahandle_request(CancelFlowRequest(flow_name=flow_name))
+        if isinstance(result, CancelFlowResultSuccess):
+            _cancellations["flows_cancelled"] += 1
+            logger.info("Cancelled flow %s", flow_name)
+        else:
+            logger.warning("Could not cancel flow %s: %s", flow_name, result.result_details)
+        # The executor ends with an error once the engine reports the cancellation
+        with contextlib.suppress(Exception):
+            await asyncio.wait_for(run, timeout=FLOW_CANCEL_GRACE_SECONDS)
+        raise
+
+
+def _speechwriter_name(hosted: HostedWorkflow | None) -> str:
+    """The engine's name for a workflow's Speechwriter node."""
+    if hosted is None:
+        return voice_rerun.SPEECHWRITER_NODE
+    return hosted.node_names.get(voice_rerun.SPEECHWRITER_NODE, voice_rerun.SPEECHWRITER_NODE)
+
+
+async def _execute_flow(
+    flow_input: dict[str, Any], hosted: HostedWorkflow | None = None, voice_text: str | None = None
+) -> WorkflowResponse:
+    """Run the workflow once on the shared executor.
+
+    A hosted workflow runs in its own flow, with node names translated to and
+    from the engine's. With voice_text, the run voices that text instead of the
+    Speechwriter's last output.
+    """
+    try:
+        # Runs that arrive during warm-up wait for it instead of initializing in parallel
+        if _warmup_task is not None:
+            await asyncio.shield(_warmup_task)
+        executor = await _initialize_executor()
+
+        if _leak_diagnostics is not None:
+            await asyncio.to_thread(_leak_diagnostics.before_run)
+        voice = (
+            contextlib.nullcontext()
+            if voice_text is None
+            else voice_rerun.voicing(voice_text, _speechwriter_name(hosted))
+        )
+        try:
+            with voice:
+                if hosted is None:
+                    await _arun_cancellable(executor, _changed_inputs(flow_input))
+                else:
+                    with hosted.flow_context():
+                        await _arun_cancellable(executor, _changed_inputs(hosted.engine_input(flow_input)))
+        finally:
+            if _leak_diagnostics is not None:
+                await asyncio.to_thread(_leak_diagnostics.after_run)
         output = json.loads(json.dumps(executor.output))  # Deep copy to avoid serialization issues
+        if hosted is not None:
+            output = hosted.client_output(output)
 
         return WorkflowResponse(output=output)
 
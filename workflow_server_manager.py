@@ -1,15 +1,26 @@
 """Manager for workflow server subprocesses."""
 
 import atexit
+import itertools
+import json
 import logging
 import os
+import socket
 import subprocess
 import sys
+import threading
 import time
-from dataclasses import dataclass
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
 
 import httpx
 
+from autoscaling import Autoscaler, LoadSample, ScalingPolicy
+from provider_limiter import LIMITER_ADDRESS_ENV, ProviderLimiterServer, load_provider_limits
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,21 +31,155 @@ class WorkflowConfig:
     name: str
     module: str
     port: int
+    max_in_flight: int = 1
+    max_queue_depth: int = 8
+    priority_aging_seconds: float = 30.0
+    # Replace the server once it grows past this much memory or has served this many requests; None disables
+    max_rss_mb: float | None = None
+    max_requests: int | None = None
+    # Servers start on their first request unless preloaded, and stop after this long without one; None keeps them
+    preload: bool = False
+    idle_shutdown_seconds: float | None = None
+    # Further workflow modules served by the same process, each at /workflows/{module}/run
+    hosted_modules: list[str] = field(default_factory=list)
+    # Worker processes kept for the module, scaled between these on queue depth and p95 run time
+    min_workers: int = 1
+    max_workers: int = 1
+    target_p95_seconds: float | None = None
+
 
+CONFIGS_FILE_ENV = "WORKFLOW_CONFIGS_FILE"
+# Directory for workflow servers' Unix domain sockets; unset serves them over TCP on localhost ports
+SOCKET_DIR_ENV = "WORKFLOW_SOCKET_DIR"
 
-# Hardcoded list of workflows - add more here as needed
+# Workflows served when no config file is given
 WORKFLOW_CONFIGS = [
     WorkflowConfig(name="Audio Generation", module="published_nodes_workflow", port=8005),
 ]
 
 
+def load_workflow_configs(path: str | None = None) -> list[WorkflowConfig]:
+    """Load workflow server configs from a JSON file, falling back to WORKFLOW_CONFIGS.
+
+    The file holds a list of objects with the WorkflowConfig fields, e.g.
+    [{"name": "Audio Generation", "module": "published_nodes_workflow", "port": 8005, "idle_shutdown_seconds": 600}].
+    """
+    path = path or os.environ.get(CONFIGS_FILE_ENV)
+    if not path:
+        return list(WORKFLOW_CONFIGS)
+
+    configs_path = Path(path)
+    if not configs_path.exists():
+        msg = f"Workflow configs file {configs_path} not found, using defaults"
+        logger.warning(msg)
+        return list(WORKFLOW_CONFIGS)
+
+    with configs_path.open() as f:
+        return [WorkflowConfig(**entry) for entry in json.load(f)]
+
+
+# How often the manager checks each server's memory and request count
+MONITOR_INTERVAL_SECONDS = 15.0
+# How long a replaced server may take to finish its in-flight requests before it is stopped anyway
+DRAIN_TIMEOUT_SECONDS = 600.0
+# Time given to clients that looked up the old port just before the switch
+DRAIN_GRACE_SECONDS = 2.0
+
+
+def recycle_reason(config: WorkflowConfig, health: dict[str, Any]) -> str | None:
+    """Why a server should be replaced, based on its /health report, or None to keep it."""
+    process = health.get("process", {})
+    rss_bytes = process.get("rss_bytes")
+    if config.max_rss_mb is not None and rss_bytes is not None and rss_bytes > config.max_rss_mb * 1024 * 1024:
+        return f"RSS {rss_bytes / (1024 * 1024):.0f} MB exceeds {config.max_rss_mb:.0f} MB"
+    requests_total = process.get("requests_total", 0)
+    if config.max_requests is not None and requests_total >= config.max_requests:
+        return f"served {requests_total} requests (limit {config.max_requests})"
+    return None
+
+
+def is_idle(health: dict[str, Any]) -> bool:
+    """Whether a server's /health report shows no request in progress or waiting."""
+    active_requests = health.get("process", {}).get("active_requests", 0)
+    queue_depth = health.get("admission", {}).get("queue_depth", 0)
+    return active_requests == 0 and queue_depth == 0
+
+
+def scaling_policy(config: WorkflowConfig) -> ScalingPolicy:
+    """The autoscaling policy for a workflow's workers."""
+    return ScalingPolicy(
+        min_workers=config.min_workers,
+        max_workers=max(config.max_workers, config.min_workers),
+        target_p95_seconds=config.target_p95_seconds,
+    )
+
+
+# App sessions whose worker is remembered for sticky routing, least recently used forgotten first
+MAX_STICKY_SESSIONS = 4096
+
+# Workers on Unix sockets are numbered above the TCP port range, so their ids never clash with configured ports
+SOCKET_WORKER_IDS_START = 65536
+
+
+@dataclass(frozen=True)
+class ServerAddress:
+    """Where a workflow server listens: a localhost TCP port, or a Unix domain socket."""
+
+    port: int
+    socket_path: str | None = None
+
+    @property
+    def base_url(self) -> str:
+        """Base URL for requests; over a socket the host name is only used in the Host header."""
+        return f"http://localhost:{self.port}" if self.socket_path is None else "http://workflow-server"
+
+    def client(self, **kwargs: Any) -> httpx.Client:
+        """A client that sends requests to this server."""
+        transport = httpx.HTTPTransport(uds=self.socket_path) if self.socket_path is not None else None
+        return httpx.Client(base_url=self.base_url, transport=transport, **kwargs)
+
+    def async_client(self, **kwargs: Any) -> httpx.AsyncClient:
+        """An async client that sends requests to this server."""
+        transport = httpx.AsyncHTTPTransport(uds=self.socket_path) if self.socket_path is not None else None
+        return httpx.AsyncClient(base_url=self.base_url, transport=transport, **kwargs)
+
+
+def find_free_port() -> int:
+    """Ask the OS for a port nothing is listening on."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
 class WorkflowServerManager:
     """Manages workflow server subprocesses."""
 
     _instance: "WorkflowServerManager | None" = None
 
-    def __init__(self) -> None:
+    def __init__(self, configs: list[WorkflowConfig] | None = None, socket_dir: Path | None = None) -> None:
+        self.configs = {config.module: config for config in (configs or load_workflow_configs())}
+        # Hosted module -> the module whose server process hosts it
+        self.hosts = {hosted: config.module for config in self.configs.values() for hosted in config.hosted_modules}
         self.processes: dict[str, subprocess.Popen] = {}
+        self.ports: dict[str, int] = {}
+        self.last_used: dict[str, float] = {}
+        # Workers added by the autoscaler beyond the first, by module and port
+        self.scaled_workers: dict[str, dict[int, subprocess.Popen]] = {}
+        self.autoscaler = Autoscaler()
+        self._next_worker: dict[str, int] = {}
+        # Worker each app session was last routed to, by module and session id
+        self._session_workers: OrderedDict[tuple[str, str], int] = OrderedDict()
+        if socket_dir is None and os.environ.get(SOCKET_DIR_ENV):
+            socket_dir = Path(os.environ[SOCKET_DIR_ENV])
+        self.socket_dir = socket_dir
+        self._socket_worker_ids = itertools.count(SOCKET_WORKER_IDS_START)
+        self.provider_limiter: ProviderLimiterServer | None = None
+        self._lock = threading.Lock()
+        self._start_locks = {module: threading.Lock() for module in self.configs}
+        self._stop_monitor = threading.Event()
+        self._monitor: threading.Thread | None = None
+        # Recycling, scaling or retiring a module's workers in progress, one operation per module at a time
+        self._maintenance: dict[str, threading.Thread] = {}
 
     @classmethod
     def get_instance(cls) -> "WorkflowServerManager":
@@ -46,56 +191,327 @@ class WorkflowServerManager:
         return cls._instance
 
     def start_all(self) -> None:
-        """Start all workflow servers."""
-        for config in WORKFLOW_CONFIGS:
-            self._start_server(config)
+        """Start the shared provider limiter and the preloaded workflow servers.
+
+        Other servers start on the first request for their module.
+        """
+        self._start_provider_limiter()
+        for config in self.configs.values():
+            if config.preload:
+                self._start_server(config)
+        self._start_monitor()
+
+    def _start_provider_limiter(self) -> None:
+        """Start the limiter every workflow server consults before calling a provider."""
+        if self.provider_limiter is not None:
+            return
+        self.provider_limiter = ProviderLimiterServer(load_provider_limits())
+        self.provider_limiter.start()
 
     def _start_server(self, config: WorkflowConfig) -> None:
         """Start a single workflow server subprocess."""
-        if config.module in self.processes:
-            msg = f"Server for {config.module} already running"
-            logger.info(msg)
-            return
+        # Concurrent first requests for a module wait for one start instead of racing
+        with self._start_locks[config.module]:
+            if config.module in self.processes:
+                msg = f"Server for {config.module} already running"
+                logger.info(msg)
+                return
 
-        msg = f"Starting server for {config.module} on port {config.port}"
+            process = self._launch(config, config.port)
+            if process is None:
+                return
+            with self._lock:
+                self.processes[config.module] = process
+                self.ports[config.module] = config.port
+                self.last_used[config.module] = time.monotonic()
+
+    def _launch(self, config: WorkflowConfig, port: int) -> subprocess.Popen | None:
+        """Start a server process on `port` and wait until it is ready.
+
+        Returns:
+            The running process, or None if it didn't become ready in time.
+        """
+        msg = f"Starting server for {config.module} on port {port}"
         logger.info(msg)
 
         env = os.environ.copy()
         env["WORKFLOW_MODULE"] = config.module
+        if config.hosted_modules:
+            env["WORKFLOW_MODULES"] = ",".join([config.module, *config.hosted_modules])
+        env["WORKFLOW_MAX_IN_FLIGHT"] = str(config.max_in_flight)
+        env["WORKFLOW_MAX_QUEUE_DEPTH"] = str(config.max_queue_depth)
+        env["WORKFLOW_PRIORITY_AGING_SECONDS"] = str(config.priority_aging_seconds)
+        if self.provider_limiter is not None:
+            env[LIMITER_ADDRESS_ENV] = self.provider_limiter.address
 
-        # Don't pipe stdout/stderr so server logs appear in console
-        process = subprocess.Popen(  # noqa: S603
-            [
-                sys.executable,
-                "-m",
-                "fastapi",
-                "dev",
-                "workflow_server.py",
-                "--port",
-                str(config.port),
-            ],
-            env=env,
-        )
+        socket_path = self.address(port).socket_path
+        if socket_path is None:
+            command = [sys.executable, "-m", "fastapi", "dev", "workflow_server.py", "--port", str(port)]
+        else:
+            # A socket left behind by a server that didn't shut down cleanly would block the bind
+            Path(socket_path).parent.mkdir(parents=True, exist_ok=True)
+            Path(socket_path).unlink(missing_ok=True)
+            command = [sys.executable, "-m", "uvicorn", "workflow_server:app", "--uds", socket_path]
 
-        self.processes[config.module] = process
+        # Don't pipe stdout/stderr so server logs appear in console
+        process = subprocess.Popen(command, env=env)  # noqa: S603
 
-        if not self._wait_for_health(config.port):
+        if not self._wait_for_health(port):
             msg = f"Server for {config.module} failed to start within timeout"
             logger.error(msg)
             process.kill()
-            del self.processes[config.module]
+            return None
+
+        msg = f"Server for {config.module} started successfully on port {port}"
+        logger.info(msg)
+        return process
+
+    def _start_monitor(self) -> None:
+        """Start the thread that recycles servers past their limits and stops idle ones."""
+        if self._monitor is not None or not any(
+            config.max_rss_mb is not None
+            or config.max_requests is not None
+            or config.idle_shutdown_seconds is not None
+            or max(config.min_workers, config.max_workers) > 1
+            for config in self.configs.values()
+        ):
             return
+        self._monitor = threading.Thread(target=self._monitor_servers, name="workflow-server-monitor", daemon=True)
+        self._monitor.start()
+
+    def _monitor_servers(self) -> None:
+        while not self._stop_monitor.wait(MONITOR_INTERVAL_SECONDS):
+            for config in self.configs.values():
+                self._forget_exited_workers(config)
+                health = {port: self._get_health(port) for port in self.worker_ports(config.module)}
+                self.check_workers(config, {port: report for port, report in health.items() if report is not None})
 
-        msg = f"Server for {config.module} started successfully on port {config.port}"
+    def check_workers(self, config: WorkflowConfig, health: dict[int, dict[str, Any]]) -> None:
+        """Act on the /health reports of a module's workers: stop, recycle or scale them.
+
+        Recycling and scaling start, drain and stop servers, which takes minutes,
+        so they run in the background, one at a time per module, and the checks
+        of other modules carry on meanwhile.
+        """
+        with self._lock:
+            port = self.ports.get(config.module)
+        if port is None or port not in health or self.maintenance_running(config.module):
+            return
+        if self.stop_if_idle(config, health[port]):
+            return
+
+        reason = recycle_reason(config, health[port])
+        if reason is not None:
+            msg = f"Recycling server for {config.module}: {reason}"
+            logger.info(msg)
+            self._in_background(config.module, self.recycle, config)
+            return
+        for scaled_port, report in health.items():
+            reason = recycle_reason(config, report)
+            if scaled_port != port and reason is not None:
+                msg = f"Recycling worker for {config.module} on port {scaled_port}: {reason}"
+                logger.info(msg)
+                self._in_background(config.module, self._recycle_worker, config, scaled_port)
+                return
+
+        workers = len(self.worker_ports(config.module))
+        if len(health) < workers:
+            # A worker that missed this check is busy or starting, not gone; its load is unknown
+            return
+        decision = self.autoscaler.decide(
+            config.module, scaling_policy(config), LoadSample.from_health([*health.values()], workers=workers)
+        )
+        if decision is not None and decision.target > decision.current:
+            self._in_background(config.module, self._add_worker, config)
+        elif decision is not None:
+            self._in_background(config.module, self._remove_worker, config)
+
+    def maintenance_running(self, module: str) -> bool:
+        """Whether a module's workers are being recycled or scaled."""
+        with self._lock:
+            thread = self._maintenance.get(module)
+        return thread is not None and thread.is_alive()
+
+    def wait_for_maintenance(self, module: str, timeout: float | None = None) -> bool:
+        """Wait for a module's recycling or scaling to finish.
+
+        Returns:
+            True if nothing is left running.
+        """
+        with self._lock:
+            thread = self._maintenance.get(module)
+        if thread is not None:
+            thread.join(timeout)
+        return not self.maintenance_running(module)
+
+    def _in_background(self, module: str, operation: Callable[..., Any], *args: Any) -> None:
+        thread = threading.Thread(target=operation, args=args, name=f"workflow-maintenance-{module}", daemon=True)
+        with self._lock:
+            self._maintenance[module] = thread
+        thread.start()
+
+    def _forget_exited_workers(self, config: WorkflowConfig) -> None:
+        """Stop routing to scaled workers whose process has exited."""
+        with self._lock:
+            workers = self.scaled_workers.get(config.module, {})
+            exited = [port for port, process in workers.items() if process.poll() is not None]
+            for port in exited:
+                del workers[port]
+        for port in exited:
+            msg = f"Worker for {config.module} on port {port} exited"
+            logger.warning(msg)
+
+    def worker_ports(self, module: str) -> list[int]:
+        """Ports of every worker serving a module, the first worker's first."""
+        with self._lock:
+            port = self.ports.get(module)
+            return ([] if port is None else [port]) + list(self.scaled_workers.get(module, {}))
+
+    def _add_worker(self, config: WorkflowConfig) -> None:
+        """Start another worker for a module; it takes requests once ready."""
+        port = self._new_worker_port()
+        process = self._launch(config, port)
+        if process is None:
+            return
+        with self._lock:
+            self.scaled_workers.setdefault(config.module, {})[port] = process
+
+    def _remove_worker(self, config: WorkflowConfig, port: int | None = None) -> None:
+        """Stop routing to a scaled worker (the newest by default), let it drain, then stop it."""
+        with self._lock:
+            workers = self.scaled_workers.get(config.module, {})
+            if port is None and workers:
+                port = next(reversed(workers))
+            process = workers.pop(port, None) if port is not None else None
+        if process is None or port is None:
+            return
+        self._drain(port, process)
+        self._stop_process(config.module, process)
+
+    def _recycle_worker(self, config: WorkflowConfig, port: int) -> None:
+        """Replace a scaled worker: start the new one, then drain and stop the old one, like recycle()."""
+        new_port = self._new_worker_port()
+        new_process = self._launch(config, new_port)
+        if new_process is None:
+            msg = f"Keeping the worker for {config.module} on port {port}: replacement failed to start"
+            logger.warning(msg)
+            return
+        with self._lock:
+            workers = self.scaled_workers.setdefault(config.module, {})
+            workers[new_port] = new_process
+            old_process = workers.pop(port, None)
+        if old_process is not None:
+            self._drain(port, old_process)
+            self._stop_process(config.module, old_process)
+
+    def stop_if_idle(self, config: WorkflowConfig, health: dict[str, Any]) -> bool:
+        """Stop a server that has had no request for its idle period and has nothing in progress.
+
+        Returns:
+            True if the server was stopped.
+        """
+        if config.idle_shutdown_seconds is None or not is_idle(health):
+            return False
+        with self._lock:
+            idle_for = time.monotonic() - self.last_used.get(config.module, time.monotonic())
+            if idle_for < config.idle_shutdown_seconds:
+                return False
+            # Remove it while holding the lock so a new request starts a fresh server instead
+            process = self.processes.pop(config.module, None)
+            self.ports.pop(config.module, None)
+            scaled = self.scaled_workers.pop(config.module, {})
+        if process is None:
+            return False
+        msg = f"Server for {config.module} idle for {idle_for:.0f}s"
         logger.info(msg)
+        for scaled_process in [process, *scaled.values()]:
+            self._stop_process(config.module, scaled_process)
+        return True
+
+    def recycle(self, config: WorkflowConfig) -> bool:
+        """Replace a server with a fresh one without dropping requests.
+
+        The replacement starts on a new port and must be ready before new
+        requests are routed to it. The old server then finishes the requests
+        it already has and is stopped.
+
+        Returns:
+            True if the server was replaced.
+        """
+        with self._lock:
+            old_process = self.processes.get(config.module)
+            old_port = self.ports.get(config.module)
+        if old_process is None or old_port is None:
+            return False
+
+        new_port = self._new_worker_port()
+        new_process = self._launch(config, new_port)
+        if new_process is None:
+            msg = f"Keeping the current server for {config.module}: replacement failed to start"
+            logger.warning(msg)
+            return False
+
+        with self._lock:
+            self.processes[config.module] = new_process
+            self.ports[config.module] = new_port
 
-    def _wait_for_health(self, port: int, timeout: float = 30.0, interval: float = 0.5) -> bool:
-        """Wait for a server's health endpoint to respond."""
+        self._drain(old_port, old_process)
+        self._stop_process(config.module, old_process)
+        msg = f"Server for {config.module} replaced, now on port {new_port}"
+        logger.info(msg)
+        return True
+
+    def _drain(self, port: int, process: subprocess.Popen) -> None:
+        """Wait for a server that no longer receives new requests to finish its current ones.
+
+        A server too busy to answer /health in time counts as still working.
+        """
+        self._stop_monitor.wait(DRAIN_GRACE_SECONDS)
+        deadline = time.time() + DRAIN_TIMEOUT_SECONDS
+        while time.time() < deadline:
+            if process.poll() is not None:
+                return
+            health = self._get_health(port)
+            if health is not None and is_idle(health):
+                return
+            if self._stop_monitor.wait(1.0):
+                # Shutting down; stop_all stops every server anyway
+                return
+        msg = f"Server on port {port} still busy after {DRAIN_TIMEOUT_SECONDS:.0f}s, stopping it anyway"
+        logger.warning(msg)
+
+    def address(self, port: int) -> ServerAddress:
+        """How to reach the worker get_port returned: its port, or its socket in socket mode."""
+        if self.socket_dir is None:
+            return ServerAddress(port=port)
+        return ServerAddress(port=port, socket_path=str(self.socket_dir / f"workflow-{port}.sock"))
+
+    def _new_worker_port(self) -> int:
+        """Pick the port, or in socket mode just a unique id, for an additional worker."""
+        if self.socket_dir is None:
+            return find_free_port()
+        return next(self._socket_worker_ids)
+
+    def _get_health(self, port: int) -> dict[str, Any] | None:
+        """Fetch a server's /health report, or None if it doesn't answer."""
+        try:
+            with self.address(port).client(timeout=2.0) as client:
+                response = client.get("/health")
+                response.raise_for_status()
+                return response.json()
+        except (httpx.HTTPError, ValueError):
+            return None
+
+    def _wait_for_health(self, port: int, timeout: float = 120.0, interval: float = 0.5) -> bool:
+        """Wait for a server to finish warming up and report ready.
+
+        The readiness endpoint answers 503 until warm-up has finished.
+        """
         start_time = time.time()
         while time.time() - start_time < timeout:
             try:
-                with httpx.Client(timeout=2.0) as client:
-                    response = client.get(f"http://localhost:{port}/health")
+                with self.address(port).client(timeout=2.0) as client:
+                    response = client.get("/health/ready")
                     if httpx.codes.is_success(response.status_code):
                         return True
             except httpx.RequestError:
@@ -105,21 +521,85 @@ class WorkflowServerManager:
 
     def stop_all(self) -> None:
         """Stop all workflow server subprocesses."""
-        for module, process in self.processes.items():
-            msg = f"Stopping server for {module}"
-            logger.info(msg)
-            process.terminate()
-            try:
-                process.wait(timeout=5.0)
-            except subprocess.TimeoutExpired:
-                msg = f"Force killing server for {module}"
-                logger.warning(msg)
-                process.kill()
-        self.processes.clear()
-
-    def get_port(self, module: str) -> int | None:
-        """Get the port for a workflow module."""
-        for config in WORKFLOW_CONFIGS:
-            if config.module == module:
-                return config.port
-        return None
+        self._stop_monitor.set()
+        with self._lock:
+            processes = [*self.processes.items()]
+            processes += [
+                (module, process) for module, workers in self.scaled_workers.items() for process in workers.values()
+            ]
+            self.processes.clear()
+            self.ports.clear()
+            self.scaled_workers.clear()
+        for module, process in processes:
+            self._stop_process(module, process)
+
+        if self.provider_limiter is not None:
+            self.provider_limiter.stop()
+            self.provider_limiter = None
+
+    def get_port(self, module: str, session: str | None = None) -> int | None:
+        """Get the port of the server currently handling a workflow module, starting it if needed.
+
+        The port changes when a server is recycled or scaled, so look it up for
+        every request. Requests rotate across a module's workers, except that
+        an app session keeps going to the worker that served it last: that
+        worker holds the session's inputs and the monologue its voice-only
+        reruns voice. The first request for a stopped module blocks until its
+        server is ready.
+
+        A module hosted in another module's process resolves to that process;
+        send its runs to run_path(module).
+
+        Args:
+            module: The workflow module to run
+            session: Id of the app session making the request; None rotates across workers
+
+        Returns:
+            The port, or None if the module is unknown or its server failed to start.
+        """
+        module = self.hosts.get(module, module)
+        config = self.configs.get(module)
+        if config is None:
+            return None
+        with self._lock:
+            self.last_used[module] = time.monotonic()
+            port = self.ports.get(module)
+            if port is not None:
+                return self._route(module, [port, *self.scaled_workers.get(module, {})], session)
+
+        self._start_server(config)
+        with self._lock:
+            port = self.ports.get(module)
+            return None if port is None else self._route(module, [port], session)
+
+    def _route(self, module: str, ports: list[int], session: str | None) -> int:
+        """Pick one of a module's workers for a request; called with the lock held."""
+        key = (module, session) if session is not None else None
+        if key is not None and self._session_workers.get(key) in ports:
+            self._session_workers.move_to_end(key)
+            return self._session_workers[key]
+        turn = self._next_worker.get(module, 0)
+        self._next_worker[module] = turn + 1
+        port = ports[turn % len(ports)]
+        if key is not None:
+            # A session whose worker was retired or recycled moves to another one
+            self._session_workers[key] = port
+            self._session_workers.move_to_end(key)
+            while len(self._session_workers) > MAX_STICKY_SESSIONS:
+                self._session_workers.popitem(last=False)
+        return port
+
+    def run_path(self, module: str) -> str:
+        """The path that runs a workflow module on the server get_port returns for it."""
+        return f"/workflows/{module}/run" if module in self.hosts else "/run"
+
+    def _stop_process(self, module: str, process: subprocess.Popen) -> None:
+        msg = f"Stopping server for {module}"
+        logger.info(msg)
+        process.terminate()
+        try:
+            process.wait(timeout=5.0)
+        except subprocess.TimeoutExpired:
+            msg = f"Force killing server for {module}"
+            logger.warning(msg)
+            process.kill()